@@ -0,0 +1,314 @@
+"""API HTTP/JSON para canais externos (robô do WhatsApp, site): clientes,
+cardápio, pedidos, agenda e fila de produção, sobre as mesmas funções do funcoes_db.
+
+O SQLite é chamado fora do loop do asyncio (threads do Starlette) e usa o pool
+de conexões de sempre. Os pedidos que chegam juntos são gravados por um único
+gravador, em lotes, numa transação só: vários clientes pedindo ao mesmo tempo
+não disputam o banco. Valores em dinheiro vão e voltam em centavos.
+
+Uso: python api.py [banco.db] [--porta 8000]
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import funcoes_db
+
+LOTE_MAXIMO = 200      # pedidos por transação
+ESPERA_LOTE = 0.005    # segundos esperando mais pedidos antes de gravar o lote
+JANELA_FILA_DIAS = 60  # /producao sem 'fim': entregas de hoje até daqui a 60 dias
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _erro(status, mensagem):
+    return JSONResponse({"erro": mensagem}, status_code=status)
+
+
+# --- GRAVADOR EM LOTE ---
+
+class GravadorPedidos:
+    """Junta os pedidos que chegam ao mesmo tempo e grava todos numa transação só"""
+
+    def __init__(self, caminho=None, lote_maximo=LOTE_MAXIMO, espera=ESPERA_LOTE):
+        self.caminho = caminho
+        self.lote_maximo = lote_maximo
+        self.espera = espera
+        self._fila = asyncio.Queue()
+        self._tarefa = None
+
+    def iniciar(self):
+        self._tarefa = asyncio.create_task(self._rodar())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+
+    async def gravar(self, pedido):
+        """Espera a vez do pedido no próximo lote; devolve (id, total) ou levanta o erro dele"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((pedido, futuro))
+        return await futuro
+
+    async def _rodar(self):
+        while True:
+            lote = [await self._fila.get()]
+            # Dá um instante para os pedidos simultâneos entrarem no mesmo lote
+            await asyncio.sleep(self.espera)
+            while len(lote) < self.lote_maximo and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            try:
+                resultados = await run_in_threadpool(
+                    funcoes_db.registrar_pedidos_isolados, [p for p, _ in lote], self.caminho)
+            except Exception as erro:
+                resultados = [erro] * len(lote)
+            for (_, futuro), resultado in zip(lote, resultados):
+                if futuro.done():
+                    continue  # o cliente desistiu da requisição
+                if isinstance(resultado, BaseException):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+
+# --- LEITURA DOS PARÂMETROS ---
+
+async def _corpo_json(request):
+    try:
+        corpo = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise ErroRequisicao(400, "Corpo da requisição não é um JSON válido.")
+    if not isinstance(corpo, dict):
+        raise ErroRequisicao(400, "O corpo deve ser um objeto JSON.")
+    return corpo
+
+
+def _inteiro(valor, nome, minimo=None):
+    if isinstance(valor, bool) or not isinstance(valor, (int, str)):
+        raise ErroRequisicao(400, f"'{nome}' deve ser um número inteiro.")
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ErroRequisicao(400, f"'{nome}' deve ser um número inteiro.")
+    if minimo is not None and numero < minimo:
+        raise ErroRequisicao(400, f"'{nome}' deve ser no mínimo {minimo}.")
+    return numero
+
+
+def _data(valor, nome, padrao=None):
+    if valor in (None, ""):
+        return padrao
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, f"'{nome}' deve ser uma data AAAA-MM-DD.")
+
+
+def _pedido(corpo, request):
+    """Valida o JSON de um pedido e monta o dict de registrar_pedidos_isolados"""
+    itens = corpo.get("itens")
+    if not isinstance(itens, list) or not itens:
+        raise ErroRequisicao(400, "'itens' deve ser uma lista com pelo menos um item.")
+    lista = []
+    for item in itens:
+        if isinstance(item, dict):
+            item = (item.get("id_produto"), item.get("quantidade"))
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            raise ErroRequisicao(400, "Cada item deve ser {\"id_produto\": N, \"quantidade\": N}.")
+        lista.append((_inteiro(item[0], "id_produto"), _inteiro(item[1], "quantidade", 1)))
+    entrega = _data(corpo.get("data_entrega"), "data_entrega")
+    # A chave de idempotência pode vir no corpo ou no cabeçalho Idempotency-Key
+    chave = corpo.get("chave") or request.headers.get("idempotency-key")
+    return {
+        "id_cliente": _inteiro(corpo.get("id_cliente"), "id_cliente"),
+        "itens": lista,
+        "data_entrega": entrega.isoformat() if entrega else None,
+        "pagamento": corpo.get("pagamento"),
+        "observacoes": corpo.get("observacoes") or "",
+        "chave": f"api:{chave}" if chave else None,
+    }
+
+
+def _cliente_json(cliente):
+    return {k: cliente[k] for k in ("id", "nome", "telefone", "endereco", "versao")}
+
+
+def _produto_json(produto):
+    return {"id": produto["id"], "nome": produto["nome"], "preco_centavos": produto["preco"],
+            "tamanho": produto["tamanho"], "versao": produto["versao"]}
+
+
+# --- ROTAS ---
+
+async def saude(request):
+    versao = await run_in_threadpool(funcoes_db.versao_esquema)
+    return JSONResponse({"ok": True, "esquema": versao})
+
+
+async def listar_clientes(request):
+    limite = _inteiro(request.query_params.get("limite", 20), "limite", 1)
+    achados = await run_in_threadpool(funcoes_db.buscar_clientes, request.query_params.get("busca", ""), min(limite, 100))
+    return JSONResponse([{"id": id_, "nome": nome, "telefone": telefone} for id_, nome, telefone in achados])
+
+
+async def obter_cliente(request):
+    cliente = await run_in_threadpool(funcoes_db.obter_cliente, request.path_params["id"])
+    if cliente is None or cliente["excluido_em"]:
+        return _erro(404, "Cliente não encontrado.")
+    return JSONResponse(_cliente_json(cliente))
+
+
+async def criar_cliente(request):
+    corpo = await _corpo_json(request)
+    nome = (corpo.get("nome") or "").strip()
+    if not nome:
+        raise ErroRequisicao(400, "'nome' é obrigatório.")
+    id_cliente = await run_in_threadpool(funcoes_db.criar_cliente, nome, corpo.get("telefone") or "",
+                                         corpo.get("endereco") or "")
+    return JSONResponse({"id": id_cliente}, status_code=201)
+
+
+# As gerações da foto do cardápio recomeçam do zero a cada processo: o ETag leva
+# também uma marca do processo, senão um ETag antigo poderia bater com um cardápio novo
+_PROCESSO = uuid.uuid4().hex[:8]
+_corpo_cardapio = {}  # geração da foto -> JSON já pronto (só o da foto atual)
+
+
+async def cardapio(request):
+    """Cardápio com ETag: quem já tem a versão atual recebe 304 sem corpo (e sem montá-lo)"""
+    foto = await run_in_threadpool(funcoes_db.foto_cardapio)
+    etag = '"%s-%s"' % (_PROCESSO, "-".join(map(str, foto.geracao)))
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [e.strip() for e in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=cabecalhos)
+    corpo = _corpo_cardapio.get(foto.geracao)
+    if corpo is None:
+        corpo = json.dumps([_produto_json(p) for p in funcoes_db.cardapio(foto)],
+                           ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _corpo_cardapio.clear()
+        _corpo_cardapio[foto.geracao] = corpo
+    return Response(corpo, media_type="application/json", headers=cabecalhos)
+
+
+async def obter_produto(request):
+    produto = await run_in_threadpool(funcoes_db.obter_produto, request.path_params["id"])
+    if produto is None or produto["excluido_em"]:
+        return _erro(404, "Produto não encontrado.")
+    return JSONResponse({**_produto_json(produto), "ativo": bool(produto["ativo"])})
+
+
+async def criar_pedido(request):
+    pedido = _pedido(await _corpo_json(request), request)
+    try:
+        id_pedido, total = await request.app.state.gravador.gravar(pedido)
+    except funcoes_db.CapacidadeEsgotada as erro:
+        return _erro(409, str(erro))  # o canal pode oferecer outra data (ver /agenda)
+    except funcoes_db.PedidoInvalido as erro:
+        return _erro(422, str(erro))
+    except sqlite3.IntegrityError:
+        return _erro(422, f"Cliente {pedido['id_cliente']} não existe.")
+    except sqlite3.OperationalError as erro:
+        # Banco ocupado além do busy_timeout (ex.: recálculo longo): o cliente tenta de novo
+        return JSONResponse({"erro": f"Banco ocupado, tente de novo: {erro}"}, status_code=503,
+                            headers={"Retry-After": "1"})
+    return JSONResponse({"id": id_pedido, "valor_total_centavos": total}, status_code=201,
+                        headers={"Location": f"/pedidos/{id_pedido}"})
+
+
+async def obter_pedido(request):
+    pedido = await run_in_threadpool(funcoes_db.obter_pedido, request.path_params["id"])
+    if pedido is None:
+        return _erro(404, "Pedido não encontrado.")
+    pedido["valor_total_centavos"] = pedido.pop("valor_total")
+    pedido["itens"] = [{"id_produto": i["id_produto"], "produto": i["nome"], "quantidade": i["quantidade"],
+                        "valor_unitario_centavos": i["valor_unitario"], "total_centavos": i["total"]}
+                       for i in pedido["itens"]]
+    return JSONResponse(pedido)
+
+
+async def agenda(request):
+    """?ano=AAAA&mes=M: carga e limite de cada dia do mês (livre null = sem limite)"""
+    hoje = date.today()
+    ano = _inteiro(request.query_params.get("ano", hoje.year), "ano", 2000)
+    mes = _inteiro(request.query_params.get("mes", hoje.month), "mes", 1)
+    if mes > 12:
+        raise ErroRequisicao(400, "'mes' deve estar entre 1 e 12.")
+    dias = await run_in_threadpool(funcoes_db.calendario_capacidade, ano, mes)
+    return JSONResponse([{**d, "dia": d["dia"].isoformat()} for d in dias])
+
+
+async def fila_producao(request):
+    """?status=Pendente&status=Pronto&inicio=AAAA-MM-DD&fim=AAAA-MM-DD&pagina=1"""
+    consulta = request.query_params
+    status = consulta.getlist("status") or funcoes_db.STATUS_ABERTOS
+    hoje = date.today()
+    inicio = _data(consulta.get("inicio"), "inicio", hoje)
+    fim = _data(consulta.get("fim"), "fim", hoje + timedelta(days=JANELA_FILA_DIAS))
+    pagina = _inteiro(consulta.get("pagina", 1), "pagina", 1)
+    por_pagina = min(_inteiro(consulta.get("por_pagina", 50), "por_pagina", 1), 200)
+    pedidos = await run_in_threadpool(funcoes_db.fila_producao_registros, status, inicio, fim, pagina, por_pagina)
+    for p in pedidos:
+        p["cliente"] = p.pop("Cliente")
+        p["valor_total_centavos"] = p.pop("valor_total")
+    return JSONResponse({"pagina": pagina, "pedidos": pedidos})
+
+
+async def _erro_requisicao(request, erro):
+    return _erro(erro.status, str(erro))
+
+
+def criar_app(caminho=None):
+    """App Starlette sobre o banco 'caminho' (None = funcoes_db.DB_PATH)"""
+    if caminho:
+        funcoes_db.configurar(caminho)
+
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        await run_in_threadpool(funcoes_db.migrar)
+        app.state.gravador = GravadorPedidos()
+        app.state.gravador.iniciar()
+        yield
+        await app.state.gravador.parar()
+        funcoes_db.obter_pool().fechar()
+
+    rotas = [
+        Route("/saude", saude),
+        Route("/clientes", listar_clientes, methods=["GET"]),
+        Route("/clientes", criar_cliente, methods=["POST"]),
+        Route("/clientes/{id:int}", obter_cliente),
+        Route("/produtos", cardapio),
+        Route("/produtos/{id:int}", obter_produto),
+        Route("/pedidos", criar_pedido, methods=["POST"]),
+        Route("/pedidos/{id:int}", obter_pedido),
+        Route("/agenda", agenda),
+        Route("/producao", fila_producao),
+    ]
+    return Starlette(routes=rotas, lifespan=ciclo_de_vida, exception_handlers={ErroRequisicao: _erro_requisicao})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP/JSON do sistema de encomendas.")
+    parser.add_argument("banco", nargs="?")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(criar_app(args.banco), host=args.host, port=args.porta, log_level="warning")
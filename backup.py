@@ -0,0 +1,338 @@
+"""Backup e restauração do banco com o app no ar.
+
+A cópia usa a API de backup do SQLite (sqlite3.Connection.backup) andando
+PAGINAS_POR_PASSO páginas por vez, com uma pausa entre os passos: ninguém espera
+o backup inteiro para gravar. Cada backup é um .zip na pasta 'backups' ao lado do
+banco, com o banco principal, os arquivos de pedidos (arquivo_pedidos/) e um
+manifesto com a versão do esquema e as contagens, conferidos na hora de restaurar.
+Só os MANTER_BACKUPS mais novos ficam guardados.
+
+Uso: python backup.py [backup [banco.db] | listar [banco.db] | verificar backup.zip
+                       | restaurar backup.zip [banco.db]]
+"""
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+import funcoes_db
+
+PAGINAS_POR_PASSO = 1000  # ~4 MB por passo (páginas de 4 KB)
+PAUSA_PASSO = 0.005       # segundos entre os passos: a vez fica livre para quem grava
+RECOMECOS_MAXIMOS = 3     # gravação de outra conexão faz a cópia em passos recomeçar
+MANTER_BACKUPS = 7
+NIVEL_COMPRESSAO = 1      # zlib: o nível 1 já tira quase tudo de um banco SQLite e é o mais rápido
+
+MANIFESTO = "manifesto.json"
+TABELAS_CONTADAS = ("Clientes", "Produtos", "Pedidos", "Pedidos_Itens")
+
+
+class BackupInvalido(Exception):
+    pass
+
+
+def pasta_backups(caminho=None):
+    """Os backups ficam ao lado do banco, numa pasta própria"""
+    pasta = os.path.join(os.path.dirname(os.path.abspath(caminho or funcoes_db.DB_PATH)), "backups")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+# --- CÓPIA E VERIFICAÇÃO DE UM BANCO ---
+
+class _RecomecouDemais(Exception):
+    pass
+
+
+def _copiar(origem, destino, em_passos=True, progresso=None):
+    """Copia o banco 'origem' para 'destino' pela API de backup; devolve (páginas, recomeços).
+
+    Em passos, cada passo lê uma fatia e solta o banco. Se outra conexão gravar no
+    meio, o SQLite recomeça a cópia; depois de RECOMECOS_MAXIMOS ela é feita num
+    passo só (uma leitura do WAL, que não trava quem grava).
+    """
+    estado = {"restantes": None, "total": 0, "recomecos": 0}
+
+    def passo(status, restantes, total):
+        if estado["restantes"] is not None and restantes > estado["restantes"]:
+            estado["recomecos"] += 1
+            if estado["recomecos"] > RECOMECOS_MAXIMOS:
+                raise _RecomecouDemais()
+        estado["restantes"], estado["total"] = restantes, total
+        if progresso:
+            progresso(1 - restantes / max(total, 1))
+
+    fonte = sqlite3.connect(origem, timeout=funcoes_db.PRAGMAS["busy_timeout"] / 1000)
+    alvo = sqlite3.connect(destino, timeout=funcoes_db.PRAGMAS["busy_timeout"] / 1000)
+    try:
+        try:
+            if not em_passos:
+                raise _RecomecouDemais()
+            fonte.backup(alvo, pages=PAGINAS_POR_PASSO, progress=passo, sleep=PAUSA_PASSO)
+        except _RecomecouDemais:
+            fonte.backup(alvo)
+            estado["total"] = alvo.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        alvo.close()
+        fonte.close()
+    return estado["total"], estado["recomecos"]
+
+
+def _conferir(caminho, rapido=False):
+    """integrity_check (ou quick_check), versão do esquema e contagens de um banco copiado"""
+    conn = sqlite3.connect(caminho)
+    try:
+        resultado = [linha for (linha,) in conn.execute("PRAGMA quick_check" if rapido else "PRAGMA integrity_check")]
+        tabelas = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return {
+            "integridade": "ok" if resultado == ["ok"] else "; ".join(resultado[:5]),
+            "versao_esquema": conn.execute("PRAGMA user_version").fetchone()[0],
+            "contagens": {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                          for t in TABELAS_CONTADAS if t in tabelas},
+            "anos_arquivados": [ano for (ano,) in conn.execute("SELECT ano FROM Arquivos ORDER BY ano")]
+                               if "Arquivos" in tabelas else [],
+        }
+    finally:
+        conn.close()
+
+
+def _sozinho(caminho):
+    """Tira a cópia do modo WAL: o arquivo .db passa a ter tudo (sem -wal/-shm)"""
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+
+
+# --- BACKUP ---
+
+def fazer_backup(caminho=None, comprimir=True, manter=MANTER_BACKUPS, progresso=None):
+    """Cria o .zip de backup do banco (e dos arquivos de pedidos) e apaga os mais antigos.
+
+    progresso(fração, mensagem) é chamado durante a cópia. Devolve o manifesto
+    (dict) com o caminho do .zip em 'arquivo' e os tempos de cada etapa.
+    """
+    caminho = caminho or funcoes_db.DB_PATH
+    pasta = pasta_backups(caminho)
+    base = os.path.splitext(os.path.basename(caminho))[0]
+    agora = datetime.now()
+    destino = os.path.join(pasta, f"{base}_{agora:%Y%m%d-%H%M%S}.zip")
+    # Dois backups no mesmo segundo (o backup_antes de uma restauração): _2, _3...
+    # ficam depois do primeiro na ordem dos nomes, então listar_backups continua certo
+    numero = 1
+    while os.path.exists(destino) or os.path.exists(destino + ".parcial"):
+        numero += 1
+        destino = os.path.join(pasta, f"{base}_{agora:%Y%m%d-%H%M%S}_{numero}.zip")
+    tempos = {}
+    avisar = progresso or (lambda fracao, mensagem: None)
+
+    with tempfile.TemporaryDirectory(dir=pasta) as temp:
+        inicio = time.perf_counter()
+        copia = os.path.join(temp, os.path.basename(caminho))
+        paginas, recomecos = _copiar(caminho, copia, progresso=lambda f: avisar(0.7 * f, "Copiando o banco..."))
+        # Os anos vêm da cópia: o arquivamento grava o ano antes de apagar do banco
+        # vivo, então o arquivo copiado agora tem tudo o que saiu do principal copiado
+        bancos = {os.path.basename(caminho): {"caminho": copia, "paginas": paginas, "recomecos": recomecos}}
+        for ano in _conferir(copia, rapido=True)["anos_arquivados"]:
+            nome = f"arquivo_pedidos/{os.path.basename(funcoes_db.arquivo_do_ano(ano, caminho))}"
+            copia_ano = os.path.join(temp, os.path.basename(nome))
+            paginas, recomecos = _copiar(funcoes_db.arquivo_do_ano(ano, caminho), copia_ano)
+            bancos[nome] = {"caminho": copia_ano, "paginas": paginas, "recomecos": recomecos, "ano": ano}
+        tempos["copia_s"] = round(time.perf_counter() - inicio, 3)
+
+        avisar(0.7, "Conferindo a cópia...")
+        inicio = time.perf_counter()
+        for nome, banco in bancos.items():
+            _sozinho(banco["caminho"])
+            banco.update(_conferir(banco["caminho"]), bytes=os.path.getsize(banco["caminho"]))
+            if banco["integridade"] != "ok":
+                raise BackupInvalido(f"A cópia de {nome} não passou no integrity_check: {banco['integridade']}")
+        tempos["verificacao_s"] = round(time.perf_counter() - inicio, 3)
+
+        avisar(0.8, "Compactando...")
+        inicio = time.perf_counter()
+        manifesto = {
+            "criado_em": agora.strftime("%Y-%m-%d %H:%M:%S"), "banco": os.path.basename(caminho),
+            "versao_esquema": bancos[os.path.basename(caminho)]["versao_esquema"],
+            "bancos": {nome: {k: v for k, v in banco.items() if k != "caminho"} for nome, banco in bancos.items()},
+        }
+        # .parcial até o fim: um backup interrompido nunca parece um backup pronto
+        with zipfile.ZipFile(destino + ".parcial", "w", zipfile.ZIP_DEFLATED if comprimir else zipfile.ZIP_STORED,
+                             compresslevel=NIVEL_COMPRESSAO if comprimir else None) as arquivo:
+            for nome, banco in bancos.items():
+                arquivo.write(banco["caminho"], nome)
+            manifesto["tempos"] = tempos
+            arquivo.writestr(MANIFESTO, json.dumps(manifesto, indent=2, ensure_ascii=False))
+        os.replace(destino + ".parcial", destino)
+        tempos["compressao_s"] = round(time.perf_counter() - inicio, 3)
+
+    removidos = [b["arquivo"] for b in listar_backups(caminho)[manter:]]
+    for antigo in removidos:
+        os.remove(antigo)
+    manifesto.update(arquivo=destino, bytes=os.path.getsize(destino), tempos=tempos, removidos=removidos)
+    avisar(1, f"Backup pronto: {os.path.basename(destino)}")
+    return manifesto
+
+
+def ler_manifesto(arquivo):
+    try:
+        with zipfile.ZipFile(arquivo) as zip_:
+            return json.loads(zip_.read(MANIFESTO))
+    except (zipfile.BadZipFile, KeyError, ValueError) as erro:
+        raise BackupInvalido(f"{os.path.basename(arquivo)} não é um backup deste sistema ({erro}).")
+
+
+def listar_backups(caminho=None):
+    """Backups do banco, do mais novo para o mais antigo: arquivo, criado_em, bytes e contagens"""
+    caminho = caminho or funcoes_db.DB_PATH
+    prefixo = os.path.splitext(os.path.basename(caminho))[0] + "_"
+    pasta = pasta_backups(caminho)
+    backups = []
+    for nome in sorted(os.listdir(pasta), reverse=True):
+        if not (nome.startswith(prefixo) and nome.endswith(".zip")):
+            continue
+        arquivo = os.path.join(pasta, nome)
+        try:
+            manifesto = ler_manifesto(arquivo)
+        except BackupInvalido:
+            continue
+        principal = manifesto["bancos"][manifesto["banco"]]
+        backups.append({"arquivo": arquivo, "criado_em": manifesto["criado_em"], "bytes": os.path.getsize(arquivo),
+                        "versao_esquema": manifesto["versao_esquema"], "contagens": principal["contagens"],
+                        "anos_arquivados": principal["anos_arquivados"]})
+    return backups
+
+
+# --- VERIFICAÇÃO E RESTAURAÇÃO ---
+
+def _extrair_e_conferir(arquivo, pasta):
+    """Confere o CRC do .zip, extrai em 'pasta' e roda integrity_check em cada banco,
+    comparando com o manifesto. Devolve (manifesto, {nome: caminho extraído}, tempos)."""
+    tempos = {}
+    inicio = time.perf_counter()
+    manifesto = ler_manifesto(arquivo)
+    with zipfile.ZipFile(arquivo) as zip_:
+        corrompido = zip_.testzip()
+        if corrompido:
+            raise BackupInvalido(f"{corrompido} está corrompido dentro de {os.path.basename(arquivo)}.")
+        extraidos = {nome: zip_.extract(nome, pasta) for nome in manifesto["bancos"]}
+    tempos["extracao_s"] = round(time.perf_counter() - inicio, 3)
+
+    inicio = time.perf_counter()
+    for nome, caminho in extraidos.items():
+        conferido = _conferir(caminho)
+        esperado = manifesto["bancos"][nome]
+        if conferido["integridade"] != "ok":
+            raise BackupInvalido(f"{nome} não passou no integrity_check: {conferido['integridade']}")
+        if conferido["contagens"] != esperado["contagens"]:
+            raise BackupInvalido(f"{nome}: contagens {conferido['contagens']} diferentes do manifesto {esperado['contagens']}")
+    tempos["verificacao_s"] = round(time.perf_counter() - inicio, 3)
+    return manifesto, extraidos, tempos
+
+
+def verificar_backup(arquivo):
+    """Ensaio de restauração sem tocar no banco: extrai numa pasta temporária e confere tudo.
+    Devolve o manifesto com os tempos do ensaio em 'tempos_verificacao'."""
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(arquivo))) as temp:
+        manifesto, _, tempos = _extrair_e_conferir(arquivo, temp)
+    tempos["total_s"] = round(sum(tempos.values()), 3)
+    manifesto["tempos_verificacao"] = tempos
+    return manifesto
+
+
+def restaurar(arquivo, caminho=None, backup_antes=True):
+    """Volta o banco (e os arquivos de pedidos) para o estado do backup, com o app no ar.
+
+    O backup é conferido antes; o estado atual vira um backup novo (backup_antes).
+    A cópia para o banco vivo é feita pela API de backup num passo só: quem lê vê
+    o banco antigo ou o restaurado, nunca uma mistura. Devolve os tempos de cada etapa.
+    """
+    caminho = caminho or funcoes_db.DB_PATH  # a mesma chave do pool e da vez de gravar
+    with tempfile.TemporaryDirectory(dir=pasta_backups(caminho)) as temp:
+        manifesto, extraidos, tempos = _extrair_e_conferir(arquivo, temp)
+        if manifesto["versao_esquema"] > len(funcoes_db.MIGRACOES):
+            raise BackupInvalido(f"O backup é de um esquema mais novo ({manifesto['versao_esquema']}) que este programa.")
+
+        if backup_antes:
+            inicio = time.perf_counter()
+            tempos["backup_antes"] = os.path.basename(fazer_backup(caminho)["arquivo"])
+            tempos["backup_antes_s"] = round(time.perf_counter() - inicio, 3)
+
+        inicio = time.perf_counter()
+        anos = {banco["ano"]: extraidos[nome] for nome, banco in manifesto["bancos"].items() if "ano" in banco}
+        with funcoes_db.vez_de_gravar(caminho):
+            # Anos primeiro (o principal restaurado só aponta para anos que já estão no lugar);
+            # arquivos de anos que o backup não tem saem (estão no backup_antes)
+            for ano, extraido in anos.items():
+                os.makedirs(funcoes_db.pasta_arquivo(caminho), exist_ok=True)
+                _copiar(extraido, funcoes_db.arquivo_do_ano(ano, caminho), em_passos=False)
+            pasta_arquivo = funcoes_db.pasta_arquivo(caminho)
+            if os.path.isdir(pasta_arquivo):
+                validos = {os.path.basename(funcoes_db.arquivo_do_ano(ano, caminho)) for ano in anos}
+                prefixo = os.path.splitext(os.path.basename(caminho))[0] + "_"
+                for nome in os.listdir(pasta_arquivo):
+                    if nome.startswith(prefixo) and nome.split(".db")[0] + ".db" not in validos:
+                        os.remove(os.path.join(pasta_arquivo, nome))
+            _copiar(extraidos[manifesto["banco"]], caminho, em_passos=False)
+        tempos["copia_s"] = round(time.perf_counter() - inicio, 3)
+
+    inicio = time.perf_counter()
+    conferido = _conferir(caminho, rapido=True)
+    if conferido["integridade"] != "ok" or conferido["contagens"] != manifesto["bancos"][manifesto["banco"]]["contagens"]:
+        raise BackupInvalido(f"O banco restaurado não confere com o backup: {conferido}")
+    tempos["conferencia_s"] = round(time.perf_counter() - inicio, 3)
+
+    # Conexões abertas antes apontam para arquivos de ano que podem ter sido trocados
+    funcoes_db.obter_pool(caminho).fechar()
+    funcoes_db.limpar_cache()
+    funcoes_db.migrar(caminho)  # backup de um esquema mais antigo sobe para o atual
+    tempos["total_s"] = round(sum(v for k, v in tempos.items() if k.endswith("_s")), 3)
+    return tempos
+
+
+def _mb(n):
+    return f"{n / 2 ** 20:.1f} MB"
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:] or ["backup"]
+    comando = argumentos[0]
+    if comando in ("backup", "listar") and len(argumentos) > 1:
+        funcoes_db.configurar(argumentos[1])
+    elif comando == "restaurar" and len(argumentos) > 2:
+        funcoes_db.configurar(argumentos[2])
+
+    if comando == "backup":
+        funcoes_db.migrar()
+        m = fazer_backup(progresso=lambda f, msg: print(f"\r{f:4.0%} {msg:<40}", end="", flush=True))
+        principal = m["bancos"][m["banco"]]
+        print(f"\n✅ {m['arquivo']} ({_mb(m['bytes'])}, banco de {_mb(principal['bytes'])}, "
+              f"{principal['contagens'].get('Pedidos', 0)} pedidos)")
+        print(f"   cópia {m['tempos']['copia_s']} s (recomeços: {principal['recomecos']}) | "
+              f"verificação {m['tempos']['verificacao_s']} s | compressão {m['tempos']['compressao_s']} s")
+        for antigo in m["removidos"]:
+            print(f"   removido (rodízio): {os.path.basename(antigo)}")
+    elif comando == "listar":
+        for b in listar_backups():
+            print(f"{b['criado_em']}  {_mb(b['bytes']):>10}  {b['contagens'].get('Pedidos', 0):>9} pedidos  {b['arquivo']}")
+    elif comando == "verificar" and len(argumentos) > 1:
+        m = verificar_backup(argumentos[1])
+        t = m["tempos_verificacao"]
+        print(f"✅ {os.path.basename(argumentos[1])} íntegro ({m['criado_em']}, esquema {m['versao_esquema']})")
+        print(f"   extração {t['extracao_s']} s | integrity_check {t['verificacao_s']} s | total {t['total_s']} s")
+    elif comando == "restaurar" and len(argumentos) > 1:
+        tempos = restaurar(argumentos[1])
+        print(f"✅ {funcoes_db.DB_PATH} restaurado de {os.path.basename(argumentos[1])}")
+        if "backup_antes" in tempos:
+            print(f"   estado anterior salvo em {tempos['backup_antes']} ({tempos['backup_antes_s']} s)")
+        print(f"   extração {tempos['extracao_s']} s | verificação {tempos['verificacao_s']} s | "
+              f"cópia {tempos['copia_s']} s | conferência {tempos['conferencia_s']} s | total {tempos['total_s']} s")
+    else:
+        print(__doc__)
+        sys.exit(1)
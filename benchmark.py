@@ -0,0 +1,601 @@
+"""Mede o acesso ao banco do app (tempos, latências e memória) e imprime o resultado.
+
+Uso: python benchmark.py [modo]
+    reruns [N]                                    reruns do Streamlit por segundo (sem modo: reruns e pedidos)
+    pedidos [N]                                   pedidos gravados por segundo
+    paginas [banco.db] [repetições] [saida.json]  p50/p95 e pico de memória de cada página (numa cópia do banco)
+    inicio [processos]                            abertura do app: primeiro run e reruns seguintes
+    api [pedidos] [conexões]                      API com vários clientes HTTP ao mesmo tempo
+    escritores [threads] [segundos] [alvo/s]      várias threads gravando pedidos juntas
+    arquivo [banco.db] [horizonte em dias]        páginas antes e depois de arquivar os entregues antigos
+"""
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import exportacao
+import funcoes_db
+import gerar_dados
+
+# Consultas que uma página típica faz a cada rerun
+CONSULTAS_RERUN = [
+    "SELECT * FROM Clientes",
+    "SELECT * FROM Produtos WHERE ativo = 1",
+    """SELECT Pedidos.id, Pedidos.data_venda, Pedidos.valor_total, Pedidos.pagamento,
+              Pedidos_Itens.quantidade, Produtos.nome
+       FROM Pedidos_Itens
+       JOIN Pedidos ON Pedidos_Itens.id_pedido = Pedidos.id
+       JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id""",
+]
+
+
+def preparar_banco(caminho, clientes=200, produtos=20, pedidos=500):
+    funcoes_db.migrar(caminho)
+    conn = sqlite3.connect(caminho)
+    c = conn.cursor()
+    c.executemany("INSERT INTO Clientes (nome, telefone, endereco) VALUES (?,?,?)",
+                  [(f"Cliente {i}", f"1199999{i:04d}", f"Rua {i}") for i in range(clientes)])
+    c.executemany("INSERT INTO Produtos (nome, preco, tamanho) VALUES (?,?,?)",
+                  [(f"Bolo {i}", 3000 + 100 * i, "M") for i in range(produtos)])
+    c.executemany("INSERT INTO Pedidos (data_venda, data_entrega, id_cliente, pagamento) VALUES (?,?,?,?)",
+                  [("2026-01-01 10:00:00", "2026-01-02", 1 + i % clientes, "Pix") for i in range(pedidos)])
+    c.executemany("INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (?,?,?,?,?)",
+                  [(1 + i, 1 + i % produtos, 3000, 2, 6000) for i in range(pedidos)])
+    conn.commit()
+    conn.close()
+
+
+def rerun_antigo(caminho):
+    """Como o app fazia: abre e fecha uma conexão por consulta"""
+    for sql in CONSULTAS_RERUN:
+        conn = sqlite3.connect(caminho)
+        conn.execute(sql).fetchall()
+        conn.close()
+
+
+def rerun_pool(caminho):
+    for sql in CONSULTAS_RERUN:
+        with funcoes_db.conexao(caminho) as conn:
+            conn.execute(sql).fetchall()
+
+
+def medir(funcao, caminho, reruns):
+    inicio = time.perf_counter()
+    for _ in range(reruns):
+        funcao(caminho)
+    return reruns / (time.perf_counter() - inicio)
+
+
+def bench_reruns(reruns=500):
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "bench.db")
+        preparar_banco(caminho)
+        antes = medir(rerun_antigo, caminho, reruns)
+        depois = medir(rerun_pool, caminho, reruns)
+        funcoes_db.obter_pool(caminho).fechar()
+
+    print(f"Antes (conectar/fechar por consulta): {antes:8.1f} reruns/s")
+    print(f"Depois (pool de conexões):            {depois:8.1f} reruns/s")
+    print(f"Ganho: {depois / antes:.2f}x")
+
+
+# --- GRAVAÇÃO DE PEDIDOS ---
+
+def _pedidos_sinteticos(quantidade, clientes, produtos):
+    return [{"id_cliente": 1 + i % clientes,
+             "itens": [(1 + (i + k) % produtos, 1 + k) for k in range(3)],
+             "pagamento": "Pix", "chave": f"bench-{i}"}
+            for i in range(quantidade)]
+
+
+def gravar_antigo(caminho, pedidos):
+    """Como o main.py fazia: commit do cabeçalho e depois um commit por item"""
+    conn = sqlite3.connect(caminho)
+    c = conn.cursor()
+    for pedido in pedidos:
+        c.execute("INSERT INTO Pedidos (data_venda, id_cliente, valor_total) VALUES (datetime('now'), ?, 0)", (pedido["id_cliente"],))
+        conn.commit()
+        id_pedido = c.lastrowid
+        for id_produto, qtd in pedido["itens"]:
+            preco = c.execute("SELECT preco FROM Produtos WHERE id = ?", (id_produto,)).fetchone()[0]
+            c.execute("INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (?,?,?,?,?)",
+                      (id_pedido, id_produto, preco, qtd, preco * qtd))
+            conn.commit()
+    conn.close()
+
+
+def gravar_um_a_um(caminho, pedidos):
+    for pedido in pedidos:
+        funcoes_db.registrar_pedido(caminho=caminho, **pedido)
+
+
+def gravar_em_lote(caminho, pedidos, tamanho_lote=1000):
+    for i in range(0, len(pedidos), tamanho_lote):
+        funcoes_db.registrar_pedidos_em_lote(pedidos[i:i + tamanho_lote], caminho=caminho)
+
+
+def bench_pedidos(quantidade=2000):
+    pedidos = _pedidos_sinteticos(quantidade, 200, 20)
+    print(f"Gravando {quantidade} pedidos de 3 itens:")
+    for nome, funcao in [("Antigo (commit por item)", gravar_antigo),
+                         ("registrar_pedido um a um", gravar_um_a_um),
+                         ("registrar_pedidos_em_lote", gravar_em_lote)]:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "bench.db")
+            preparar_banco(caminho, pedidos=0)
+            inicio = time.perf_counter()
+            funcao(caminho, pedidos)
+            tempo = time.perf_counter() - inicio
+            funcoes_db.obter_pool(caminho).fechar()
+        print(f"  {nome:<28} {quantidade / tempo:10.1f} pedidos/s")
+
+
+# --- PÁGINAS ---
+
+def caminhos_paginas():
+    """O que cada página do app.py lê (ou grava) a cada rerun, com os parâmetros padrão"""
+    hoje = date.today()
+    mes = hoje - timedelta(days=30)
+    proximo_pedido = iter(range(10 ** 9))
+    with funcoes_db.conexao() as conn:
+        ativos = [id_ for (id_,) in conn.execute("SELECT id FROM Produtos WHERE ativo = 1 ORDER BY id LIMIT 3")]
+
+    def dashboard():
+        inicio = funcoes_db.primeira_venda() or hoje
+        funcoes_db.resumo_vendas(inicio, hoje)
+        funcoes_db.pedidos_periodo(inicio, hoje)
+        funcoes_db.vendas_por_dia(inicio, hoje)
+        funcoes_db.vendas_por_produto(inicio, hoje)
+        funcoes_db.vendas_por_pagamento(inicio, hoje)
+
+    def producao():
+        janela = (hoje - timedelta(days=30), hoje + timedelta(days=60))
+        funcoes_db.contar_fila_producao(funcoes_db.STATUS_ABERTOS, *janela)
+        funcoes_db.fila_producao(funcoes_db.STATUS_ABERTOS, *janela)
+
+    def salvar_pedido():
+        funcoes_db.registrar_pedido(1, [(id_produto, 1) for id_produto in ativos], pagamento="Pix",
+                                    chave=f"bench-{datetime.now():%Y%m%d%H%M%S}-{next(proximo_pedido)}")
+
+    return {
+        "dashboard": dashboard,
+        "producao": producao,
+        "ranking": lambda: funcoes_db.ranking_clientes(),
+        "ranking_30_dias": lambda: funcoes_db.ranking_clientes(dias=30),
+        "clientes": lambda: funcoes_db.ler_df("SELECT * FROM Clientes ORDER BY id DESC LIMIT 200", tabelas=("Clientes",)),
+        "busca_cliente": lambda: funcoes_db.buscar_clientes("cliente 12"),
+        "produtos": lambda: funcoes_db.ler_df("SELECT * FROM Produtos", tabelas=("Produtos",)),
+        "nova_encomenda": lambda: (funcoes_db.foto_cardapio().rotulos, funcoes_db.capacidade_do_dia(hoje)),
+        "agenda": lambda: funcoes_db.calendario_capacidade(hoje.year, hoje.month),
+        "salvar_pedido": salvar_pedido,
+        "exportar_30_dias": lambda: exportacao.exportar("csv", io.BytesIO(), mes, hoje),
+    }
+
+
+def _percentil(amostras, p):
+    return statistics.quantiles(amostras, n=100, method="inclusive")[p - 1] if len(amostras) > 1 else amostras[0]
+
+
+def medir_caminho(funcao, repeticoes):
+    """Latências em ms com o cache vazio (o custo real no banco) e pico de memória de uma execução"""
+    tempos = []
+    for _ in range(repeticoes):
+        funcoes_db.limpar_cache()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    # tracemalloc deixa tudo mais lento, então a memória é medida numa execução à parte
+    funcoes_db.limpar_cache()
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"p50_ms": round(_percentil(tempos, 50), 2), "p95_ms": round(_percentil(tempos, 95), 2),
+            "max_ms": round(max(tempos), 2), "pico_memoria_kb": round(pico / 1024, 1), "repeticoes": repeticoes}
+
+
+def copiar_banco(caminho, copia):
+    """Copia o banco (com o que ainda está no -wal) e os arquivos de pedidos dele:
+    os benchmarks gravam e arquivam pedidos, e nunca no banco de verdade"""
+    origem, destino = sqlite3.connect(caminho), sqlite3.connect(copia)
+    try:
+        origem.backup(destino)
+        tem_arquivos = origem.execute("SELECT 1 FROM sqlite_master WHERE name = 'Arquivos'").fetchone()
+        anos = [ano for (ano,) in origem.execute("SELECT ano FROM Arquivos")] if tem_arquivos else []
+    finally:
+        destino.close()
+        origem.close()
+    for ano in anos:
+        os.makedirs(funcoes_db.pasta_arquivo(copia), exist_ok=True)
+        shutil.copyfile(funcoes_db.arquivo_do_ano(ano, caminho), funcoes_db.arquivo_do_ano(ano, copia))
+
+
+def bench_paginas(caminho=None, repeticoes=20, saida=None):
+    """Mede cada página e devolve/grava um JSON para comparar entre commits.
+
+    Sem 'caminho' gera um banco temporário pequeno (gerar_dados com semente fixa);
+    com 'caminho' mede numa cópia, porque salvar_pedido grava pedidos.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        copia = os.path.join(pasta, "bench.db")
+        if caminho is None:
+            gerar_dados.gerar(copia, clientes=2000, produtos=100, itens=50000)
+        else:
+            copiar_banco(caminho, copia)
+        funcoes_db.configurar(copia)
+        funcoes_db.migrar()
+        with funcoes_db.conexao() as conn:
+            volumes = {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                       for tabela in ("Clientes", "Produtos", "Pedidos", "Pedidos_Itens")}
+        relatorio = {
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "volumes": volumes,
+            "paginas": {nome: medir_caminho(funcao, repeticoes) for nome, funcao in caminhos_paginas().items()},
+        }
+        funcoes_db.obter_pool().fechar()
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if saida:
+        with open(saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto)
+    print(texto)
+    return relatorio
+
+
+# --- ABERTURA DO APP (Streamlit AppTest em processos novos) ---
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+# Roda num processo novo: primeiro run (frio: imports, esquema, página) e a mediana dos reruns
+SCRIPT_INICIO = """
+import json, statistics, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.switch_page(sys.argv[2])
+inicio = time.perf_counter()
+app.run()
+frio = (time.perf_counter() - inicio) * 1000
+assert not app.exception, app.exception
+tempos = []
+for _ in range(int(sys.argv[3])):
+    inicio = time.perf_counter()
+    app.run()
+    tempos.append((time.perf_counter() - inicio) * 1000)
+print(json.dumps({"frio_ms": frio, "rerun_ms": statistics.median(tempos),
+                  "plotly_express": "plotly.express" in sys.modules, "pandas": "pandas" in sys.modules}))
+"""
+
+
+def bench_inicio(processos=3, reruns=20):
+    """Abre cada página num processo novo (cópia do app com banco vazio, numa pasta temporária)"""
+    paginas = sorted(os.listdir(os.path.join(PASTA_APP, "paginas")))
+    resultado = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        shutil.copytree(PASTA_APP, pasta, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns(".git", "__pycache__", "*.db*", "arquivos_tarefas", "*.csv", "*.jsonl"))
+        for arquivo in (p for p in paginas if p.endswith(".py")):
+            medidas = []
+            for _ in range(processos):
+                saida = subprocess.run([sys.executable, "-c", SCRIPT_INICIO, os.path.join(pasta, "app.py"),
+                                        f"paginas/{arquivo}", str(reruns)],
+                                       cwd=pasta, capture_output=True, text=True, check=True).stdout
+                medidas.append(json.loads(saida.strip().splitlines()[-1]))
+            resultado[arquivo[:-3]] = {
+                "frio_ms": round(statistics.median(m["frio_ms"] for m in medidas)),
+                "rerun_ms": round(statistics.median(m["rerun_ms"] for m in medidas), 1),
+                "plotly_express": medidas[0]["plotly_express"], "pandas": medidas[0]["pandas"],
+            }
+            print(f"{arquivo[:-3]:16} frio {resultado[arquivo[:-3]]['frio_ms']:5d} ms | "
+                  f"rerun {resultado[arquivo[:-3]]['rerun_ms']:6.1f} ms | plotly.express: {medidas[0]['plotly_express']}")
+    return resultado
+
+
+# --- API ---
+
+async def _requisicao(leitor, escritor, metodo, caminho, corpo=None, cabecalhos=None):
+    """HTTP/1.1 mínimo numa conexão keep-alive; devolve (status, cabeçalhos, corpo)"""
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else b""
+    linhas = [f"{metodo} {caminho} HTTP/1.1", "Host: bench", f"Content-Length: {len(dados)}"]
+    if corpo is not None:
+        linhas.append("Content-Type: application/json")
+    linhas += [f"{k}: {v}" for k, v in (cabecalhos or {}).items()]
+    escritor.write(("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + dados)
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    recebidos = {}
+    while (linha := await leitor.readline()) not in (b"\r\n", b""):
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        recebidos[nome.strip().lower()] = valor.strip()
+    resposta = await leitor.readexactly(int(recebidos.get("content-length", 0)))
+    return status, recebidos, resposta
+
+
+async def _carga_api(porta, pedidos, conexoes, clientes, produtos):
+    fila = list(range(pedidos))
+    latencias, erros, travados = [], {}, 0
+    etags = {"total": 0, "304": 0}
+
+    async def cliente_http(numero):
+        nonlocal travados
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        etag = None
+        sorteio = random.Random(numero)
+        while fila:
+            i = fila.pop()
+            if i % 10 == 0:
+                # De vez em quando o cliente confere o cardápio (revalidando pela ETag)
+                status, cab, _ = await _requisicao(leitor, escritor, "GET", "/produtos",
+                                                   cabecalhos={"If-None-Match": etag} if etag else None)
+                etag = cab.get("etag", etag)
+                etags["total"] += 1
+                etags["304"] += status == 304
+            pedido = {"id_cliente": sorteio.randint(1, clientes), "pagamento": "Pix",
+                      "data_entrega": (date.today() + timedelta(days=sorteio.randint(0, 30))).isoformat(),
+                      "itens": [{"id_produto": sorteio.randint(1, produtos), "quantidade": sorteio.randint(1, 3)}
+                                for _ in range(3)]}
+            inicio = time.perf_counter()
+            status, _, resposta = await _requisicao(leitor, escritor, "POST", "/pedidos", pedido,
+                                                    {"Idempotency-Key": f"bench-{i}"})
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if status != 201:
+                erros[status] = erros.get(status, 0) + 1
+                travados += b"locked" in resposta
+        escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente_http(n) for n in range(conexoes)))
+    return time.perf_counter() - inicio, latencias, erros, travados, etags
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_api(pedidos=2000, conexoes=50, clientes=200, produtos=20):
+    """Sobe a API (uvicorn) num banco temporário e manda pedidos de várias conexões ao mesmo tempo.
+
+    Enquanto isso, outro processo grava pedidos direto pelo funcoes_db (como o app
+    faria), para conferir que os dois lados não esbarram em "database is locked".
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "api.db")
+        preparar_banco(caminho, clientes, produtos, pedidos=0)
+        funcoes_db.obter_pool(caminho).fechar()
+        porta = _porta_livre()
+        servidor = subprocess.Popen([sys.executable, os.path.join(PASTA_APP, "api.py"), caminho, "--porta", str(porta)])
+        app_paralelo = None
+        try:
+            for _ in range(200):
+                try:
+                    socket.create_connection(("127.0.0.1", porta), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            app_paralelo = subprocess.Popen([sys.executable, "-c", SCRIPT_GRAVADOR_PARALELO, PASTA_APP, caminho,
+                                             str(pedidos // 10), str(clientes), str(produtos)],
+                                            stdout=subprocess.PIPE, text=True)
+            tempo, latencias, erros, travados, etags = asyncio.run(
+                _carga_api(porta, pedidos, conexoes, clientes, produtos))
+            saida_paralelo = json.loads(app_paralelo.communicate(timeout=120)[0])
+        finally:
+            if app_paralelo is not None and app_paralelo.poll() is None:
+                app_paralelo.kill()
+            servidor.terminate()
+            servidor.wait(timeout=30)
+        conn = sqlite3.connect(caminho)
+        gravados = conn.execute("SELECT COUNT(*) FROM Pedidos").fetchone()[0]
+        # Os resumos mantidos por trigger têm de bater com a soma dos pedidos
+        divergentes = conn.execute("""
+            SELECT COUNT(*) FROM (SELECT id_cliente, COUNT(*) AS n, SUM(valor_total) AS gasto
+                                  FROM Pedidos GROUP BY id_cliente) p
+            LEFT JOIN Clientes_Totais t ON t.id_cliente = p.id_cliente
+            WHERE t.qtd_pedidos IS NOT p.n OR t.total_gasto IS NOT p.gasto
+        """).fetchone()[0]
+        conn.close()
+    esperados = pedidos - sum(erros.values()) + saida_paralelo["gravados"]
+    print(f"API: {pedidos} pedidos de {conexoes} conexões simultâneas "
+          f"(+{saida_paralelo['gravados']} gravados ao mesmo tempo por outro processo)")
+    print(f"  {pedidos / tempo:10.1f} pedidos/s | p50 {_percentil(latencias, 50):.1f} ms | "
+          f"p95 {_percentil(latencias, 95):.1f} ms | máx {max(latencias):.1f} ms")
+    print(f"  erros HTTP: {erros or 'nenhum'} | 'database is locked': {travados + saida_paralelo['travados']}")
+    print(f"  cardápio: {etags['total']} GETs, {etags['304']} respondidos com 304")
+    print(f"  no banco: {gravados} pedidos (esperados {esperados}) | clientes com resumo divergente: {divergentes}")
+    return {"pedidos_s": pedidos / tempo, "erros": erros, "travados": travados + saida_paralelo["travados"],
+            "gravados": gravados, "esperados": esperados, "divergentes": divergentes}
+
+
+SCRIPT_GRAVADOR_PARALELO = """
+import json, random, sqlite3, sys
+sys.path.insert(0, sys.argv[1])
+import funcoes_db
+funcoes_db.configurar(sys.argv[2])
+quantidade, clientes, produtos = map(int, sys.argv[3:6])
+sorteio = random.Random(0)
+gravados = travados = 0
+for _ in range(quantidade):
+    itens = [(sorteio.randint(1, produtos), 1)]
+    try:
+        funcoes_db.registrar_pedido(sorteio.randint(1, clientes), itens, "2026-12-01", "Pix")
+        gravados += 1
+    except sqlite3.OperationalError as erro:
+        travados += "locked" in str(erro)
+print(json.dumps({"gravados": gravados, "travados": travados}))
+"""
+
+
+# --- ESCRITORES CONCORRENTES ---
+
+def bench_escritores(threads=8, segundos=10, alvo=200, clientes=200, produtos=20):
+    """Várias threads gravando ao mesmo tempo pelas funções do app, mais outro processo.
+
+    Cada thread alterna o que a equipe faz: pedido novo (Nova Encomenda), mudança
+    de status (Produção) e edição de cliente (com versão). Cada pedido tem uma
+    chave; no fim, todo pedido confirmado tem de estar no banco, e só eles.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "escritores.db")
+        preparar_banco(caminho, clientes, produtos, pedidos=0)
+        antes = dict(funcoes_db.estatisticas_escrita)
+        confirmados, erros, latencias = [], [], []
+        trava = threading.Lock()
+        fim = time.perf_counter() + segundos
+
+        def escritor(numero):
+            sorteio = random.Random(numero)
+            feitos = 0
+            while time.perf_counter() < fim:
+                chave = f"stress-{numero}-{feitos}"
+                inicio = time.perf_counter()
+                try:
+                    itens = [(sorteio.randint(1, produtos), sorteio.randint(1, 3)) for _ in range(3)]
+                    id_pedido, _ = funcoes_db.registrar_pedido(sorteio.randint(1, clientes), itens, "2026-12-01",
+                                                               "Pix", chave=chave, caminho=caminho)
+                    if feitos % 5 == 0:
+                        with funcoes_db.escrita("Pedidos", caminho=caminho) as conn:
+                            conn.execute("UPDATE Pedidos SET status = 'Pronto' WHERE id = ?", (id_pedido,))
+                    if feitos % 10 == 0:
+                        id_cliente = sorteio.randint(1, clientes)
+                        cliente = funcoes_db.obter_cliente(id_cliente)
+                        try:
+                            funcoes_db.atualizar_cliente(id_cliente, cliente["versao"],
+                                                         endereco=f"Rua {numero}-{feitos}")
+                        except funcoes_db.EdicaoConcorrente:
+                            pass  # outra thread editou o mesmo cliente: é o conflito esperado, não uma perda
+                except Exception as erro:
+                    with trava:
+                        erros.append(f"{type(erro).__name__}: {erro}")
+                    continue
+                finally:
+                    feitos += 1
+                with trava:
+                    confirmados.append(chave)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+
+        funcoes_db.configurar(caminho)  # obter_cliente/atualizar_cliente usam o banco padrão
+        outro = subprocess.Popen([sys.executable, "-c", SCRIPT_GRAVADOR_PARALELO, PASTA_APP, caminho,
+                                  str(alvo * segundos // 10), str(clientes), str(produtos)],
+                                 stdout=subprocess.PIPE, text=True)
+        inicio = time.perf_counter()
+        grupo = [threading.Thread(target=escritor, args=(n,)) for n in range(threads)]
+        for t in grupo:
+            t.start()
+        for t in grupo:
+            t.join()
+        tempo = time.perf_counter() - inicio
+        saida_outro = json.loads(outro.communicate(timeout=300)[0])
+
+        conn = sqlite3.connect(caminho)
+        no_banco = {chave for (chave,) in conn.execute(
+            "SELECT chave_idempotencia FROM Pedidos WHERE chave_idempotencia LIKE 'stress-%'")}
+        total = conn.execute("SELECT COUNT(*) FROM Pedidos").fetchone()[0]
+        divergentes = conn.execute("""
+            SELECT COUNT(*) FROM (SELECT id_cliente, COUNT(*) AS n, SUM(valor_total) AS gasto
+                                  FROM Pedidos GROUP BY id_cliente) p
+            LEFT JOIN Clientes_Totais t ON t.id_cliente = p.id_cliente
+            WHERE t.qtd_pedidos IS NOT p.n OR t.total_gasto IS NOT p.gasto
+        """).fetchone()[0]
+        conn.close()
+        funcoes_db.obter_pool(caminho).fechar()
+
+    perdidos = len(set(confirmados) - no_banco)
+    taxa = len(confirmados) / tempo
+    repetidas = funcoes_db.estatisticas_escrita["novas_tentativas"] - antes["novas_tentativas"]
+    print(f"{threads} threads gravando por {tempo:.1f} s (+ outro processo gravando {saida_outro['gravados']} pedidos):")
+    print(f"  {taxa:10.1f} pedidos/s (alvo {alvo}) | p50 {_percentil(latencias, 50):.1f} ms | "
+          f"p95 {_percentil(latencias, 95):.1f} ms")
+    print(f"  erros: {len(erros)} {erros[:3] if erros else ''}| outro processo travado: {saida_outro['travados']} | "
+          f"BEGIN repetido: {repetidas}")
+    print(f"  confirmados {len(confirmados)} | perdidos {perdidos} | no banco {total} "
+          f"(esperados {len(confirmados) + saida_outro['gravados']}) | resumos divergentes {divergentes}")
+    ok = (not erros and not perdidos and taxa >= alvo and not divergentes
+          and total == len(confirmados) + saida_outro["gravados"])
+    print("  ✅ passou" if ok else "  ❌ falhou")
+    return ok
+
+
+# --- ARQUIVO DE PEDIDOS ENTREGUES ---
+
+def bench_arquivo(caminho=None, horizonte=funcoes_db.HORIZONTE_ARQUIVO_DIAS, repeticoes=10):
+    """Páginas antes e depois de arquivar os entregues antigos (numa cópia do banco).
+
+    Sem 'caminho' gera 3 anos de pedidos (gerar_dados). Mede também uma leitura
+    de histórico que passa a juntar banco vivo e arquivo (ano retrasado inteiro).
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        copia = os.path.join(pasta, "arquivo.db")
+        if caminho is None:
+            gerar_dados.gerar(copia, clientes=5000, produtos=100, itens=300000)
+        else:
+            copiar_banco(caminho, copia)
+        funcoes_db.configurar(copia)
+        funcoes_db.migrar()
+        ano = date.today().year - 2
+        with funcoes_db.conexao() as conn:
+            mais_antigo = conn.execute("SELECT MIN(id) FROM Pedidos WHERE status = 'Entregue'").fetchone()[0]
+        caminhos = caminhos_paginas()
+        caminhos["historico_ano"] = lambda: (funcoes_db.resumo_vendas(date(ano, 1, 1), date(ano, 12, 31)),
+                                             funcoes_db.pedidos_periodo(date(ano, 1, 1), date(ano, 12, 31), 10))
+        caminhos["pedido_antigo"] = lambda: funcoes_db.obter_pedido(mais_antigo)
+
+        def vivos():
+            with funcoes_db.conexao() as conn:
+                return conn.execute("SELECT COUNT(*) FROM Pedidos").fetchone()[0]
+
+        antes, pedidos_antes = {n: medir_caminho(f, repeticoes) for n, f in caminhos.items()}, vivos()
+        inicio = time.perf_counter()
+        arquivados, itens = funcoes_db.arquivar_pedidos(horizonte)
+        tempo = time.perf_counter() - inicio
+        depois, pedidos_depois = {n: medir_caminho(f, repeticoes) for n, f in caminhos.items()}, vivos()
+        funcoes_db.obter_pool().fechar()
+
+    print(f"Arquivados {arquivados} pedidos ({itens} itens) em {tempo:.1f} s ({arquivados / max(tempo, 1e-9):.0f} pedidos/s); "
+          f"Pedidos no banco vivo: {pedidos_antes} -> {pedidos_depois}")
+    print(f"{'página':<20}{'p50 antes':>12}{'p50 depois':>12}")
+    for nome in caminhos:
+        print(f"{nome:<20}{antes[nome]['p50_ms']:>10.2f}ms{depois[nome]['p50_ms']:>10.2f}ms")
+    return antes, depois
+
+
+if __name__ == "__main__":
+    # python benchmark.py [... | escritores [threads] [segundos] [alvo] | arquivo [banco.db] [horizonte]] (ver o docstring)
+    argumentos = sys.argv[1:]
+    if argumentos and argumentos[0] == "arquivo":
+        bench_arquivo(argumentos[1] if len(argumentos) > 1 and argumentos[1] != "-" else None,
+                      int(argumentos[2]) if len(argumentos) > 2 else funcoes_db.HORIZONTE_ARQUIVO_DIAS)
+    elif argumentos and argumentos[0] == "escritores":
+        sys.exit(0 if bench_escritores(int(argumentos[1]) if len(argumentos) > 1 else 8,
+                                       int(argumentos[2]) if len(argumentos) > 2 else 10,
+                                       int(argumentos[3]) if len(argumentos) > 3 else 200) else 1)
+    elif argumentos and argumentos[0] == "api":
+        bench_api(int(argumentos[1]) if len(argumentos) > 1 else 2000,
+                  int(argumentos[2]) if len(argumentos) > 2 else 50)
+    elif argumentos and argumentos[0] == "inicio":
+        bench_inicio(int(argumentos[1]) if len(argumentos) > 1 else 3)
+    elif argumentos and argumentos[0] == "paginas":
+        bench_paginas(argumentos[1] if len(argumentos) > 1 and argumentos[1] != "-" else None,
+                      int(argumentos[2]) if len(argumentos) > 2 else 20,
+                      argumentos[3] if len(argumentos) > 3 else None)
+    elif argumentos and argumentos[0] == "pedidos":
+        bench_pedidos(int(argumentos[1]) if len(argumentos) > 1 else 2000)
+    elif argumentos and argumentos[0] == "reruns":
+        bench_reruns(int(argumentos[1]) if len(argumentos) > 1 else 500)
+    else:
+        bench_reruns()
+        bench_pedidos()
@@ -0,0 +1,72 @@
+"""Carrinho da tela de venda (🛒 Nova Encomenda), guardado no session_state.
+
+Uma linha por produto (adicionar o mesmo bolo de novo soma a quantidade) e o
+total em centavos mantido a cada operação, então mostrar o carrinho não monta
+DataFrame nem soma nada. Na hora de salvar, os preços são conferidos com a foto
+atual do cardápio (funcoes_db.foto_cardapio).
+"""
+import funcoes_db
+
+
+class Carrinho:
+    """linhas: id_produto -> (nome, preço em centavos, quantidade), na ordem em que entraram"""
+    __slots__ = ("linhas", "total")
+
+    def __init__(self):
+        self.linhas = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def adicionar(self, produto, quantidade):
+        """produto: um funcoes_db.ProdutoCardapio; se já está no carrinho, soma a quantidade"""
+        if quantidade <= 0:
+            raise ValueError("A quantidade deve ser maior que zero.")
+        _, _, atual = self.linhas.get(produto.id, (None, None, 0))
+        self.alterar(produto.id, atual + quantidade, produto.nome, produto.preco)
+
+    def alterar(self, id_produto, quantidade, nome=None, preco=None):
+        """Nova quantidade da linha (0 remove); nome/preço só para linha nova ou preço novo.
+        Produto fora do carrinho e sem preço (ex.: linha já removida em outro rerun): nada muda."""
+        if id_produto not in self.linhas and preco is None:
+            return
+        nome_atual, preco_atual, antes = self.linhas.get(id_produto, (nome, preco, 0))
+        nome = nome or nome_atual
+        preco = preco_atual if preco is None else preco
+        self.total += preco * quantidade - (preco_atual or 0) * antes
+        if quantidade > 0:
+            self.linhas[id_produto] = (nome, preco, quantidade)
+        else:
+            self.linhas.pop(id_produto, None)
+
+    def remover(self, id_produto):
+        self.alterar(id_produto, 0)
+
+    def limpar(self):
+        self.linhas.clear()
+        self.total = 0
+
+    def itens(self):
+        """[(id_produto, quantidade)] para funcoes_db.registrar_pedido"""
+        return [(id_produto, qtd) for id_produto, (_, _, qtd) in self.linhas.items()]
+
+    def tabela(self):
+        """Linhas prontas para st.table (sem DataFrame), valores já em reais"""
+        return [{"Produto": nome, "Qtd": qtd, "Preço": funcoes_db.formatar_reais(preco),
+                 "Total": funcoes_db.formatar_reais(preco * qtd)} for nome, preco, qtd in self.linhas.values()]
+
+    def revalidar(self, foto):
+        """Confere cada linha com a foto do cardápio: atualiza preços que mudaram e tira
+        produtos que saíram de venda. Devolve a lista de avisos (vazia se nada mudou)."""
+        avisos = []
+        for id_produto, (nome, preco, qtd) in list(self.linhas.items()):
+            produto = foto.por_id.get(id_produto)
+            if produto is None:
+                self.remover(id_produto)
+                avisos.append(f"{nome} saiu do cardápio e foi tirado do carrinho.")
+            elif produto.preco != preco:
+                self.alterar(id_produto, qtd, produto.nome, produto.preco)
+                avisos.append(f"O preço de {nome} mudou de {funcoes_db.formatar_reais(preco)} "
+                              f"para {funcoes_db.formatar_reais(produto.preco)}.")
+        return avisos
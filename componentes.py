@@ -0,0 +1,41 @@
+"""Widgets usados por mais de uma página do app (paginas/*.py)"""
+import streamlit as st
+
+import funcoes_db
+
+
+# Seletores com busca (FTS5): só os melhores resultados vão para o navegador,
+# então escolher um cliente continua rápido com qualquer tamanho de tabela
+def escolher_cliente(rotulo, chave):
+    termo = st.text_input("🔎 Buscar cliente", key=f"busca_{chave}", placeholder="Nome, telefone ou endereço")
+    achados = {id_: f"{nome} ({tel or 'sem telefone'})" for id_, nome, tel in funcoes_db.buscar_clientes(termo)}
+    if not achados:
+        st.caption("Nenhum cliente encontrado."); return None
+    return st.selectbox(rotulo, list(achados), format_func=achados.get, key=f"sel_{chave}")
+
+
+def escolher_produto(rotulo, chave, so_ativos=False):
+    termo = st.text_input("🔎 Buscar produto", key=f"busca_{chave}", placeholder="Nome ou tamanho")
+    achados = {p[0]: p for p in funcoes_db.buscar_produtos(termo, so_ativos=so_ativos)}
+    if not achados:
+        st.caption("Nenhum produto encontrado."); return None
+    rotulo_p = lambda i: f"{achados[i][1]} {achados[i][3] or ''} ({funcoes_db.formatar_reais(achados[i][2])}){'' if achados[i][4] else ' - Inativo'}"
+    return achados[st.selectbox(rotulo, list(achados), format_func=rotulo_p, key=f"sel_{chave}")]
+
+
+# Tela de venda: o cardápio ativo inteiro (o selectbox já filtra pelo que se
+# digita) vem da foto compartilhada, sem consulta nem laço a cada rerun
+def escolher_do_cardapio(rotulo, chave):
+    foto = funcoes_db.foto_cardapio()
+    if not foto.produtos:
+        st.caption("Nenhum produto ativo no cardápio."); return None
+    return foto.por_rotulo[st.selectbox(rotulo, foto.rotulos, key=f"sel_{chave}")]
+
+
+# Registro como estava quando a tela abriu: a versão guardada aqui é a que o
+# salvar confere, então a edição de outra aba/pessoa no meio é detectada
+def registro_aberto(tipo, id_):
+    chave = f"aberto_{tipo}_{id_}"
+    if chave not in st.session_state:
+        st.session_state[chave] = funcoes_db.obter_cliente(id_) if tipo == "cliente" else funcoes_db.obter_produto(id_)
+    return st.session_state[chave], chave
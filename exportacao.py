@@ -0,0 +1,178 @@
+"""Exportação do relatório de vendas em lotes (CSV, XLSX ou Parquet).
+
+As linhas saem do banco com fetchmany() e vão direto para o arquivo, então
+exportar anos de pedidos usa sempre a mesma quantidade de memória.
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime, timedelta
+
+import funcoes_db
+
+TAMANHO_LOTE = 2000
+
+# Mesmo cabeçalho do relatorio_vendas.csv que o main.py sempre gerou
+COLUNAS = ['ID Pedido', 'Data', 'Cliente', 'Bolo', 'Qtd', 'Preço Unit.', 'Total Item']
+
+FORMATOS = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+# As ordens seguem os índices (id do pedido ou data da venda) para o SQLite não
+# precisar ordenar tudo antes de devolver a primeira linha. O banco guarda
+# centavos; o relatório continua em reais, como sempre foi.
+_SQL_BASE = """
+    SELECT Pedidos.id, Pedidos.data_venda, Clientes.nome, Produtos.nome,
+           Pedidos_Itens.quantidade, Pedidos_Itens.valor_unitario / 100.0, Pedidos_Itens.total / 100.0
+    FROM Pedidos
+    JOIN Pedidos_Itens ON Pedidos_Itens.id_pedido = Pedidos.id
+    LEFT JOIN Clientes ON Pedidos.id_cliente = Clientes.id
+    LEFT JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
+"""
+
+_FILTRO_TUDO, _ORDEM_TUDO = "WHERE Pedidos.id > ?", " ORDER BY Pedidos.id DESC"
+_FILTRO_PERIODO, _ORDEM_PERIODO = "WHERE Pedidos.data_venda >= ? AND Pedidos.data_venda < ?", " ORDER BY Pedidos.data_venda DESC"
+
+
+# --- LEITURA EM LOTES ---
+
+def ultimo_exportado(caminho=None):
+    """Maior ID de pedido já exportado (0 se nunca houve exportação)"""
+    with funcoes_db.conexao(caminho) as conn:
+        return conn.execute("SELECT COALESCE(MAX(ultimo_id_pedido), 0) FROM Exportacoes").fetchone()[0]
+
+
+def _consulta(sql, inicio, fim, desde_id, caminho):
+    """(sql, params) no banco vivo e nos anos arquivados que o filtro alcança (UNION ALL, sem ordem)"""
+    if inicio is not None and fim is not None:
+        params = (inicio.isoformat(), (fim + timedelta(days=1)).isoformat())
+        esquemas = funcoes_db.arquivos_consultados(*params, caminho=caminho)
+        return funcoes_db.em_cada_fonte(sql + _FILTRO_PERIODO, esquemas, params)
+    esquemas = funcoes_db.arquivos_consultados(desde_id=desde_id, caminho=caminho)
+    return funcoes_db.em_cada_fonte(sql + _FILTRO_TUDO, esquemas, (desde_id,))
+
+
+def lotes_vendas(inicio=None, fim=None, desde_id=0, caminho=None):
+    """Gera listas de até TAMANHO_LOTE linhas do relatório.
+
+    Com inicio/fim (datas) exporta o período; senão exporta os pedidos com id > desde_id.
+    Pedidos arquivados entram também: cada fonte já sai na ordem do índice e o
+    SQLite só intercala as fontes (MERGE), sem ordenar tudo antes.
+    """
+    sql, params = _consulta(_SQL_BASE, inicio, fim, desde_id, caminho)
+    sql += _ORDEM_PERIODO if inicio is not None and fim is not None else _ORDEM_TUDO
+    with funcoes_db.conexao(caminho) as conn:
+        funcoes_db.anexar_arquivos(conn, sql, caminho)
+        cursor = conn.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            yield lote
+
+
+# --- ESCRITORES (todos recebem um arquivo binário aberto) ---
+
+def escrever_csv(arquivo, lotes):
+    # utf-8-sig e ';' para o Excel BR abrir com acentos e colunas certas
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto, delimiter=';')
+    escritor.writerow(COLUNAS)
+    for lote in lotes:
+        escritor.writerows(lote)
+    texto.flush()
+    texto.detach()
+
+
+def escrever_xlsx(arquivo, lotes):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Para exportar em .xlsx instale o openpyxl (pip install openpyxl).")
+    # write_only grava linha a linha sem montar a planilha inteira na memória
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet("Vendas")
+    aba.append(COLUNAS)
+    for lote in lotes:
+        for linha in lote:
+            aba.append(linha)
+    planilha.save(arquivo)
+
+
+def escrever_parquet(arquivo, lotes):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Para exportar em .parquet instale o pyarrow (pip install pyarrow).")
+    esquema = pa.schema([
+        ("ID Pedido", pa.int64()), ("Data", pa.string()), ("Cliente", pa.string()),
+        ("Bolo", pa.string()), ("Qtd", pa.int64()), ("Preço Unit.", pa.float64()),
+        ("Total Item", pa.float64()),
+    ])
+    with pq.ParquetWriter(arquivo, esquema) as escritor:
+        for lote in lotes:
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays([pa.array(c, t.type) for c, t in zip(colunas, esquema)], schema=esquema))
+
+
+ESCRITORES = {"csv": escrever_csv, "xlsx": escrever_xlsx, "parquet": escrever_parquet}
+
+
+# --- EXPORTAÇÃO ---
+
+def contar_linhas(inicio=None, fim=None, incremental=False, caminho=None):
+    """Quantas linhas a exportação vai ter (para mostrar o progresso)"""
+    desde_id = ultimo_exportado(caminho) if incremental else 0
+    # Uma contagem por fonte (banco vivo e cada ano arquivado)
+    sql, params = _consulta("SELECT COUNT(*) FROM Pedidos JOIN Pedidos_Itens ON Pedidos_Itens.id_pedido = Pedidos.id ",
+                            inicio, fim, desde_id, caminho)
+    with funcoes_db.conexao(caminho) as conn:
+        funcoes_db.anexar_arquivos(conn, sql, caminho)
+        return sum(n for (n,) in conn.execute(sql, params))
+
+
+def exportar(formato, arquivo, inicio=None, fim=None, incremental=False, caminho=None, progresso=None):
+    """Escreve o relatório em 'arquivo' (caminho ou arquivo binário aberto).
+
+    incremental=True exporta só os pedidos novos desde a última exportação
+    incremental e registra o ponto de parada. progresso(linhas) é chamado a cada
+    lote. Devolve o número de linhas escritas.
+    """
+    desde_id = ultimo_exportado(caminho) if incremental else 0
+    contagem = {"linhas": 0, "maior_id": desde_id}
+
+    def contar(lotes):
+        for lote in lotes:
+            contagem["linhas"] += len(lote)
+            contagem["maior_id"] = max(contagem["maior_id"], max(linha[0] for linha in lote))
+            if progresso:
+                progresso(contagem["linhas"])
+            yield lote
+
+    lotes = contar(lotes_vendas(inicio, fim, desde_id, caminho))
+    if isinstance(arquivo, str):
+        with open(arquivo, "wb") as destino:
+            ESCRITORES[formato](destino, lotes)
+    else:
+        ESCRITORES[formato](arquivo, lotes)
+
+    if incremental and contagem["linhas"]:
+        with funcoes_db.escrita("Exportacoes", caminho=caminho) as conn:
+            conn.execute("INSERT INTO Exportacoes (data, formato, ultimo_id_pedido, linhas) VALUES (?,?,?,?)",
+                         (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), formato, contagem["maior_id"], contagem["linhas"]))
+    return contagem["linhas"]
+
+
+def exportar_temporario(formato, inicio=None, fim=None, incremental=False, caminho=None):
+    """Exporta para um arquivo temporário (apagado ao fechar) já posicionado no início.
+
+    Usado pelo botão de download do app: o arquivo vai para o disco aos poucos.
+    """
+    arquivo = tempfile.TemporaryFile()
+    exportar(formato, arquivo, inicio, fim, incremental, caminho)
+    arquivo.seek(0)
+    return arquivo
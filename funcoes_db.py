@@ -0,0 +1,2063 @@
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from types import MappingProxyType
+
+import rastreio
+
+# --- CONFIGURAÇÃO DO BANCO ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "sistema_bolos_v2.db")
+
+TAMANHO_POOL = 4
+EXTRAS_POOL = 4    # conexões a mais quando todas estão emprestadas (fechadas ao devolver)
+ESPERA_POOL = 30   # segundos esperando uma conexão depois disso, antes de desistir
+
+# Ajustes aplicados em toda conexão nova (WAL permite leitura enquanto alguém grava)
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,      # ~16 MB de cache de páginas
+    "mmap_size": 134217728,    # 128 MB mapeados em memória
+    "busy_timeout": 5000,      # espera até 5s se o banco estiver ocupado
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+def configurar(caminho):
+    """Define qual arquivo .db as funções deste módulo vão usar"""
+    global DB_PATH
+    DB_PATH = caminho
+
+
+# --- POOL DE CONEXÕES ---
+
+class PoolConexoes:
+    """Mantém algumas conexões abertas e empresta uma por vez para cada thread"""
+
+    def __init__(self, caminho, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self._livres = queue.LifoQueue(maxsize=tamanho)
+        self._criadas = 0
+        self._extras = 0
+        self._epoca = 0  # sobe a cada fechar(): conexões de antes não voltam para o pool
+        self._trava = threading.Lock()
+
+    def _nova_conexao(self):
+        # ConexaoMedida: durante um rerun rastreado cada consulta é cronometrada (rastreio.py)
+        conn = sqlite3.connect(self.caminho, check_same_thread=False, factory=rastreio.ConexaoMedida)
+        for nome, valor in PRAGMAS.items():
+            conn.execute(f"PRAGMA {nome} = {valor}")
+        conn.arquivos_anexados = set()  # esquemas arquivo_AAAA anexados nesta conexão (ver _anexar)
+        conn.epoca = self._epoca
+        return conn
+
+    def _pegar(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava:
+            if self._criadas < self.tamanho:
+                self._criadas += 1
+                return self._nova_conexao()
+            # Todas em uso (às vezes pela mesma thread: conexao() dentro de escrita(),
+            # como o progresso de uma exportação): uma extra, que não volta para o pool
+            if self._extras < EXTRAS_POOL:
+                self._extras += 1
+                conn = self._nova_conexao()
+                conn.extra = True
+                return conn
+        try:
+            return self._livres.get(timeout=ESPERA_POOL)
+        except queue.Empty:
+            raise BancoOcupado(f"Nenhuma conexão livre com {self.caminho} em {ESPERA_POOL}s "
+                               f"({self.tamanho} do pool e {EXTRAS_POOL} extras emprestadas)") from None
+
+    def _devolver(self, conn):
+        if getattr(conn, "extra", False):
+            conn.close()
+            with self._trava:
+                self._extras -= 1
+            return
+        with self._trava:
+            velha = conn.epoca != self._epoca
+            if velha:
+                self._criadas -= 1
+        if velha:
+            # Emprestada antes de um fechar() (ex.: restauração do backup): fecha em vez de devolver
+            conn.close()
+        else:
+            self._livres.put(conn)
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão; faz commit no final ou rollback se der erro"""
+        conn = self._pegar()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._devolver(conn)
+
+    def fechar(self):
+        """Fecha as conexões livres; as emprestadas são fechadas quando voltarem"""
+        with self._trava:
+            while True:
+                try:
+                    self._livres.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._criadas -= 1
+            self._epoca += 1
+        _fechar_observador(self.caminho)
+
+
+_pools = {}
+_pools_trava = threading.Lock()
+
+
+def _pool_processo(caminho):
+    with _pools_trava:
+        if caminho not in _pools:
+            _pools[caminho] = PoolConexoes(caminho)
+        return _pools[caminho]
+
+
+_pool_streamlit = None
+
+
+def obter_pool(caminho=None):
+    """Um pool por arquivo de banco e por processo.
+
+    Dentro do Streamlit o pool fica no st.cache_resource (sobrevive aos reruns e
+    é compartilhado entre as sessões); no terminal usamos um dicionário do módulo.
+    """
+    global _pool_streamlit
+    caminho = caminho or DB_PATH
+    if "streamlit" not in sys.modules:
+        return _pool_processo(caminho)
+    if _pool_streamlit is None:
+        import streamlit as st
+        _pool_streamlit = st.cache_resource(show_spinner=False)(_pool_processo)
+    return _pool_streamlit(caminho)
+
+
+def conexao(caminho=None):
+    """Atalho: with conexao() as conn: ..."""
+    return obter_pool(caminho).conexao()
+
+
+# --- CACHE DE CONSULTAS ---
+# Cada tabela tem um contador de "geração" que sobe a cada escrita feita por
+# escrita(). Um resultado guardado só vale enquanto as gerações das tabelas que
+# ele leu forem as mesmas de quando foi lido; reruns sem escrita não tocam o disco.
+# Gravações de outros processos (API, main.py, worker de tarefas) não passam por
+# escrita() deste processo: PRAGMA data_version avisa e o cache do banco é descartado.
+# O data_version também muda com os commits das conexões do pool deste processo;
+# escrita() guarda o valor novo no observador, então só o commit alheio descarta tudo.
+
+LIMITE_CACHE = 256
+
+_geracoes = {}
+_cache = OrderedDict()
+_cache_trava = threading.Lock()
+estatisticas_cache = {"hits": 0, "misses": 0}
+
+
+def _geracao_atual(caminho, tabelas):
+    # (caminho, None) sobe quando outro processo grava: vale para todas as tabelas
+    return tuple(_geracoes.get((caminho, t), 0) for t in (None, *tabelas))
+
+
+def invalidar(*tabelas, caminho=None):
+    """Marca as tabelas como alteradas (descarta o cache de quem as lê)"""
+    caminho = caminho or DB_PATH
+    with _cache_trava:
+        for t in tabelas:
+            _geracoes[(caminho, t)] = _geracoes.get((caminho, t), 0) + 1
+
+
+def limpar_cache():
+    with _cache_trava:
+        _cache.clear()
+        estatisticas_cache["hits"] = 0
+        estatisticas_cache["misses"] = 0
+
+
+_observadores = {}  # caminho -> [conexão usada só para o PRAGMA data_version, último valor visto]
+_observadores_trava = threading.Lock()
+
+
+def _descartar_se_outro_gravou(caminho):
+    """data_version muda quando qualquer outra conexão grava no banco (de qualquer processo)"""
+    with _observadores_trava:
+        observador = _observadores.get(caminho)
+        if observador is None:
+            conn = sqlite3.connect(caminho, check_same_thread=False)
+            _observadores[caminho] = [conn, conn.execute("PRAGMA data_version").fetchone()[0]]
+            return
+        versao = observador[0].execute("PRAGMA data_version").fetchone()[0]
+        if versao == observador[1]:
+            return
+        observador[1] = versao
+    with _cache_trava:
+        _geracoes[(caminho, None)] = _geracoes.get((caminho, None), 0) + 1
+        for chave in [c for c in _cache if c[1] == caminho]:
+            del _cache[chave]
+
+
+def _registrar_propria_escrita(caminho):
+    """Depois do commit de escrita(): o data_version novo é nosso, não de outro processo
+    (as tabelas gravadas já são invalidadas uma a uma)"""
+    with _observadores_trava:
+        observador = _observadores.get(caminho)
+        if observador is not None:
+            observador[1] = observador[0].execute("PRAGMA data_version").fetchone()[0]
+
+
+def _fechar_observador(caminho):
+    with _observadores_trava:
+        observador = _observadores.pop(caminho, None)
+    if observador is not None:
+        observador[0].close()
+
+
+def _consultar_cache(chave, caminho, tabelas, carregar):
+    _descartar_se_outro_gravou(caminho)
+    geracao = _geracao_atual(caminho, tabelas)
+    with _cache_trava:
+        guardado = _cache.get(chave)
+        if guardado is not None and guardado[0] == geracao:
+            _cache.move_to_end(chave)
+            estatisticas_cache["hits"] += 1
+            rastro = rastreio.atual()
+            if rastro is not None:
+                rastro.consulta(chave[2], 0.0, len(guardado[1]), cache=True)
+            return guardado[1]
+        estatisticas_cache["misses"] += 1
+
+    resultado = carregar()
+    with _cache_trava:
+        _cache[chave] = (geracao, resultado)
+        _cache.move_to_end(chave)
+        while len(_cache) > LIMITE_CACHE:
+            _cache.popitem(last=False)
+    return resultado
+
+
+def ler_df(sql, params=(), tabelas=(), caminho=None):
+    """Executa um SELECT e devolve um DataFrame, reaproveitando o cache.
+
+    'tabelas' são as tabelas que a consulta lê; é por elas que o cache é invalidado.
+    Devolve uma cópia, então quem chamou pode alterar o DataFrame à vontade.
+    """
+    import pandas as pd
+
+    caminho = caminho or DB_PATH
+    chave = ("df", caminho, sql, tuple(params))
+
+    def carregar():
+        with conexao(caminho) as conn:
+            anexar_arquivos(conn, sql, caminho)
+            return pd.read_sql_query(sql, conn, params=tuple(params))
+
+    return _consultar_cache(chave, caminho, tabelas, carregar).copy()
+
+
+def ler_linhas(sql, params=(), tabelas=(), caminho=None):
+    """Mesmo que ler_df, mas devolve a lista de tuplas do cursor (sem pandas)"""
+    caminho = caminho or DB_PATH
+    chave = ("linhas", caminho, sql, tuple(params))
+
+    def carregar():
+        with conexao(caminho) as conn:
+            anexar_arquivos(conn, sql, caminho)
+            return conn.execute(sql, tuple(params)).fetchall()
+
+    return list(_consultar_cache(chave, caminho, tabelas, carregar))
+
+
+def ler_dicts(sql, params=(), tabelas=(), caminho=None):
+    """Mesmo que ler_linhas, mas cada linha vira um dict coluna -> valor (pronto para JSON)"""
+    caminho = caminho or DB_PATH
+    chave = ("dicts", caminho, sql, tuple(params))
+
+    def carregar():
+        with conexao(caminho) as conn:
+            anexar_arquivos(conn, sql, caminho)
+            cursor = conn.execute(sql, tuple(params))
+            colunas = [c[0] for c in cursor.description]
+            return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    return [dict(linha) for linha in _consultar_cache(chave, caminho, tabelas, carregar)]
+
+
+# --- ESCRITA SERIALIZADA ---
+# Toda gravação passa por escrita(): dentro do processo as threads (sessões do
+# Streamlit, tarefas, API) fazem fila numa trava por banco, e a transação abre
+# com BEGIN IMMEDIATE, que pega a vez de gravar já no início. Com BEGIN comum a
+# transação só pede a vez no primeiro INSERT/UPDATE e, se outro gravou depois da
+# leitura dela, o SQLite devolve "database is locked" na hora, sem busy_timeout.
+# Contra outro processo segurando o banco, o BEGIN é repetido com espera aleatória.
+# O BEGIN IMMEDIATE trava também os bancos anexados, então a conexão entra na
+# transação só com os arquivos de pedidos que ela vai ler (normalmente nenhum).
+
+ESPERA_ESCRITA = PRAGMAS["busy_timeout"] / 1000  # segundos esperando a vez dentro do processo
+TENTATIVAS_ESCRITA = 4                           # BEGIN IMMEDIATE (cada um já espera o busy_timeout)
+PAUSA_ESCRITA = 0.05                             # base da espera entre tentativas (dobra a cada uma)
+
+class BancoOcupado(sqlite3.OperationalError):
+    """A vez de gravar não veio a tempo (ex.: recálculo longo dos resumos): tente de novo"""
+
+
+_travas_escrita = {}
+estatisticas_escrita = {"escritas": 0, "novas_tentativas": 0}
+
+
+def _trava_escrita(caminho):
+    with _pools_trava:
+        if caminho not in _travas_escrita:
+            _travas_escrita[caminho] = threading.Lock()
+        return _travas_escrita[caminho]
+
+
+def _banco_ocupado(erro):
+    return isinstance(erro, sqlite3.OperationalError) and ("locked" in str(erro) or "busy" in str(erro))
+
+
+def _comecar_escrita(conn):
+    for tentativa in range(TENTATIVAS_ESCRITA):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as erro:
+            if not _banco_ocupado(erro):
+                raise
+            if tentativa == TENTATIVAS_ESCRITA - 1:
+                raise BancoOcupado(str(erro)) from erro
+        estatisticas_escrita["novas_tentativas"] += 1
+        # Espera aleatória: dois processos que perderam juntos não tentam de novo juntos
+        time.sleep(random.uniform(0, PAUSA_ESCRITA * 2 ** tentativa))
+
+
+@contextmanager
+def vez_de_gravar(caminho=None):
+    """Só a fila de escrita deste processo, sem conexão nem transação (para quem grava
+    por uma conexão própria, como a restauração de backup)"""
+    trava = _trava_escrita(caminho or DB_PATH)
+    if not trava.acquire(timeout=ESPERA_ESCRITA):
+        raise BancoOcupado("database is locked (fila de escrita deste processo)")
+    try:
+        yield
+    finally:
+        trava.release()
+
+
+@contextmanager
+def escrita(*tabelas, caminho=None, arquivos=()):
+    """Como conexao(), mas na vez de gravar do banco; depois do commit invalida o cache das tabelas alteradas.
+
+    'arquivos': esquemas arquivo_AAAA que a transação lê (ver ARQUIVO DE PEDIDOS).
+    """
+    caminho = caminho or DB_PATH
+    with vez_de_gravar(caminho):
+        with conexao(caminho) as conn:
+            _anexar(conn, caminho, arquivos, so_estes=True)
+            _comecar_escrita(conn)
+            # Com a vez de gravar do banco nas mãos, nenhum outro processo grava até o
+            # nosso commit: o que mudou antes é deles, o que mudar no commit é nosso
+            _descartar_se_outro_gravou(caminho)
+            estatisticas_escrita["escritas"] += 1
+            yield conn
+        _registrar_propria_escrita(caminho)
+    invalidar(*tabelas, caminho=caminho)
+
+
+# --- DINHEIRO ---
+# Preços e totais ficam no banco em centavos (INTEGER): as somas do SQLite são
+# exatas. A conversão para reais só acontece na hora de mostrar ou exportar.
+
+def centavos(valor):
+    """Reais (número ou texto '45.50') -> centavos, sem o erro de arredondamento do float"""
+    return int((Decimal(str(valor)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def reais(valor_centavos):
+    return valor_centavos / 100
+
+
+def formatar_reais(valor_centavos):
+    """4550 -> 'R$ 45.50'"""
+    return f"R$ {reais(valor_centavos or 0):.2f}"
+
+
+def em_reais(df, *colunas):
+    """Só para exibir: divide as colunas de centavos por 100 (vetorizado) e devolve o df"""
+    df[list(colunas)] = df[list(colunas)] / 100
+    return df
+
+
+# --- MIGRAÇÕES DE ESQUEMA ---
+# A versão do banco fica em PRAGMA user_version. Cada função da lista MIGRACOES
+# leva o banco da versão N-1 para a N; nunca altere uma migração já publicada,
+# acrescente outra no fim da lista.
+
+def _colunas(conn, tabela):
+    return {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _m001_tabelas_base(conn):
+    """Cria as tabelas e une os dois esquemas antigos (app.py usava data_venda, main.py usava data)"""
+    conn.execute("CREATE TABLE IF NOT EXISTS Clientes (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT, telefone TEXT, endereco TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS Produtos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT, preco REAL, tamanho TEXT, ativo INTEGER DEFAULT 1)")
+    conn.execute("CREATE TABLE IF NOT EXISTS Pedidos (id INTEGER PRIMARY KEY AUTOINCREMENT, data_venda TEXT, data_entrega TEXT, id_cliente INTEGER, valor_total REAL, pagamento TEXT, observacoes TEXT, status TEXT DEFAULT 'Pendente')")
+    conn.execute("CREATE TABLE IF NOT EXISTS Pedidos_Itens (id INTEGER PRIMARY KEY AUTOINCREMENT, id_pedido INTEGER, id_produto INTEGER, valor_unitario REAL, quantidade INTEGER, total REAL)")
+
+    if "ativo" not in _colunas(conn, "Produtos"):
+        conn.execute("ALTER TABLE Produtos ADD COLUMN ativo INTEGER DEFAULT 1")
+
+    colunas = _colunas(conn, "Pedidos")
+    if "data" in colunas and "data_venda" not in colunas:
+        conn.execute("ALTER TABLE Pedidos RENAME COLUMN data TO data_venda")
+    for coluna, tipo in [("data_entrega", "TEXT"), ("pagamento", "TEXT"), ("observacoes", "TEXT"),
+                         ("status", "TEXT DEFAULT 'Pendente'")]:
+        if coluna not in colunas:
+            conn.execute(f"ALTER TABLE Pedidos ADD COLUMN {coluna} {tipo}")
+
+
+def _m002_chaves_estrangeiras(conn):
+    """Recria Pedidos e Pedidos_Itens com FOREIGN KEY (o SQLite não deixa adicionar via ALTER)"""
+    # Referências a clientes/produtos que já foram apagados viram NULL
+    conn.execute("""CREATE TABLE Pedidos_novo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, data_venda TEXT, data_entrega TEXT,
+        id_cliente INTEGER REFERENCES Clientes (id), valor_total REAL, pagamento TEXT,
+        observacoes TEXT, status TEXT DEFAULT 'Pendente')""")
+    conn.execute("""INSERT INTO Pedidos_novo
+        SELECT id, data_venda, data_entrega,
+               CASE WHEN id_cliente IN (SELECT id FROM Clientes) THEN id_cliente END,
+               valor_total, pagamento, observacoes, status
+        FROM Pedidos""")
+    conn.execute("DROP TABLE Pedidos")
+    conn.execute("ALTER TABLE Pedidos_novo RENAME TO Pedidos")
+
+    conn.execute("""CREATE TABLE Pedidos_Itens_novo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_pedido INTEGER NOT NULL REFERENCES Pedidos (id),
+        id_produto INTEGER REFERENCES Produtos (id),
+        valor_unitario REAL, quantidade INTEGER, total REAL)""")
+    conn.execute("""INSERT INTO Pedidos_Itens_novo
+        SELECT id, id_pedido,
+               CASE WHEN id_produto IN (SELECT id FROM Produtos) THEN id_produto END,
+               valor_unitario, quantidade, total
+        FROM Pedidos_Itens
+        WHERE id_pedido IN (SELECT id FROM Pedidos)""")
+    # Itens de pedidos que não existem mais não cabem na FOREIGN KEY: em vez de
+    # sumir, ficam de quarentena em Pedidos_Itens_Orfaos (sem chave, como estavam)
+    conn.execute("""CREATE TABLE IF NOT EXISTS Pedidos_Itens_Orfaos AS
+        SELECT * FROM Pedidos_Itens WHERE id_pedido NOT IN (SELECT id FROM Pedidos)""")
+    orfaos = conn.execute("SELECT COUNT(*) FROM Pedidos_Itens_Orfaos").fetchone()[0]
+    if orfaos:
+        print(f"⚠️ {orfaos} itens sem pedido guardados em Pedidos_Itens_Orfaos")
+    conn.execute("DROP TABLE Pedidos_Itens")
+    conn.execute("ALTER TABLE Pedidos_Itens_novo RENAME TO Pedidos_Itens")
+
+
+def _m003_indices(conn):
+    """Índices para as consultas de cada página (ver CONSULTAS_QUENTES)"""
+    # Ranking: soma valor_total por cliente sem ler a tabela
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON Pedidos (id_cliente, valor_total)")
+    # Produção: filtro por status e ordem por data de entrega
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_status_entrega ON Pedidos (status, data_entrega)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_entrega ON Pedidos (data_entrega)")
+    # Dashboard: filtros por data da venda
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_venda ON Pedidos (data_venda)")
+    # Itens de um pedido (comprovante, detalhes, dashboard)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_itens_pedido ON Pedidos_Itens (id_pedido, id_produto, quantidade)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_itens_produto ON Pedidos_Itens (id_produto)")
+
+
+def _m004_indice_resumo_vendas(conn):
+    """Dashboard: SUM/COUNT por período lidos só do índice, sem tocar a tabela"""
+    conn.execute("DROP INDEX IF EXISTS idx_pedidos_venda")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pedidos_venda_total ON Pedidos (data_venda, valor_total)")
+
+
+# Resumo diário (dia x produto x forma de pagamento), mantido por triggers.
+# Toda mudança vira um "delta" somado por UPSERT; o campo pedidos conta em quantos
+# pedidos o produto apareceu (um pedido com 2 linhas do mesmo bolo conta 1).
+_UPSERT_DIARIO = """
+    INSERT INTO Vendas_Diarias (dia, id_produto, pagamento, pedidos, unidades, receita)
+    {select}
+    ON CONFLICT (dia, id_produto, pagamento) DO UPDATE SET
+        pedidos = pedidos + excluded.pedidos,
+        unidades = unidades + excluded.unidades,
+        receita = receita + excluded.receita;
+"""
+
+# Delta de uma linha de item (sinal +1 ao entrar, -1 ao sair)
+_DELTA_ITEM = """
+    SELECT substr(p.data_venda, 1, 10), COALESCE({r}.id_produto, 0), COALESCE(p.pagamento, ''),
+           {sinal} * NOT EXISTS (SELECT 1 FROM Pedidos_Itens i
+                                 WHERE i.id_pedido = {r}.id_pedido AND i.id_produto IS {r}.id_produto AND i.id <> {r}.id),
+           {sinal} * {r}.quantidade, {sinal} * {r}.total
+    FROM Pedidos p WHERE p.id = {r}.id_pedido
+"""
+
+# Delta de um pedido inteiro mudando de dia/forma de pagamento
+_DELTA_PEDIDO = """
+    SELECT substr({r}.data_venda, 1, 10), COALESCE(i.id_produto, 0), COALESCE({r}.pagamento, ''),
+           {sinal}, {sinal} * SUM(i.quantidade), {sinal} * SUM(i.total)
+    FROM Pedidos_Itens i WHERE i.id_pedido = {r}.id GROUP BY i.id_produto
+"""
+
+_LIMPA_DIARIO = "DELETE FROM Vendas_Diarias WHERE pedidos <= 0;"
+
+SQL_RECONSTRUIR_DIARIO = """
+    INSERT INTO Vendas_Diarias (dia, id_produto, pagamento, pedidos, unidades, receita)
+    SELECT substr(p.data_venda, 1, 10), COALESCE(i.id_produto, 0), COALESCE(p.pagamento, ''),
+           COUNT(DISTINCT i.id_pedido), SUM(i.quantidade), SUM(i.total)
+    FROM Pedidos_Itens i JOIN Pedidos p ON p.id = i.id_pedido
+    GROUP BY 1, 2, 3
+"""
+
+
+def _m005_vendas_diarias(conn):
+    """Tabela Vendas_Diarias + triggers que a mantêm em dia a cada item/pedido gravado"""
+    conn.execute("""CREATE TABLE Vendas_Diarias (
+        dia TEXT NOT NULL, id_produto INTEGER NOT NULL, pagamento TEXT NOT NULL,
+        pedidos INTEGER NOT NULL, unidades INTEGER NOT NULL, receita REAL NOT NULL,
+        PRIMARY KEY (dia, id_produto, pagamento)) WITHOUT ROWID""")
+    entra_novo = _UPSERT_DIARIO.format(select=_DELTA_ITEM.format(r="NEW", sinal=1))
+    sai_velho = _UPSERT_DIARIO.format(select=_DELTA_ITEM.format(r="OLD", sinal=-1))
+    conn.execute(f"CREATE TRIGGER trg_itens_diario_ins AFTER INSERT ON Pedidos_Itens BEGIN {entra_novo} END")
+    conn.execute(f"CREATE TRIGGER trg_itens_diario_del AFTER DELETE ON Pedidos_Itens BEGIN {sai_velho} {_LIMPA_DIARIO} END")
+    conn.execute(f"""CREATE TRIGGER trg_itens_diario_upd
+        AFTER UPDATE OF id_pedido, id_produto, quantidade, total ON Pedidos_Itens
+        BEGIN {sai_velho} {entra_novo} {_LIMPA_DIARIO} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_diario_upd
+        AFTER UPDATE OF data_venda, pagamento ON Pedidos
+        WHEN OLD.data_venda IS NOT NEW.data_venda OR OLD.pagamento IS NOT NEW.pagamento
+        BEGIN
+            {_UPSERT_DIARIO.format(select=_DELTA_PEDIDO.format(r="OLD", sinal=-1))}
+            {_UPSERT_DIARIO.format(select=_DELTA_PEDIDO.format(r="NEW", sinal=1))}
+            {_LIMPA_DIARIO}
+        END""")
+    conn.execute(SQL_RECONSTRUIR_DIARIO)
+
+
+# Totais por cliente: uma linha por cliente (ranking geral) e uma por cliente/dia
+# (janelas de 30/90/365 dias somam só os dias da janela). Mantidos por triggers em Pedidos.
+_DELTA_CLIENTE = """
+    INSERT INTO Clientes_Totais (id_cliente, total_gasto, qtd_pedidos, ultimo_pedido)
+    VALUES ({r}.id_cliente, {sinal} * {r}.valor_total, {sinal}, {ultimo})
+    ON CONFLICT (id_cliente) DO UPDATE SET
+        total_gasto = total_gasto + excluded.total_gasto,
+        qtd_pedidos = qtd_pedidos + excluded.qtd_pedidos,
+        ultimo_pedido = {ultimo_conflito};
+    INSERT INTO Clientes_Diario (dia, id_cliente, total, pedidos)
+    VALUES (substr({r}.data_venda, 1, 10), {r}.id_cliente, {sinal} * {r}.valor_total, {sinal})
+    ON CONFLICT (dia, id_cliente) DO UPDATE SET
+        total = total + excluded.total,
+        pedidos = pedidos + excluded.pedidos;
+"""
+
+# Ao entrar um pedido basta comparar datas; ao sair é preciso procurar o anterior
+_ENTRA_CLIENTE = _DELTA_CLIENTE.format(
+    r="NEW", sinal=1, ultimo="NEW.data_venda",
+    ultimo_conflito="MAX(COALESCE(ultimo_pedido, ''), COALESCE(excluded.ultimo_pedido, ''))")
+_SAI_CLIENTE = _DELTA_CLIENTE.format(
+    r="OLD", sinal=-1, ultimo="NULL",
+    ultimo_conflito="(SELECT MAX(data_venda) FROM Pedidos WHERE id_cliente = OLD.id_cliente)")
+
+_LIMPA_CLIENTE = """
+    DELETE FROM Clientes_Totais WHERE qtd_pedidos <= 0;
+    DELETE FROM Clientes_Diario WHERE pedidos <= 0;
+"""
+
+SQL_RECONSTRUIR_CLIENTES = [
+    """INSERT INTO Clientes_Totais (id_cliente, total_gasto, qtd_pedidos, ultimo_pedido)
+       SELECT id_cliente, SUM(valor_total), COUNT(*), MAX(data_venda)
+       FROM Pedidos WHERE id_cliente IS NOT NULL GROUP BY id_cliente""",
+    """INSERT INTO Clientes_Diario (dia, id_cliente, total, pedidos)
+       SELECT substr(data_venda, 1, 10), id_cliente, SUM(valor_total), COUNT(*)
+       FROM Pedidos WHERE id_cliente IS NOT NULL GROUP BY 1, 2""",
+]
+
+
+def _m006_totais_clientes(conn):
+    """Ranking materializado por id_cliente (antes agrupava por nome no pandas)"""
+    conn.execute("""CREATE TABLE Clientes_Totais (
+        id_cliente INTEGER PRIMARY KEY REFERENCES Clientes (id),
+        total_gasto REAL NOT NULL, qtd_pedidos INTEGER NOT NULL, ultimo_pedido TEXT)""")
+    conn.execute("CREATE INDEX idx_clientes_totais_gasto ON Clientes_Totais (total_gasto)")
+    conn.execute("""CREATE TABLE Clientes_Diario (
+        dia TEXT NOT NULL, id_cliente INTEGER NOT NULL, total REAL NOT NULL, pedidos INTEGER NOT NULL,
+        PRIMARY KEY (dia, id_cliente)) WITHOUT ROWID""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_ins AFTER INSERT ON Pedidos
+        WHEN NEW.id_cliente IS NOT NULL BEGIN {_ENTRA_CLIENTE} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_del AFTER DELETE ON Pedidos
+        WHEN OLD.id_cliente IS NOT NULL BEGIN {_SAI_CLIENTE} {_LIMPA_CLIENTE} END""")
+    # Update = sai o pedido velho e entra o novo (dois triggers para tratar NULL de cada lado)
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_sai
+        AFTER UPDATE OF id_cliente, valor_total, data_venda ON Pedidos
+        WHEN OLD.id_cliente IS NOT NULL BEGIN {_SAI_CLIENTE} {_LIMPA_CLIENTE} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_entra
+        AFTER UPDATE OF id_cliente, valor_total, data_venda ON Pedidos
+        WHEN NEW.id_cliente IS NOT NULL BEGIN {_ENTRA_CLIENTE} END""")
+    for sql in SQL_RECONSTRUIR_CLIENTES:
+        conn.execute(sql)
+
+
+def _m007_exportacoes(conn):
+    """Histórico de exportações (o modo incremental continua de onde a última parou)"""
+    conn.execute("""CREATE TABLE Exportacoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, formato TEXT NOT NULL,
+        ultimo_id_pedido INTEGER NOT NULL, linhas INTEGER NOT NULL)""")
+
+
+def _m008_chave_idempotencia(conn):
+    """Chave única por pedido: reenviar o mesmo pedido (duplo clique, rerun) não duplica"""
+    conn.execute("ALTER TABLE Pedidos ADD COLUMN chave_idempotencia TEXT")
+    conn.execute("""CREATE UNIQUE INDEX idx_pedidos_chave ON Pedidos (chave_idempotencia)
+                    WHERE chave_idempotencia IS NOT NULL""")
+
+
+# Busca (FTS5) por nome, telefone e endereço dos clientes e por nome e tamanho
+# dos produtos. O rowid da busca é o id da tabela; os gatilhos mantêm a cópia.
+# O telefone entra só com os dígitos, com e sem DDD, para achar "99999" ou "1199999".
+_DIGITOS = "REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE({t}, ''), '(', ''), ')', ''), '-', ''), ' ', ''), '+', ''), '.', '')"
+_TELEFONE_BUSCA = f"{_DIGITOS} || ' ' || SUBSTR({_DIGITOS}, 3)"
+_OPCOES_FTS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+
+def _m009_busca(conn):
+    """Índices de busca por texto (FTS5) para os seletores de cliente e produto"""
+    conn.execute(f"CREATE VIRTUAL TABLE Clientes_Busca USING fts5(nome, telefone, endereco, {_OPCOES_FTS})")
+    conn.execute(f"CREATE VIRTUAL TABLE Produtos_Busca USING fts5(nome, tamanho, {_OPCOES_FTS})")
+
+    cliente = lambda r: f"{r}.id, {r}.nome, {_TELEFONE_BUSCA.format(t=f'{r}.telefone')}, {r}.endereco"
+    produto = lambda r: f"{r}.id, {r}.nome, {r}.tamanho"
+    for tabela, colunas, valores in (("Clientes", "rowid, nome, telefone, endereco", cliente),
+                                     ("Produtos", "rowid, nome, tamanho", produto)):
+        insere = f"INSERT INTO {tabela}_Busca ({colunas}) SELECT {valores('new')};"
+        apaga = f"DELETE FROM {tabela}_Busca WHERE rowid = old.id;"
+        conn.execute(f"CREATE TRIGGER trg_{tabela.lower()}_busca_ins AFTER INSERT ON {tabela} BEGIN {insere} END")
+        conn.execute(f"CREATE TRIGGER trg_{tabela.lower()}_busca_del AFTER DELETE ON {tabela} BEGIN {apaga} END")
+        conn.execute(f"CREATE TRIGGER trg_{tabela.lower()}_busca_upd AFTER UPDATE ON {tabela} BEGIN {apaga} {insere} END")
+        conn.execute(f"INSERT INTO {tabela}_Busca ({colunas}) SELECT {valores(tabela)} FROM {tabela}")
+
+
+def _m010_versao_e_exclusao(conn):
+    """Versão da linha (edições concorrentes) e exclusão lógica em Clientes e Produtos"""
+    for tabela in ("Clientes", "Produtos"):
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+        # Excluído continua na tabela: os pedidos antigos seguem apontando para ele
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN excluido_em TEXT")
+
+
+def _m011_tarefas(conn):
+    """Fila de tarefas em segundo plano (ver tarefas.py)"""
+    conn.execute("""CREATE TABLE Tarefas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL, parametros TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'Na fila', progresso REAL NOT NULL DEFAULT 0, mensagem TEXT,
+        arquivo TEXT, cancelar INTEGER NOT NULL DEFAULT 0,
+        criada_em TEXT NOT NULL, iniciada_em TEXT, terminada_em TEXT)""")
+    conn.execute("CREATE INDEX idx_tarefas_status ON Tarefas (status, id)")
+
+
+# Dinheiro em centavos. O valor_total do pedido passa a ser mantido pelos gatilhos
+# dos itens (cabeçalho nasce com 0 e cada item soma o seu total), e cada item só
+# é aceito com total = valor_unitario * quantidade, então os dois nunca divergem.
+_SOMA_PEDIDO = "UPDATE Pedidos SET valor_total = valor_total + {sinal} * COALESCE({r}.total, 0) WHERE id = {r}.id_pedido;"
+
+# Pedido que só mudou de valor (itens entrando/saindo): soma a diferença nos
+# totais do cliente, sem o custo de tirar e pôr o pedido de novo
+_MUDOU_CLIENTE_OU_DIA = "(OLD.id_cliente IS NOT NEW.id_cliente OR OLD.data_venda IS NOT NEW.data_venda)"
+_DIFERENCA_CLIENTE = """
+    UPDATE Clientes_Totais SET total_gasto = total_gasto + NEW.valor_total - OLD.valor_total
+    WHERE id_cliente = NEW.id_cliente;
+    UPDATE Clientes_Diario SET total = total + NEW.valor_total - OLD.valor_total
+    WHERE dia = substr(NEW.data_venda, 1, 10) AND id_cliente = NEW.id_cliente;
+"""
+
+_CENTAVOS = "CAST(ROUND({c} * 100) AS INTEGER)"
+
+
+def _recriar(conn, tabela, criar, selecionar):
+    """Troca a tabela por outra com o esquema 'criar', mantendo ids, índices e o AUTOINCREMENT"""
+    indices = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (tabela,))]
+    sequencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,)).fetchone()
+    conn.execute(criar.format(tabela=f"{tabela}_novo"))
+    conn.execute(f"INSERT INTO {tabela}_novo {selecionar}")
+    conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"ALTER TABLE {tabela}_novo RENAME TO {tabela}")
+    for sql in indices:
+        conn.execute(sql)
+    if sequencia:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (tabela,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sequencia[0]))
+
+
+def _m012_centavos(conn):
+    """Preços e totais de REAL (reais) para INTEGER (centavos); resumos recalculados exatos"""
+    # Os gatilhos são guardados e recriados no fim: a troca das tabelas os apagaria
+    gatilhos = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    for nome, _ in gatilhos:
+        conn.execute(f"DROP TRIGGER {nome}")
+
+    _recriar(conn, "Produtos", """CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT,
+        preco INTEGER CHECK (typeof(preco) IN ('integer', 'null')),
+        tamanho TEXT, ativo INTEGER DEFAULT 1,
+        versao INTEGER NOT NULL DEFAULT 1, excluido_em TEXT)""",
+             f"""SELECT id, nome, {_CENTAVOS.format(c='preco')}, tamanho, ativo, versao, excluido_em FROM Produtos""")
+
+    # O item vale sempre preço x quantidade (o total gravado em reais é descartado)
+    _recriar(conn, "Pedidos_Itens", """CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_pedido INTEGER NOT NULL REFERENCES Pedidos (id),
+        id_produto INTEGER REFERENCES Produtos (id),
+        valor_unitario INTEGER CHECK (typeof(valor_unitario) IN ('integer', 'null')),
+        quantidade INTEGER,
+        total INTEGER CHECK (typeof(total) IN ('integer', 'null') AND total = valor_unitario * quantidade))""",
+             f"""SELECT id, id_pedido, id_produto, {_CENTAVOS.format(c='valor_unitario')}, quantidade,
+                        COALESCE({_CENTAVOS.format(c='valor_unitario')} * quantidade, {_CENTAVOS.format(c='total')})
+                 FROM Pedidos_Itens""")
+
+    # Pedido com itens = soma dos itens; pedido antigo sem itens mantém o valor gravado
+    _recriar(conn, "Pedidos", """CREATE TABLE {tabela} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, data_venda TEXT, data_entrega TEXT,
+        id_cliente INTEGER REFERENCES Clientes (id),
+        valor_total INTEGER NOT NULL DEFAULT 0 CHECK (typeof(valor_total) = 'integer'),
+        pagamento TEXT, observacoes TEXT, status TEXT DEFAULT 'Pendente', chave_idempotencia TEXT)""",
+             f"""SELECT p.id, p.data_venda, p.data_entrega, p.id_cliente,
+                        COALESCE((SELECT SUM(i.total) FROM Pedidos_Itens i WHERE i.id_pedido = p.id),
+                                 {_CENTAVOS.format(c='p.valor_total')}, 0),
+                        p.pagamento, p.observacoes, p.status, p.chave_idempotencia
+                 FROM Pedidos p""")
+
+    # Resumos: recalculados a partir dos pedidos já em centavos
+    conn.execute("DROP TABLE Vendas_Diarias")
+    conn.execute("""CREATE TABLE Vendas_Diarias (
+        dia TEXT NOT NULL, id_produto INTEGER NOT NULL, pagamento TEXT NOT NULL,
+        pedidos INTEGER NOT NULL, unidades INTEGER NOT NULL, receita INTEGER NOT NULL,
+        PRIMARY KEY (dia, id_produto, pagamento)) WITHOUT ROWID""")
+    conn.execute(SQL_RECONSTRUIR_DIARIO)
+    conn.execute("DROP TABLE Clientes_Totais")
+    conn.execute("DROP TABLE Clientes_Diario")
+    conn.execute("""CREATE TABLE Clientes_Totais (
+        id_cliente INTEGER PRIMARY KEY REFERENCES Clientes (id),
+        total_gasto INTEGER NOT NULL, qtd_pedidos INTEGER NOT NULL, ultimo_pedido TEXT)""")
+    conn.execute("CREATE INDEX idx_clientes_totais_gasto ON Clientes_Totais (total_gasto)")
+    conn.execute("""CREATE TABLE Clientes_Diario (
+        dia TEXT NOT NULL, id_cliente INTEGER NOT NULL, total INTEGER NOT NULL, pedidos INTEGER NOT NULL,
+        PRIMARY KEY (dia, id_cliente)) WITHOUT ROWID""")
+    for sql in SQL_RECONSTRUIR_CLIENTES:
+        conn.execute(sql)
+
+    substituidos = {"trg_pedidos_clientes_upd_sai", "trg_pedidos_clientes_upd_entra"}
+    for nome, sql in gatilhos:
+        if nome not in substituidos:
+            conn.execute(sql)
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_sai
+        AFTER UPDATE OF id_cliente, valor_total, data_venda ON Pedidos
+        WHEN OLD.id_cliente IS NOT NULL AND {_MUDOU_CLIENTE_OU_DIA} BEGIN {_SAI_CLIENTE} {_LIMPA_CLIENTE} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_entra
+        AFTER UPDATE OF id_cliente, valor_total, data_venda ON Pedidos
+        WHEN NEW.id_cliente IS NOT NULL AND {_MUDOU_CLIENTE_OU_DIA} BEGIN {_ENTRA_CLIENTE} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_valor
+        AFTER UPDATE OF valor_total ON Pedidos
+        WHEN NEW.id_cliente IS NOT NULL AND NOT {_MUDOU_CLIENTE_OU_DIA} AND OLD.valor_total IS NOT NEW.valor_total
+        BEGIN {_DIFERENCA_CLIENTE} END""")
+
+    entra_item = _SOMA_PEDIDO.format(r="NEW", sinal=1)
+    sai_item = _SOMA_PEDIDO.format(r="OLD", sinal=-1)
+    conn.execute(f"CREATE TRIGGER trg_itens_total_ins AFTER INSERT ON Pedidos_Itens BEGIN {entra_item} END")
+    conn.execute(f"CREATE TRIGGER trg_itens_total_del AFTER DELETE ON Pedidos_Itens BEGIN {sai_item} END")
+    conn.execute(f"""CREATE TRIGGER trg_itens_total_upd AFTER UPDATE OF id_pedido, total ON Pedidos_Itens
+        WHEN OLD.id_pedido IS NOT NEW.id_pedido OR OLD.total IS NOT NEW.total
+        BEGIN {sai_item} {entra_item} END""")
+
+
+# Carga da cozinha por dia de entrega e tamanho, mantida por triggers como os
+# outros resumos. 'unidades' conta tudo que foi marcado para o dia (a vaga já foi
+# usada); 'a_produzir' só o que ainda não ficou pronto. Os pesos por tamanho
+# (Pesos_Tamanho) entram só na leitura, então mudar um peso não exige recalcular.
+_A_PRODUZIR = "('Pendente', 'Em Produção')"
+
+_UPSERT_CARGA = """
+    INSERT INTO Carga_Diaria (dia, tamanho, unidades, a_produzir)
+    {select}
+    ON CONFLICT (dia, tamanho) DO UPDATE SET
+        unidades = unidades + excluded.unidades,
+        a_produzir = a_produzir + excluded.a_produzir;
+"""
+
+# Um item entrando/saindo (o tamanho vem do produto)
+_CARGA_ITEM = f"""
+    SELECT p.data_entrega, COALESCE((SELECT tamanho FROM Produtos WHERE id = {{r}}.id_produto), ''),
+           {{sinal}} * {{r}}.quantidade, {{sinal}} * {{r}}.quantidade * (p.status IN {_A_PRODUZIR})
+    FROM Pedidos p WHERE p.id = {{r}}.id_pedido AND p.data_entrega IS NOT NULL
+"""
+
+# Um pedido inteiro mudando de dia de entrega ou de status
+_CARGA_PEDIDO = f"""
+    SELECT {{r}}.data_entrega, COALESCE(pr.tamanho, ''),
+           {{sinal}} * SUM(i.quantidade), {{sinal}} * SUM(i.quantidade) * ({{r}}.status IN {_A_PRODUZIR})
+    FROM Pedidos_Itens i LEFT JOIN Produtos pr ON pr.id = i.id_produto
+    WHERE i.id_pedido = {{r}}.id AND {{r}}.data_entrega IS NOT NULL
+    GROUP BY 2
+"""
+
+# Um produto mudando de tamanho: todos os itens dele trocam de coluna
+_CARGA_PRODUTO = f"""
+    SELECT p.data_entrega, COALESCE({{r}}.tamanho, ''),
+           {{sinal}} * SUM(i.quantidade), {{sinal}} * SUM(i.quantidade * (p.status IN {_A_PRODUZIR}))
+    FROM Pedidos_Itens i JOIN Pedidos p ON p.id = i.id_pedido
+    WHERE i.id_produto = {{r}}.id AND p.data_entrega IS NOT NULL
+    GROUP BY p.data_entrega
+"""
+
+_LIMPA_CARGA = "DELETE FROM Carga_Diaria WHERE dia = {dia} AND unidades <= 0;"
+
+# A mesma conta a partir dos pedidos, numa janela de entrega (índice por data_entrega)
+SQL_RECONSTRUIR_CARGA = f"""
+    INSERT INTO Carga_Diaria (dia, tamanho, unidades, a_produzir)
+    SELECT p.data_entrega, COALESCE(pr.tamanho, ''), SUM(i.quantidade), SUM(i.quantidade * (p.status IN {_A_PRODUZIR}))
+    FROM Pedidos p
+    JOIN Pedidos_Itens i ON i.id_pedido = p.id
+    LEFT JOIN Produtos pr ON pr.id = i.id_produto
+    WHERE p.data_entrega >= ? AND p.data_entrega < ?
+    GROUP BY 1, 2
+    HAVING SUM(i.quantidade) > 0
+"""
+
+
+def _m013_capacidade(conn):
+    """Limites de produção por dia da semana e por data, pesos por tamanho e a carga diária"""
+    # dia_semana como date.weekday() (0 = segunda, igual a DIAS_SEMANA); sem linha = sem limite
+    conn.execute("""CREATE TABLE Capacidade_Semana (
+        dia_semana INTEGER PRIMARY KEY CHECK (dia_semana BETWEEN 0 AND 6),
+        limite INTEGER NOT NULL CHECK (limite >= 0))""")
+    # Exceções por data (feriado = 0, véspera de festa = mais); valem mais que o dia da semana
+    conn.execute("""CREATE TABLE Capacidade_Dia (
+        dia TEXT PRIMARY KEY, limite INTEGER NOT NULL CHECK (limite >= 0))""")
+    # Tamanho sem peso cadastrado vale 1
+    conn.execute("""CREATE TABLE Pesos_Tamanho (
+        tamanho TEXT PRIMARY KEY, peso INTEGER NOT NULL CHECK (peso > 0))""")
+    conn.execute("""CREATE TABLE Carga_Diaria (
+        dia TEXT NOT NULL, tamanho TEXT NOT NULL, unidades INTEGER NOT NULL, a_produzir INTEGER NOT NULL,
+        PRIMARY KEY (dia, tamanho)) WITHOUT ROWID""")
+
+    entra_item = _UPSERT_CARGA.format(select=_CARGA_ITEM.format(r="NEW", sinal=1))
+    sai_item = _UPSERT_CARGA.format(select=_CARGA_ITEM.format(r="OLD", sinal=-1))
+    limpa_item = _LIMPA_CARGA.format(dia="(SELECT data_entrega FROM Pedidos WHERE id = OLD.id_pedido)")
+    conn.execute(f"CREATE TRIGGER trg_itens_carga_ins AFTER INSERT ON Pedidos_Itens BEGIN {entra_item} END")
+    conn.execute(f"CREATE TRIGGER trg_itens_carga_del AFTER DELETE ON Pedidos_Itens BEGIN {sai_item} {limpa_item} END")
+    conn.execute(f"""CREATE TRIGGER trg_itens_carga_upd AFTER UPDATE OF id_pedido, id_produto, quantidade ON Pedidos_Itens
+        WHEN OLD.id_pedido IS NOT NEW.id_pedido OR OLD.id_produto IS NOT NEW.id_produto OR OLD.quantidade IS NOT NEW.quantidade
+        BEGIN {sai_item} {entra_item} {limpa_item} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_carga_upd AFTER UPDATE OF data_entrega, status ON Pedidos
+        WHEN OLD.data_entrega IS NOT NEW.data_entrega
+          OR (OLD.status IN {_A_PRODUZIR}) IS NOT (NEW.status IN {_A_PRODUZIR})
+        BEGIN
+            {_UPSERT_CARGA.format(select=_CARGA_PEDIDO.format(r="OLD", sinal=-1))}
+            {_UPSERT_CARGA.format(select=_CARGA_PEDIDO.format(r="NEW", sinal=1))}
+            {_LIMPA_CARGA.format(dia="OLD.data_entrega")}
+        END""")
+    conn.execute(f"""CREATE TRIGGER trg_produtos_carga_upd AFTER UPDATE OF tamanho ON Produtos
+        WHEN COALESCE(OLD.tamanho, '') IS NOT COALESCE(NEW.tamanho, '')
+        BEGIN
+            {_UPSERT_CARGA.format(select=_CARGA_PRODUTO.format(r="OLD", sinal=-1))}
+            {_UPSERT_CARGA.format(select=_CARGA_PRODUTO.format(r="NEW", sinal=1))}
+            DELETE FROM Carga_Diaria WHERE tamanho = COALESCE(OLD.tamanho, '') AND unidades <= 0;
+        END""")
+    conn.execute(SQL_RECONSTRUIR_CARGA, ("0000-00-00", "9999-99-99"))
+
+
+def _m014_arquivo(conn):
+    """Registro dos bancos de arquivo de pedidos entregues (um por ano da venda)"""
+    # primeiro/ultimo (data_venda) e maior_id dizem se uma consulta precisa do arquivo
+    conn.execute("""CREATE TABLE Arquivos (
+        ano INTEGER PRIMARY KEY, arquivo TEXT NOT NULL,
+        pedidos INTEGER NOT NULL, itens INTEGER NOT NULL,
+        primeiro TEXT NOT NULL, ultimo TEXT NOT NULL, maior_id INTEGER NOT NULL,
+        atualizado_em TEXT NOT NULL)""")
+
+
+# Pedido arquivado sai do banco vivo sem passar pelos gatilhos, e os gatilhos não
+# leem outros bancos: a última compra arquivada de cada cliente fica guardada em
+# Clientes_Totais.ultimo_arquivado (ver _arquivar_lote) para o recálculo ao sair
+_SAI_CLIENTE_ARQUIVADO = _DELTA_CLIENTE.format(
+    r="OLD", sinal=-1, ultimo="NULL",
+    ultimo_conflito="""NULLIF(MAX(COALESCE((SELECT MAX(data_venda) FROM Pedidos WHERE id_cliente = OLD.id_cliente), ''),
+                                  COALESCE(ultimo_arquivado, '')), '')""")
+
+SQL_ULTIMO_ARQUIVADO = """
+    INSERT INTO Clientes_Totais (id_cliente, total_gasto, qtd_pedidos, ultimo_arquivado)
+    SELECT id_cliente, 0, 0, MAX(data_venda) FROM Pedidos WHERE id_cliente IS NOT NULL GROUP BY id_cliente
+    ON CONFLICT (id_cliente) DO UPDATE SET
+        ultimo_arquivado = MAX(COALESCE(ultimo_arquivado, ''), excluded.ultimo_arquivado)
+"""
+
+
+def _m015_ultimo_arquivado(conn):
+    """Última compra arquivada por cliente: apagar o último pedido vivo não esquece o arquivo"""
+    conn.execute("ALTER TABLE Clientes_Totais ADD COLUMN ultimo_arquivado TEXT")
+    conn.execute("DROP TRIGGER trg_pedidos_clientes_del")
+    conn.execute("DROP TRIGGER trg_pedidos_clientes_upd_sai")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_del AFTER DELETE ON Pedidos
+        WHEN OLD.id_cliente IS NOT NULL BEGIN {_SAI_CLIENTE_ARQUIVADO} {_LIMPA_CLIENTE} END""")
+    conn.execute(f"""CREATE TRIGGER trg_pedidos_clientes_upd_sai
+        AFTER UPDATE OF id_cliente, valor_total, data_venda ON Pedidos
+        WHEN OLD.id_cliente IS NOT NULL AND {_MUDOU_CLIENTE_OU_DIA} BEGIN {_SAI_CLIENTE_ARQUIVADO} {_LIMPA_CLIENTE} END""")
+    # Arquivos já existentes: lidos por conexões próprias (ATTACH não roda dentro da transação)
+    caminho = conn.execute("PRAGMA database_list").fetchone()[2]
+    for (ano,) in conn.execute("SELECT ano FROM Arquivos").fetchall():
+        if not os.path.exists(arquivo_do_ano(ano, caminho)):
+            continue
+        arq = sqlite3.connect(arquivo_do_ano(ano, caminho))
+        try:
+            ultimos = arq.execute("""SELECT MAX(data_venda), id_cliente FROM Pedidos
+                                     WHERE id_cliente IS NOT NULL GROUP BY id_cliente""").fetchall()
+        finally:
+            arq.close()
+        conn.executemany("""UPDATE Clientes_Totais SET ultimo_arquivado = MAX(COALESCE(ultimo_arquivado, ''), ?)
+                            WHERE id_cliente = ?""", ultimos)
+
+
+def _m016_chaves_arquivadas(conn):
+    """Chaves de idempotência dos pedidos arquivados, conferidas dentro da transação do pedido"""
+    conn.execute("""CREATE TABLE Chaves_Arquivadas (
+        chave TEXT PRIMARY KEY, id_pedido INTEGER NOT NULL, valor_total INTEGER NOT NULL) WITHOUT ROWID""")
+    caminho = conn.execute("PRAGMA database_list").fetchone()[2]
+    for (ano,) in conn.execute("SELECT ano FROM Arquivos").fetchall():
+        if not os.path.exists(arquivo_do_ano(ano, caminho)):
+            continue
+        arq = sqlite3.connect(arquivo_do_ano(ano, caminho))
+        try:
+            chaves = arq.execute("""SELECT chave_idempotencia, id, valor_total FROM Pedidos
+                                    WHERE chave_idempotencia IS NOT NULL""").fetchall()
+        finally:
+            arq.close()
+        conn.executemany("INSERT OR IGNORE INTO Chaves_Arquivadas (chave, id_pedido, valor_total) VALUES (?,?,?)", chaves)
+
+
+MIGRACOES = [
+    _m001_tabelas_base,
+    _m002_chaves_estrangeiras,
+    _m003_indices,
+    _m004_indice_resumo_vendas,
+    _m005_vendas_diarias,
+    _m006_totais_clientes,
+    _m007_exportacoes,
+    _m008_chave_idempotencia,
+    _m009_busca,
+    _m010_versao_e_exclusao,
+    _m011_tarefas,
+    _m012_centavos,
+    _m013_capacidade,
+    _m014_arquivo,
+    _m015_ultimo_arquivado,
+    _m016_chaves_arquivadas,
+]
+
+
+def versao_esquema(caminho=None):
+    with conexao(caminho) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(caminho=None):
+    """Aplica as migrações pendentes numa única transação (ou vai tudo, ou nada)"""
+    caminho = caminho or DB_PATH
+    # Conexão própria: foreign_keys precisa estar desligado durante as recriações
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    try:
+        conn.execute("PRAGMA foreign_keys = OFF")
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        if versao >= len(MIGRACOES):
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for numero, passo in enumerate(MIGRACOES[versao:], start=versao + 1):
+                passo(conn)
+                conn.execute(f"PRAGMA user_version = {numero}")
+            problemas = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if problemas:
+                raise sqlite3.IntegrityError(f"Migração deixou chaves estrangeiras quebradas: {problemas[:5]}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    invalidar("Clientes", "Produtos", "Pedidos", "Pedidos_Itens", caminho=caminho)
+
+
+# --- GRAVAÇÃO DE PEDIDOS ---
+
+class PedidoInvalido(ValueError):
+    """Pedido sem itens, com quantidade inválida, produto inexistente/inativo ou cliente excluído"""
+
+
+class CapacidadeEsgotada(PedidoInvalido):
+    """O dia de entrega já não comporta o pedido (ver Capacidade_Semana / Capacidade_Dia)"""
+
+
+def _precos(conn, ids_produtos):
+    marcas = ",".join("?" * len(ids_produtos))
+    linhas = conn.execute(f"SELECT id, preco FROM Produtos WHERE ativo = 1 AND id IN ({marcas})", tuple(ids_produtos))
+    return dict(linhas.fetchall())
+
+
+# A chave pode ser de um pedido vivo ou de um já arquivado (o arquivo não fica anexado
+# na transação de escrita, então a chave arquivada fica em Chaves_Arquivadas)
+SQL_CHAVE_GRAVADA = """
+    SELECT id, valor_total FROM Pedidos WHERE chave_idempotencia = :chave
+    UNION ALL SELECT id_pedido, valor_total FROM Chaves_Arquivadas WHERE chave = :chave
+"""
+
+
+def _gravar_pedido(conn, id_cliente, itens, data_entrega, pagamento, observacoes, chave, data_venda, status, precos,
+                   conferir_capacidade=True):
+    """Grava cabeçalho + itens na transação aberta de conn; devolve (id_pedido, total em centavos)"""
+    if chave is not None:
+        existente = conn.execute(SQL_CHAVE_GRAVADA, {"chave": chave}).fetchone()
+        if existente:
+            return existente
+
+    # O FOREIGN KEY barra o id inexistente, mas não o cliente excluído (a linha continua lá)
+    cliente = conn.execute("SELECT excluido_em FROM Clientes WHERE id = ?", (id_cliente,)).fetchone()
+    if cliente and cliente[0] is not None:
+        raise PedidoInvalido(f"O cliente {id_cliente} foi excluído.")
+
+    linhas = []
+    for item in itens:
+        id_produto, quantidade = int(item[0]), int(item[1])
+        if quantidade <= 0:
+            raise PedidoInvalido(f"Quantidade inválida para o produto {id_produto}: {quantidade}")
+        if len(item) > 2 and item[2] is not None:
+            preco = int(item[2])        # preço histórico informado, em centavos (importações)
+        elif id_produto in precos:
+            preco = precos[id_produto]  # preço atual do cardápio, nunca o que veio da tela
+        else:
+            raise PedidoInvalido(f"Produto {id_produto} não existe ou está inativo.")
+        linhas.append((id_produto, preco, quantidade, preco * quantidade))
+    if not linhas:
+        raise PedidoInvalido("O pedido não tem itens.")
+
+    data_venda = data_venda or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # valor_total começa em 0 e os gatilhos somam cada item inserido
+    cursor = conn.execute(
+        "INSERT INTO Pedidos (data_venda, data_entrega, id_cliente, pagamento, observacoes, status, chave_idempotencia) VALUES (?,?,?,?,?,?,?)",
+        (data_venda, data_entrega, id_cliente, pagamento, observacoes, status, chave))
+    id_pedido = cursor.lastrowid
+    conn.executemany("INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (?,?,?,?,?)",
+                     [(id_pedido,) + linha for linha in linhas])
+    if conferir_capacidade and data_entrega and status in STATUS_A_PRODUZIR:
+        _conferir_capacidade(conn, id_pedido, data_entrega)
+    return id_pedido, sum(linha[3] for linha in linhas)
+
+
+def _ids_produtos(pedidos):
+    return {int(item[0]) for pedido in pedidos for item in pedido["itens"]}
+
+
+def registrar_pedido(id_cliente, itens, data_entrega=None, pagamento=None, observacoes="", chave=None,
+                     data_venda=None, status="Pendente", caminho=None):
+    """Grava um pedido inteiro (cabeçalho + itens) numa única transação.
+
+    itens: lista de (id_produto, quantidade) ou (id_produto, quantidade, valor_unitario em centavos).
+    O total é calculado com os preços do cardápio. Se 'chave' já foi usada,
+    nada é gravado e o pedido existente é devolvido. Retorna (id_pedido, valor_total em centavos).
+    """
+    pedido = {"itens": list(itens)}
+    try:
+        with escrita("Pedidos", "Pedidos_Itens", caminho=caminho) as conn:
+            precos = _precos(conn, _ids_produtos([pedido]))
+            return _gravar_pedido(conn, id_cliente, pedido["itens"], data_entrega, pagamento, observacoes,
+                                  chave, data_venda, status, precos)
+    except sqlite3.IntegrityError:
+        # Outra sessão gravou a mesma chave entre o SELECT e o INSERT
+        if chave is None:
+            raise
+        with conexao(caminho) as conn:
+            return conn.execute(SQL_CHAVE_GRAVADA, {"chave": chave}).fetchone()
+
+
+def registrar_pedidos_em_lote(pedidos, caminho=None):
+    """Grava vários pedidos numa transação só (importações); devolve a lista de (id, total).
+
+    Cada pedido é um dict com as mesmas chaves de registrar_pedido (id_cliente, itens, ...).
+    Histórico importado não passa pela conferência de capacidade da agenda.
+    """
+    with escrita("Pedidos", "Pedidos_Itens", caminho=caminho) as conn:
+        return gravar_pedidos_em_lote(conn, pedidos)
+
+
+def gravar_pedidos_em_lote(conn, pedidos):
+    """Como registrar_pedidos_em_lote, mas na transação já aberta de conn (escrita que
+    também invalide Pedidos e Pedidos_Itens), junto com o que o chamador gravou antes"""
+    pedidos = list(pedidos)
+    precos = _precos(conn, _ids_produtos(pedidos))
+    return [_gravar_pedido(conn, pedido["id_cliente"], pedido["itens"], pedido.get("data_entrega"),
+                           pedido.get("pagamento"), pedido.get("observacoes", ""), pedido.get("chave"),
+                           pedido.get("data_venda"), pedido.get("status", "Pendente"), precos,
+                           conferir_capacidade=False)
+            for pedido in pedidos]
+
+
+def registrar_pedidos_isolados(pedidos, caminho=None):
+    """Uma transação para todos, mas um pedido ruim não derruba os outros (API).
+
+    Devolve, na ordem dos pedidos, (id, total) ou a exceção daquele pedido
+    (PedidoInvalido, inclusive CapacidadeEsgotada, ou sqlite3.IntegrityError, ex.: cliente inexistente).
+    """
+    pedidos = list(pedidos)
+    resultado = []
+    with escrita("Pedidos", "Pedidos_Itens", caminho=caminho) as conn:
+        precos = _precos(conn, _ids_produtos(pedidos))
+        for pedido in pedidos:
+            conn.execute("SAVEPOINT pedido")
+            try:
+                gravado = _gravar_pedido(
+                    conn, pedido["id_cliente"], pedido["itens"], pedido.get("data_entrega"), pedido.get("pagamento"),
+                    pedido.get("observacoes", ""), pedido.get("chave"), pedido.get("data_venda"),
+                    pedido.get("status", "Pendente"), precos)
+            except (PedidoInvalido, sqlite3.IntegrityError) as erro:
+                conn.execute("ROLLBACK TO pedido")
+                gravado = erro
+            conn.execute("RELEASE pedido")
+            resultado.append(gravado)
+    return resultado
+
+
+# --- ARQUIVO DE PEDIDOS (um banco por ano) ---
+# Pedidos entregues há mais de HORIZONTE_ARQUIVO_DIAS saem de Pedidos/Pedidos_Itens
+# e vão para um banco por ano da venda (pasta 'arquivo_pedidos' ao lado do banco),
+# então as telas do dia a dia leem tabelas que não crescem para sempre. Os resumos
+# (Vendas_Diarias, Clientes_*, Carga_Diaria) continuam contando esses pedidos: eles
+# saem com os gatilhos desligados. Uma consulta de período que o arquivo cobre
+# anexa os anos necessários (ATTACH ... AS arquivo_AAAA) e é repetida em cada um
+# com UNION ALL. O SQLite aceita até 10 bancos numa conexão: ~9 anos por consulta.
+
+HORIZONTE_ARQUIVO_DIAS = 365
+LOTE_ARQUIVO = 5000  # pedidos por transação (~0,5 s com a vez de gravar); entre lotes as vendas gravam
+LIMITE_ANEXOS = 9    # o SQLite aceita até 10 bancos por conexão (o principal conta)
+
+_ESQUEMA_ARQUIVO = [
+    """CREATE TABLE IF NOT EXISTS Pedidos (
+        id INTEGER PRIMARY KEY, data_venda TEXT, data_entrega TEXT, id_cliente INTEGER,
+        valor_total INTEGER NOT NULL, pagamento TEXT, observacoes TEXT, status TEXT, chave_idempotencia TEXT)""",
+    """CREATE TABLE IF NOT EXISTS Pedidos_Itens (
+        id INTEGER PRIMARY KEY, id_pedido INTEGER NOT NULL, id_produto INTEGER,
+        valor_unitario INTEGER, quantidade INTEGER, total INTEGER)""",
+    # Os mesmos índices do banco vivo que as consultas de histórico usam
+    "CREATE INDEX IF NOT EXISTS idx_pedidos_venda_total ON Pedidos (data_venda, valor_total)",
+    "CREATE INDEX IF NOT EXISTS idx_pedidos_entrega ON Pedidos (data_entrega)",
+    "CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON Pedidos (id_cliente, valor_total)",
+    "CREATE INDEX IF NOT EXISTS idx_pedidos_chave ON Pedidos (chave_idempotencia) WHERE chave_idempotencia IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_itens_pedido ON Pedidos_Itens (id_pedido, id_produto, quantidade)",
+]
+
+_COLUNAS_PEDIDO = "id, data_venda, data_entrega, id_cliente, valor_total, pagamento, observacoes, status, chave_idempotencia"
+_COLUNAS_ITEM = "id, id_pedido, id_produto, valor_unitario, quantidade, total"
+
+SQL_PARA_ARQUIVAR = f"""
+    SELECT {_COLUNAS_PEDIDO} FROM Pedidos
+    WHERE data_venda < ? AND status = 'Entregue'
+    ORDER BY data_venda
+    LIMIT ?
+"""
+
+SQL_REGISTRAR_ARQUIVO = """
+    INSERT INTO Arquivos (ano, arquivo, pedidos, itens, primeiro, ultimo, maior_id, atualizado_em)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (ano) DO UPDATE SET
+        pedidos = pedidos + excluded.pedidos, itens = itens + excluded.itens,
+        primeiro = MIN(primeiro, excluded.primeiro), ultimo = MAX(ultimo, excluded.ultimo),
+        maior_id = MAX(maior_id, excluded.maior_id), atualizado_em = excluded.atualizado_em
+"""
+
+# Anos cujo arquivo tem pedidos vendidos em [início, fim) e com id > desde_id
+SQL_ARQUIVOS_CONSULTADOS = "SELECT ano FROM Arquivos WHERE primeiro < ? AND ultimo >= ? AND maior_id > ? ORDER BY ano DESC"
+
+_TABELA_PEDIDOS = re.compile(r"\b(FROM|JOIN)(\s+)(Pedidos_Itens|Pedidos)\b")
+_ESQUEMA_USADO = re.compile(r"\b(arquivo_\d{4})\.")
+
+
+def pasta_arquivo(caminho=None):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho or DB_PATH)), "arquivo_pedidos")
+
+
+def arquivo_do_ano(ano, caminho=None):
+    """Caminho do banco de arquivo de um ano (banco.db -> arquivo_pedidos/banco_2024.db)"""
+    base = os.path.splitext(os.path.basename(caminho or DB_PATH))[0]
+    return os.path.join(pasta_arquivo(caminho), f"{base}_{ano}.db")
+
+
+def _anexar(conn, caminho, esquemas, so_estes=False):
+    """Anexa os arquivo_AAAA que faltam (fora de transação). Os outros ficam anexados
+    para a próxima consulta, a não ser que seja para escrita (so_estes) ou passe do limite."""
+    anexados = conn.arquivos_anexados
+    esquemas = set(esquemas)
+    if so_estes or len(anexados | esquemas) > LIMITE_ANEXOS:
+        for esquema in anexados - esquemas:
+            conn.execute(f"DETACH DATABASE {esquema}")
+        anexados &= esquemas
+    for esquema in esquemas - anexados:
+        conn.execute(f"ATTACH DATABASE ? AS {esquema}", (arquivo_do_ano(esquema[-4:], caminho),))
+        anexados.add(esquema)
+
+
+def anexar_arquivos(conn, sql, caminho=None):
+    """Anexa os arquivos que a consulta cita (arquivo_AAAA.Pedidos...) antes de executá-la"""
+    _anexar(conn, caminho or DB_PATH, _ESQUEMA_USADO.findall(sql))
+
+
+def no_arquivo(sql, esquema):
+    """A mesma consulta lendo Pedidos/Pedidos_Itens de um arquivo (as outras tabelas continuam do banco vivo)"""
+    return _TABELA_PEDIDOS.sub(rf"\1\2{esquema}.\3", sql)
+
+
+def em_cada_fonte(sql, esquemas, params=()):
+    """A consulta no banco vivo e em cada arquivo, juntas com UNION ALL (sem ORDER BY/LIMIT: vão depois)"""
+    sql = sql.strip()
+    return "\nUNION ALL\n".join([sql] + [no_arquivo(sql, e) for e in esquemas]), tuple(params) * (1 + len(esquemas))
+
+
+# Resumos recalculados: o banco vivo entra com o INSERT da reconstrução e cada
+# arquivo soma por cima (o mesmo dia ou cliente pode ter pedidos nas duas fontes)
+_CONFLITO_DIARIO = """ON CONFLICT (dia, id_produto, pagamento) DO UPDATE SET
+    pedidos = pedidos + excluded.pedidos, unidades = unidades + excluded.unidades, receita = receita + excluded.receita"""
+_CONFLITO_CLIENTES = [
+    """ON CONFLICT (id_cliente) DO UPDATE SET
+        total_gasto = total_gasto + excluded.total_gasto, qtd_pedidos = qtd_pedidos + excluded.qtd_pedidos,
+        ultimo_pedido = MAX(COALESCE(ultimo_pedido, ''), COALESCE(excluded.ultimo_pedido, ''))""",
+    "ON CONFLICT (dia, id_cliente) DO UPDATE SET total = total + excluded.total, pedidos = pedidos + excluded.pedidos",
+]
+_CONFLITO_CARGA = """ON CONFLICT (dia, tamanho) DO UPDATE SET
+    unidades = unidades + excluded.unidades, a_produzir = a_produzir + excluded.a_produzir"""
+
+
+def _somar_fontes(conn, sql, conflito, esquemas, params=()):
+    conn.execute(sql, params)
+    for esquema in esquemas:
+        conn.execute(f"{no_arquivo(sql, esquema)}\n{conflito}", params)
+
+
+def arquivos_consultados(inicio=None, fim=None, desde_id=0, caminho=None):
+    """Esquemas (arquivo_AAAA) que uma consulta de [início, fim) ou de ids > desde_id precisa ler"""
+    anos = ler_linhas(SQL_ARQUIVOS_CONSULTADOS, (fim or "9999", inicio or "", desde_id),
+                      tabelas=("Arquivos",), caminho=caminho)
+    return [f"arquivo_{ano}" for (ano,) in anos]
+
+
+def resumo_arquivo(caminho=None):
+    """Um dict por ano arquivado: pedidos, itens, primeira e última venda"""
+    return ler_dicts("SELECT ano, pedidos, itens, primeiro, ultimo, atualizado_em FROM Arquivos ORDER BY ano",
+                     tabelas=("Arquivos",), caminho=caminho)
+
+
+def _abrir_arquivo(ano, caminho):
+    os.makedirs(pasta_arquivo(caminho), exist_ok=True)
+    conn = sqlite3.connect(arquivo_do_ano(ano, caminho), isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {PRAGMAS['busy_timeout']}")
+    for sql in _ESQUEMA_ARQUIVO:
+        conn.execute(sql)
+    return conn
+
+
+def _ja_arquivados(arq, tabela, linhas):
+    """Quantas destas linhas o arquivo já tinha (rodada anterior que caiu no meio)"""
+    if not linhas:
+        return 0
+    return arq.execute(f"SELECT COUNT(*) FROM {tabela} WHERE id IN ({','.join('?' * len(linhas))})",
+                       [linha[0] for linha in linhas]).fetchone()[0]
+
+
+def _arquivar_lote(conn, caminho, corte, agora):
+    """Copia um lote para o arquivo de cada ano, confirma lá e só então apaga do banco vivo"""
+    pedidos = conn.execute(SQL_PARA_ARQUIVAR, (corte, LOTE_ARQUIVO)).fetchall()
+    if not pedidos:
+        return 0, 0
+    ids = [p[0] for p in pedidos]
+    marcas = ",".join("?" * len(ids))
+    itens = conn.execute(f"SELECT {_COLUNAS_ITEM} FROM Pedidos_Itens WHERE id_pedido IN ({marcas})", ids).fetchall()
+    por_ano = {}
+    for p in pedidos:
+        por_ano.setdefault(int(p[1][:4]), ([], []))[0].append(p)
+    ano_do_pedido = {p[0]: int(p[1][:4]) for p in pedidos}
+    for item in itens:
+        por_ano[ano_do_pedido[item[1]]][1].append(item)
+
+    # O arquivo é gravado (e confirmado) antes de o banco vivo apagar: se o processo
+    # cair no meio, o pedido fica nos dois lugares e a próxima rodada termina o serviço
+    novos = {}
+    for ano, (pedidos_ano, itens_ano) in por_ano.items():
+        arq = _abrir_arquivo(ano, caminho)
+        try:
+            arq.execute("BEGIN IMMEDIATE")
+            novos[ano] = (len(pedidos_ano) - _ja_arquivados(arq, "Pedidos", pedidos_ano),
+                          len(itens_ano) - _ja_arquivados(arq, "Pedidos_Itens", itens_ano))
+            arq.executemany(f"INSERT OR REPLACE INTO Pedidos ({_COLUNAS_PEDIDO}) VALUES (?,?,?,?,?,?,?,?,?)", pedidos_ano)
+            arq.executemany(f"INSERT OR REPLACE INTO Pedidos_Itens ({_COLUNAS_ITEM}) VALUES (?,?,?,?,?,?)", itens_ano)
+            arq.execute("COMMIT")
+        finally:
+            arq.close()
+
+    # Gatilhos desligados só dentro desta transação: os resumos seguem contando os pedidos
+    gatilhos = conn.execute("""SELECT name, sql FROM sqlite_master
+                               WHERE type = 'trigger' AND tbl_name IN ('Pedidos', 'Pedidos_Itens')""").fetchall()
+    for nome, _ in gatilhos:
+        conn.execute(f"DROP TRIGGER {nome}")
+    conn.execute(f"DELETE FROM Pedidos_Itens WHERE id_pedido IN ({marcas})", ids)
+    conn.execute(f"DELETE FROM Pedidos WHERE id IN ({marcas})", ids)
+    for _, sql in gatilhos:
+        conn.execute(sql)
+    ultimos = {}
+    for p in pedidos:
+        if p[3] is not None:
+            ultimos[p[3]] = max(ultimos.get(p[3], ""), p[1])
+    conn.executemany("""UPDATE Clientes_Totais SET ultimo_arquivado = MAX(COALESCE(ultimo_arquivado, ''), ?)
+                        WHERE id_cliente = ?""", [(dia, id_cliente) for id_cliente, dia in ultimos.items()])
+    conn.executemany("INSERT OR IGNORE INTO Chaves_Arquivadas (chave, id_pedido, valor_total) VALUES (?,?,?)",
+                     [(p[8], p[0], p[4]) for p in pedidos if p[8] is not None])
+
+    for ano, (pedidos_ano, _) in por_ano.items():
+        datas = [p[1] for p in pedidos_ano]
+        conn.execute(SQL_REGISTRAR_ARQUIVO, (ano, os.path.basename(arquivo_do_ano(ano, caminho)), *novos[ano],
+                                             min(datas), max(datas), max(p[0] for p in pedidos_ano), agora))
+    return len(pedidos), len(itens)
+
+
+def _corte_arquivo(horizonte_dias):
+    return (date.today() - timedelta(days=horizonte_dias)).isoformat()
+
+
+def contar_para_arquivar(horizonte_dias=HORIZONTE_ARQUIVO_DIAS, caminho=None):
+    with conexao(caminho) as conn:
+        return conn.execute("SELECT COUNT(*) FROM Pedidos WHERE data_venda < ? AND status = 'Entregue'",
+                            (_corte_arquivo(horizonte_dias),)).fetchone()[0]
+
+
+def arquivar_pedidos(horizonte_dias=HORIZONTE_ARQUIVO_DIAS, caminho=None, progresso=None):
+    """Move os pedidos 'Entregue' vendidos há mais de horizonte_dias para o arquivo do ano.
+
+    Um lote de LOTE_ARQUIVO pedidos por transação; progresso(pedidos, itens) é
+    chamado depois de cada lote. As chaves de idempotência ficam em Chaves_Arquivadas:
+    repetir um pedido arquivado devolve o original. Devolve (pedidos, itens) arquivados.
+    """
+    caminho = caminho or DB_PATH
+    corte = _corte_arquivo(horizonte_dias)
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total_pedidos = total_itens = 0
+    while True:
+        # Sem arquivos anexados: o BEGIN IMMEDIATE não pode travar o arquivo que o lote grava
+        with escrita("Pedidos", "Pedidos_Itens", "Arquivos", caminho=caminho) as conn:
+            pedidos, itens = _arquivar_lote(conn, caminho, corte, agora)
+        total_pedidos += pedidos
+        total_itens += itens
+        if progresso:
+            progresso(total_pedidos, total_itens)
+        if pedidos < LOTE_ARQUIVO:
+            return total_pedidos, total_itens
+
+
+def chaves_gravadas(chaves, caminho=None):
+    """Quais destas chaves de idempotência já estão num pedido (vivo ou arquivado)"""
+    if not chaves:
+        return set()
+    marcas = ",".join("?" * len(chaves))
+    with conexao(caminho) as conn:
+        return {chave for (chave,) in conn.execute(
+            f"""SELECT chave_idempotencia FROM Pedidos WHERE chave_idempotencia IN ({marcas})
+                UNION ALL SELECT chave FROM Chaves_Arquivadas WHERE chave IN ({marcas})""", [*chaves, *chaves])}
+
+
+# --- CONSULTAS DAS PÁGINAS ---
+
+# Dashboard: períodos sempre como [início, fim) em texto 'AAAA-MM-DD', que
+# compara certo com data_venda ('AAAA-MM-DD HH:MM:SS')
+SQL_PRIMEIRA_VENDA = """
+    SELECT MIN(primeira) FROM (SELECT MIN(data_venda) AS primeira FROM Pedidos
+                               UNION ALL SELECT MIN(primeiro) FROM Arquivos)
+"""
+
+SQL_RESUMO_VENDAS = """
+    SELECT COALESCE(SUM(valor_total), 0), COUNT(*)
+    FROM Pedidos
+    WHERE data_venda >= ? AND data_venda < ?
+"""
+
+_PEDIDOS_PERIODO = """
+    SELECT id, data_venda, valor_total, pagamento
+    FROM Pedidos
+    WHERE data_venda >= ? AND data_venda < ?
+"""
+_PAGINA_PERIODO = """
+    ORDER BY data_venda DESC  -- sem desempate por id: o índice já entrega nessa ordem
+    LIMIT ? OFFSET ?
+"""
+SQL_PEDIDOS_PERIODO = _PEDIDOS_PERIODO + _PAGINA_PERIODO
+
+# Produção: status e janela de entrega filtrados no SQL (índices por status e
+# por data de entrega), uma página por vez; os entregues antigos nem são lidos
+STATUS_PEDIDO = ["Pendente", "Em Produção", "Pronto", "Entregue"]
+STATUS_ABERTOS = ["Pendente", "Em Produção", "Pronto"]
+
+_FILTRO_FILA = """
+    WHERE Pedidos.status IN ({marcas})
+      AND Pedidos.data_entrega >= ? AND Pedidos.data_entrega < ?
+"""
+
+SQL_FILA_PRODUCAO = """
+    SELECT Pedidos.id, Pedidos.data_entrega, Clientes.nome as Cliente,
+           Pedidos.valor_total, Pedidos.status, Pedidos.observacoes
+    FROM Pedidos
+    JOIN Clientes ON Pedidos.id_cliente = Clientes.id
+""" + _FILTRO_FILA + """
+    ORDER BY Pedidos.data_entrega, Pedidos.id
+    LIMIT ? OFFSET ?
+"""
+
+SQL_CONTA_FILA = "SELECT COUNT(*) FROM Pedidos" + _FILTRO_FILA
+
+# Plano da cozinha: tudo o que falta entregar, somado por dia, bolo e tamanho
+# numa consulta só (em vez de abrir pedido por pedido)
+SQL_PLANO_PRODUCAO = """
+    SELECT Pedidos.data_entrega AS dia, Produtos.nome AS produto, Produtos.tamanho,
+           SUM(Pedidos_Itens.quantidade) AS quantidade, COUNT(DISTINCT Pedidos.id) AS pedidos
+    FROM Pedidos
+    JOIN Pedidos_Itens ON Pedidos_Itens.id_pedido = Pedidos.id
+    JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
+""" + _FILTRO_FILA + """
+    GROUP BY Pedidos.data_entrega, Produtos.id
+    ORDER BY Pedidos.data_entrega, Produtos.nome, Produtos.tamanho
+"""
+
+DIAS_SEMANA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+SQL_ITENS_PEDIDO = """
+    SELECT Produtos.nome, Pedidos_Itens.quantidade, Pedidos_Itens.valor_unitario, Pedidos_Itens.total,
+           Pedidos_Itens.id_produto
+    FROM Pedidos_Itens
+    JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
+    WHERE Pedidos_Itens.id_pedido = ?
+"""
+
+# Consultas que também leem os arquivos: o cache cai quando um lote é arquivado
+TABELAS_HISTORICO = ("Pedidos", "Pedidos_Itens", "Arquivos")
+
+
+def _periodo(inicio, fim):
+    """Converte datas (inclusive nas duas pontas) para o intervalo [início, fim+1)"""
+    return inicio.isoformat(), (fim + timedelta(days=1)).isoformat()
+
+
+def primeira_venda():
+    """Data da venda mais antiga, arquivada ou não (None se ainda não há vendas)"""
+    valor = ler_linhas(SQL_PRIMEIRA_VENDA, tabelas=TABELAS_HISTORICO)[0][0]
+    return date.fromisoformat(valor[:10]) if valor else None
+
+
+def resumo_vendas(inicio, fim):
+    """(faturamento em centavos, quantidade de pedidos) no período, somados pelo SQLite"""
+    periodo = _periodo(inicio, fim)
+    # Uma linha por fonte (banco vivo e cada ano arquivado do período)
+    linhas = ler_linhas(*em_cada_fonte(SQL_RESUMO_VENDAS, arquivos_consultados(*periodo), periodo), tabelas=TABELAS_HISTORICO)
+    return sum(f for f, _ in linhas), sum(n for _, n in linhas)
+
+
+def pedidos_periodo(inicio, fim, pagina=1, por_pagina=50):
+    """Uma página (começando em 1) dos pedidos do período, do mais novo para o mais antigo"""
+    periodo = _periodo(inicio, fim)
+    esquemas = arquivos_consultados(*periodo)
+    if not esquemas:
+        return ler_df(SQL_PEDIDOS_PERIODO, periodo + (por_pagina, (pagina - 1) * por_pagina), tabelas=TABELAS_HISTORICO)
+    sql, params = em_cada_fonte(_PEDIDOS_PERIODO, esquemas, periodo)
+    return ler_df(sql + _PAGINA_PERIODO, params + (por_pagina, (pagina - 1) * por_pagina), tabelas=TABELAS_HISTORICO)
+
+
+def _fila(sql, status, inicio, fim):
+    status = list(status) or ["-"]  # nenhum status marcado: não traz nada
+    return sql.format(marcas=",".join("?" * len(status))), tuple(status) + _periodo(inicio, fim)
+
+
+def fila_producao(status, inicio, fim, pagina=1, por_pagina=50):
+    """Uma página dos pedidos com esses status e entrega entre inicio e fim (inclusive)"""
+    sql, params = _fila(SQL_FILA_PRODUCAO, status, inicio, fim)
+    return ler_df(sql, params + (por_pagina, (pagina - 1) * por_pagina), tabelas=("Pedidos", "Clientes"))
+
+
+def fila_producao_registros(status, inicio, fim, pagina=1, por_pagina=50):
+    """Mesma página de fila_producao, como lista de dicts (sem pandas; usada pela API)"""
+    sql, params = _fila(SQL_FILA_PRODUCAO, status, inicio, fim)
+    return ler_dicts(sql, params + (por_pagina, (pagina - 1) * por_pagina), tabelas=("Pedidos", "Clientes"))
+
+
+def contar_fila_producao(status, inicio, fim):
+    sql, params = _fila(SQL_CONTA_FILA, status, inicio, fim)
+    return ler_linhas(sql, params, tabelas=("Pedidos",))[0][0]
+
+
+SQL_PEDIDO = """
+    SELECT id, data_venda, data_entrega, id_cliente, valor_total, pagamento, observacoes, status
+    FROM Pedidos WHERE id = ?
+"""
+
+
+def obter_pedido(id_pedido):
+    """Cabeçalho do pedido (dict) com a lista de itens em 'itens', ou None se não existe.
+    O pedido que não está no banco vivo é procurado nos arquivos, do ano mais novo ao mais antigo."""
+    for esquema in ["main", *arquivos_consultados()]:
+        cabecalho = ler_dicts(no_arquivo(SQL_PEDIDO, esquema), (id_pedido,), tabelas=TABELAS_HISTORICO)
+        if cabecalho:
+            pedido = cabecalho[0]
+            pedido["itens"] = ler_dicts(no_arquivo(SQL_ITENS_PEDIDO, esquema), (id_pedido,),
+                                        tabelas=TABELAS_HISTORICO + ("Produtos",))
+            return pedido
+    return None
+
+
+def plano_producao(inicio, fim, status=STATUS_ABERTOS):
+    """DataFrame dia/produto/tamanho/quantidade/pedidos dos pedidos ainda não entregues"""
+    sql, params = _fila(SQL_PLANO_PRODUCAO, status, inicio, fim)
+    return ler_df(sql, params, tabelas=("Pedidos", "Pedidos_Itens", "Produtos"))
+
+
+def folha_producao(inicio, fim, status=STATUS_ABERTOS):
+    """Texto para imprimir: o que assar em cada dia e o total do período (sem pandas, serve ao main.py)"""
+    sql, params = _fila(SQL_PLANO_PRODUCAO, status, inicio, fim)
+    plano = ler_linhas(sql, params, tabelas=("Pedidos", "Pedidos_Itens", "Produtos"))
+    linhas = [f"PLANO DE PRODUÇÃO - {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}", "=" * 48]
+    if not plano:
+        return "\n".join(linhas + ["Nenhum bolo para produzir no período."])
+
+    totais = {}
+    dia_atual = None
+    for dia, produto, tamanho, quantidade, _ in plano:
+        bolo = f"{produto} ({tamanho})" if tamanho else produto
+        if dia != dia_atual:
+            dia_atual = dia
+            data = date.fromisoformat(dia)
+            linhas += ["", f"{DIAS_SEMANA[data.weekday()]}, {data:%d/%m/%Y}"]
+        linhas.append(f"  [ ] {quantidade:>4} x {bolo}")
+        totais[bolo] = totais.get(bolo, 0) + quantidade
+    linhas += ["", "TOTAL DO PERÍODO", "-" * 48]
+    linhas += [f"  {quantidade:>4} x {bolo}" for bolo, quantidade in sorted(totais.items())]
+    return "\n".join(linhas)
+
+
+# --- AGENDA E CAPACIDADE (Carga_Diaria) ---
+# A carga de um dia é a soma de unidades x peso do tamanho dos pedidos com entrega
+# nesse dia. O limite vem de Capacidade_Dia (exceção por data) ou, se não houver,
+# de Capacidade_Semana; sem nenhum dos dois o dia não tem limite. A conferência
+# roda dentro da transação que grava o pedido (escrita() já tem a vez de gravar),
+# então dois pedidos simultâneos não ocupam a mesma última vaga.
+STATUS_A_PRODUZIR = ["Pendente", "Em Produção"]
+TABELAS_CARGA = ("Carga_Diaria", "Pedidos", "Pedidos_Itens", "Produtos",
+                 "Pesos_Tamanho", "Capacidade_Semana", "Capacidade_Dia")
+
+SQL_CARGA_PERIODO = """
+    SELECT c.dia, SUM(c.unidades), SUM(c.unidades * COALESCE(w.peso, 1)), SUM(c.a_produzir * COALESCE(w.peso, 1))
+    FROM Carga_Diaria c LEFT JOIN Pesos_Tamanho w ON w.tamanho = c.tamanho
+    WHERE c.dia >= ? AND c.dia < ?
+    GROUP BY c.dia
+"""
+
+SQL_CARGA_DIA = """
+    SELECT COALESCE(SUM(c.unidades * COALESCE(w.peso, 1)), 0)
+    FROM Carga_Diaria c LEFT JOIN Pesos_Tamanho w ON w.tamanho = c.tamanho
+    WHERE c.dia = ?
+"""
+
+SQL_CARGA_PEDIDO = """
+    SELECT COALESCE(SUM(i.quantidade * COALESCE(w.peso, 1)), 0)
+    FROM Pedidos_Itens i
+    LEFT JOIN Produtos pr ON pr.id = i.id_produto
+    LEFT JOIN Pesos_Tamanho w ON w.tamanho = COALESCE(pr.tamanho, '')
+    WHERE i.id_pedido = ?
+"""
+
+SQL_LIMITE_DIA = """
+    SELECT COALESCE((SELECT limite FROM Capacidade_Dia WHERE dia = :dia),
+                    (SELECT limite FROM Capacidade_Semana
+                     WHERE dia_semana = (CAST(strftime('%w', :dia) AS INTEGER) + 6) % 7))
+"""
+
+
+def _conferir_capacidade(conn, id_pedido, dia):
+    """Depois dos itens gravados (os gatilhos já somaram a carga): passou do limite, desfaz tudo"""
+    limite = conn.execute(SQL_LIMITE_DIA, {"dia": dia}).fetchone()[0]
+    if limite is None:
+        return
+    carga = conn.execute(SQL_CARGA_DIA, (dia,)).fetchone()[0]
+    if carga > limite:
+        if limite == 0:
+            raise CapacidadeEsgotada(f"Não há produção em {dia[8:10]}/{dia[5:7]}.")
+        pedido = conn.execute(SQL_CARGA_PEDIDO, (id_pedido,)).fetchone()[0]
+        raise CapacidadeEsgotada(f"Sem capacidade para {dia[8:10]}/{dia[5:7]}: {carga - pedido} de {limite} "
+                                 f"já reservados e o pedido precisa de {pedido}.")
+
+
+def capacidade_semana():
+    """{dia_semana (0 = segunda): limite}; dia fora do dict não tem limite"""
+    return dict(ler_linhas("SELECT dia_semana, limite FROM Capacidade_Semana", tabelas=("Capacidade_Semana",)))
+
+
+def definir_capacidade_semana(limites):
+    """limites: {dia_semana: limite ou None (sem limite)} para os dias informados"""
+    with escrita("Capacidade_Semana") as conn:
+        for dia_semana, limite in limites.items():
+            if limite is None:
+                conn.execute("DELETE FROM Capacidade_Semana WHERE dia_semana = ?", (dia_semana,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO Capacidade_Semana (dia_semana, limite) VALUES (?, ?)",
+                             (dia_semana, int(limite)))
+
+
+def excecoes_capacidade(inicio, fim):
+    """{data: limite} das exceções em [inicio, fim]"""
+    linhas = ler_linhas("SELECT dia, limite FROM Capacidade_Dia WHERE dia >= ? AND dia <= ? ORDER BY dia",
+                        (inicio.isoformat(), fim.isoformat()), tabelas=("Capacidade_Dia",))
+    return {date.fromisoformat(dia): limite for dia, limite in linhas}
+
+
+def definir_capacidade_dia(dia, limite):
+    """Exceção para uma data; limite None volta a valer o limite do dia da semana"""
+    with escrita("Capacidade_Dia") as conn:
+        if limite is None:
+            conn.execute("DELETE FROM Capacidade_Dia WHERE dia = ?", (dia.isoformat(),))
+        else:
+            conn.execute("INSERT OR REPLACE INTO Capacidade_Dia (dia, limite) VALUES (?, ?)", (dia.isoformat(), int(limite)))
+
+
+def pesos_tamanho():
+    """{tamanho: peso}; tamanho fora do dict pesa 1"""
+    return dict(ler_linhas("SELECT tamanho, peso FROM Pesos_Tamanho ORDER BY tamanho", tabelas=("Pesos_Tamanho",)))
+
+
+def definir_pesos(pesos):
+    """Troca todos os pesos (só a leitura usa os pesos: nada é recalculado)"""
+    with escrita("Pesos_Tamanho") as conn:
+        conn.execute("DELETE FROM Pesos_Tamanho")
+        conn.executemany("INSERT INTO Pesos_Tamanho (tamanho, peso) VALUES (?, ?)",
+                         [(tamanho, int(peso)) for tamanho, peso in pesos.items() if peso])
+
+
+def calendario_capacidade(ano, mes):
+    """Um dict por dia do mês: dia, unidades, carga (com pesos), a_produzir, limite e livre (None = sem limite)"""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + mes // 12, mes % 12 + 1, 1)
+    cargas = {dia: resto for dia, *resto in ler_linhas(SQL_CARGA_PERIODO, (inicio.isoformat(), fim.isoformat()),
+                                                        tabelas=TABELAS_CARGA)}
+    semana = capacidade_semana()
+    excecoes = excecoes_capacidade(inicio, fim - timedelta(days=1))
+    dias = []
+    for n in range((fim - inicio).days):
+        dia = inicio + timedelta(days=n)
+        unidades, carga, a_produzir = cargas.get(dia.isoformat(), (0, 0, 0))
+        limite = excecoes.get(dia, semana.get(dia.weekday()))
+        dias.append({"dia": dia, "unidades": unidades, "carga": carga, "a_produzir": a_produzir,
+                     "limite": limite, "livre": None if limite is None else limite - carga})
+    return dias
+
+
+def capacidade_do_dia(dia):
+    """(carga, limite) de uma data; limite None = sem limite"""
+    return next((d["carga"], d["limite"]) for d in calendario_capacidade(dia.year, dia.month) if d["dia"] == dia)
+
+
+def reconstruir_carga_diaria(inicio=None, fim=None, caminho=None):
+    """Recalcula Carga_Diaria a partir dos pedidos (todas as datas, ou só as entregas em [inicio, fim])"""
+    inicio = inicio.isoformat() if inicio else "0000-00-00"
+    fim = (fim + timedelta(days=1)).isoformat() if fim else "9999-99-99"
+    # Pedido entregue no período foi vendido antes do fim dele
+    esquemas = arquivos_consultados(fim=fim, caminho=caminho)
+    with escrita("Carga_Diaria", caminho=caminho, arquivos=esquemas) as conn:
+        conn.execute("DELETE FROM Carga_Diaria WHERE dia >= ? AND dia < ?", (inicio, fim))
+        _somar_fontes(conn, SQL_RECONSTRUIR_CARGA, _CONFLITO_CARGA, esquemas, (inicio, fim))
+
+
+# --- RESUMO DIÁRIO DE VENDAS (Vendas_Diarias) ---
+# Lido pelo Dashboard no lugar de varrer Pedidos_Itens. Como é derivado dos
+# pedidos, o cache dessas leituras também cai quando Pedidos/Pedidos_Itens mudam.
+TABELAS_DIARIO = ("Vendas_Diarias", "Pedidos", "Pedidos_Itens")
+
+SQL_VENDAS_POR_DIA = """
+    SELECT dia, SUM(receita) as receita, SUM(unidades) as unidades
+    FROM Vendas_Diarias
+    WHERE dia >= ? AND dia < ?
+    GROUP BY dia
+    ORDER BY dia
+"""
+
+SQL_VENDAS_POR_PRODUTO = """
+    SELECT COALESCE(Produtos.nome, '(removido)') as produto,
+           SUM(v.receita) as receita, SUM(v.unidades) as unidades
+    FROM Vendas_Diarias v
+    LEFT JOIN Produtos ON Produtos.id = v.id_produto
+    WHERE v.dia >= ? AND v.dia < ?
+    GROUP BY v.id_produto
+    ORDER BY receita DESC
+"""
+
+SQL_VENDAS_POR_PAGAMENTO = """
+    SELECT CASE pagamento WHEN '' THEN '(não informado)' ELSE pagamento END as pagamento,
+           SUM(receita) as receita
+    FROM Vendas_Diarias
+    WHERE dia >= ? AND dia < ?
+    GROUP BY pagamento
+"""
+
+
+def vendas_por_dia(inicio, fim):
+    """DataFrame dia/receita/unidades só com os dias que tiveram venda"""
+    return ler_df(SQL_VENDAS_POR_DIA, _periodo(inicio, fim), tabelas=TABELAS_DIARIO)
+
+
+def vendas_por_produto(inicio, fim):
+    return ler_df(SQL_VENDAS_POR_PRODUTO, _periodo(inicio, fim), tabelas=TABELAS_DIARIO)
+
+
+def vendas_por_pagamento(inicio, fim):
+    return ler_df(SQL_VENDAS_POR_PAGAMENTO, _periodo(inicio, fim), tabelas=TABELAS_DIARIO)
+
+
+def reconstruir_vendas_diarias(caminho=None):
+    """Apaga e recalcula Vendas_Diarias a partir dos pedidos, vivos e arquivados (se algo sair do eixo)"""
+    esquemas = arquivos_consultados(caminho=caminho)
+    with escrita("Vendas_Diarias", caminho=caminho, arquivos=esquemas) as conn:
+        conn.execute("DELETE FROM Vendas_Diarias")
+        _somar_fontes(conn, SQL_RECONSTRUIR_DIARIO, _CONFLITO_DIARIO, esquemas)
+
+
+# --- RANKING DE CLIENTES (Clientes_Totais / Clientes_Diario) ---
+TABELAS_RANKING = ("Clientes_Totais", "Clientes_Diario", "Pedidos", "Clientes")
+
+SQL_RANKING = """
+    SELECT Clientes.nome as Cliente, Clientes.telefone as WhatsApp,
+           t.total_gasto as Total_Gasto, t.qtd_pedidos as Qtd_Pedidos, t.ultimo_pedido as Ultimo_Pedido
+    FROM Clientes_Totais t
+    JOIN Clientes ON Clientes.id = t.id_cliente
+    ORDER BY t.total_gasto DESC
+    LIMIT ?
+"""
+
+SQL_RANKING_JANELA = """
+    SELECT Clientes.nome as Cliente, Clientes.telefone as WhatsApp,
+           SUM(b.total) as Total_Gasto, SUM(b.pedidos) as Qtd_Pedidos, MAX(b.dia) as Ultimo_Pedido
+    FROM Clientes_Diario b
+    JOIN Clientes ON Clientes.id = b.id_cliente
+    WHERE b.dia >= ?
+    GROUP BY b.id_cliente
+    ORDER BY Total_Gasto DESC
+    LIMIT ?
+"""
+
+
+def ranking_clientes(dias=None, limite=50):
+    """Top clientes por valor gasto; 'dias' limita aos últimos N dias (None = sempre)"""
+    if dias is None:
+        return ler_df(SQL_RANKING, (limite,), tabelas=TABELAS_RANKING)
+    desde = (date.today() - timedelta(days=dias - 1)).isoformat()
+    return ler_df(SQL_RANKING_JANELA, (desde, limite), tabelas=TABELAS_RANKING)
+
+
+def reconstruir_totais_clientes(caminho=None):
+    esquemas = arquivos_consultados(caminho=caminho)
+    with escrita("Clientes_Totais", "Clientes_Diario", caminho=caminho, arquivos=esquemas) as conn:
+        conn.execute("DELETE FROM Clientes_Totais")
+        conn.execute("DELETE FROM Clientes_Diario")
+        for sql, conflito in zip(SQL_RECONSTRUIR_CLIENTES, _CONFLITO_CLIENTES):
+            _somar_fontes(conn, sql, conflito, esquemas)
+        for esquema in esquemas:
+            conn.execute(no_arquivo(SQL_ULTIMO_ARQUIVADO, esquema))
+
+
+# --- CLIENTES E PRODUTOS (sempre pelo id) ---
+
+class EdicaoConcorrente(ValueError):
+    """O registro mudou (ou foi excluído) depois de ser lido: recarregue e tente de novo"""
+
+
+# Campos editáveis de cada tabela (preco em centavos)
+CAMPOS = {
+    "Clientes": ("nome", "telefone", "endereco"),
+    "Produtos": ("nome", "preco", "tamanho", "ativo"),
+}
+
+
+def _obter(tabela, id_):
+    colunas = ("id",) + CAMPOS[tabela] + ("versao", "excluido_em")
+    linhas = ler_linhas(f"SELECT {', '.join(colunas)} FROM {tabela} WHERE id = ?", (id_,), tabelas=(tabela,))
+    return dict(zip(colunas, linhas[0])) if linhas else None
+
+
+def _criar(tabela, campos):
+    colunas = [c for c in CAMPOS[tabela] if c in campos]
+    with escrita(tabela) as conn:
+        return conn.execute(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                            [campos[c] for c in colunas]).lastrowid
+
+
+def _atualizar(tabela, id_, versao, campos):
+    """UPDATE só se a versão ainda for a lida; devolve a nova versão"""
+    colunas = [c for c in CAMPOS[tabela] if c in campos]
+    atribuicoes = ", ".join(f"{c} = ?" for c in colunas + ["versao"])
+    with escrita(tabela) as conn:
+        alteradas = conn.execute(f"UPDATE {tabela} SET {atribuicoes} WHERE id = ? AND versao = ? AND excluido_em IS NULL",
+                                 [campos[c] for c in colunas] + [versao + 1, id_, versao]).rowcount
+    if not alteradas:
+        raise EdicaoConcorrente(f"O registro {id_} de {tabela} foi alterado ou excluído por outra pessoa.")
+    return versao + 1
+
+
+def _excluir(tabela, id_, versao, extra=""):
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with escrita(tabela) as conn:
+        alteradas = conn.execute(f"UPDATE {tabela} SET excluido_em = ?, versao = versao + 1{extra} WHERE id = ? AND versao = ? AND excluido_em IS NULL",
+                                 (agora, id_, versao)).rowcount
+    if not alteradas:
+        raise EdicaoConcorrente(f"O registro {id_} de {tabela} foi alterado ou excluído por outra pessoa.")
+
+
+def obter_cliente(id_cliente):
+    """dict com os campos, a versao e excluido_em (ou None se o id não existe)"""
+    return _obter("Clientes", id_cliente)
+
+
+def criar_cliente(nome, telefone="", endereco=""):
+    return _criar("Clientes", {"nome": nome, "telefone": telefone, "endereco": endereco})
+
+
+def atualizar_cliente(id_cliente, versao, **campos):
+    """Grava os campos se ninguém mexeu no cliente desde a leitura (senão EdicaoConcorrente)"""
+    return _atualizar("Clientes", id_cliente, versao, campos)
+
+
+def excluir_cliente(id_cliente, versao):
+    """Exclusão lógica: some das telas, mas os pedidos dele continuam intactos"""
+    _excluir("Clientes", id_cliente, versao)
+
+
+def obter_produto(id_produto):
+    return _obter("Produtos", id_produto)
+
+
+# Quem salva no Cardápio já deixa a foto nova pronta para as telas de venda
+def criar_produto(nome, preco, tamanho="", ativo=1):
+    id_produto = _criar("Produtos", {"nome": nome, "preco": preco, "tamanho": tamanho, "ativo": ativo})
+    foto_cardapio()
+    return id_produto
+
+
+def atualizar_produto(id_produto, versao, **campos):
+    nova_versao = _atualizar("Produtos", id_produto, versao, campos)
+    foto_cardapio()
+    return nova_versao
+
+
+def excluir_produto(id_produto, versao):
+    """Exclusão lógica; também desativa, então não pode mais ser vendido"""
+    _excluir("Produtos", id_produto, versao, extra=", ativo = 0")
+    foto_cardapio()
+
+
+def listar_produtos():
+    """Cardápio completo (ativos e inativos), sem os excluídos"""
+    return ler_df("SELECT id, nome, preco, tamanho, ativo FROM Produtos WHERE excluido_em IS NULL ORDER BY nome, tamanho",
+                  tabelas=("Produtos",))
+
+
+def cardapio(foto=None):
+    """Produtos à venda (ativos e não excluídos) como dicts, na ordem do cardápio"""
+    return [{"id": p.id, "nome": p.nome, "preco": p.preco, "tamanho": p.tamanho, "versao": p.versao}
+            for p in (foto or foto_cardapio()).produtos]
+
+
+def ultimos_clientes(limite=200):
+    return ler_df("SELECT id, nome, telefone, endereco FROM Clientes WHERE excluido_em IS NULL ORDER BY id DESC LIMIT ?",
+                  (limite,), tabelas=("Clientes",))
+
+
+# --- CARDÁPIO EM MEMÓRIA ---
+# A tela de venda monta o seletor de produtos a cada rerun (e a cada "➕ Add").
+# Em vez de consulta + laço por linha em cada sessão, todas as sessões do
+# processo usam a mesma foto imutável do cardápio ativo, com o rótulo de cada
+# produto e o dict rótulo -> produto já prontos. A foto leva a geração de
+# Produtos em que foi tirada; quando Produtos muda, a próxima leitura tira outra
+# e troca a referência de uma vez (quem está com a antiga continua com ela inteira).
+
+ProdutoCardapio = namedtuple("ProdutoCardapio", "id nome preco tamanho versao rotulo")
+
+SQL_CARDAPIO = """
+    SELECT id, nome, preco, tamanho, versao FROM Produtos
+    WHERE ativo = 1 AND excluido_em IS NULL
+    ORDER BY nome, tamanho
+"""
+
+
+class FotoCardapio:
+    """Produtos ativos num instante: a tupla na ordem do cardápio, os rótulos e os índices por rótulo e por id"""
+    __slots__ = ("geracao", "produtos", "rotulos", "por_rotulo", "por_id")
+
+    def __init__(self, geracao, linhas):
+        rotulos = {}
+        for id_, nome, preco, tamanho, versao in linhas:
+            rotulo = f"{nome} {tamanho} ({formatar_reais(preco)})" if tamanho else f"{nome} ({formatar_reais(preco)})"
+            if rotulo in rotulos:
+                rotulo = f"{rotulo} #{id_}"  # mesmo nome, tamanho e preço: o id desempata
+            rotulos[rotulo] = ProdutoCardapio(id_, nome, preco, tamanho, versao, rotulo)
+        self.geracao = geracao
+        self.produtos = tuple(rotulos.values())
+        self.rotulos = tuple(rotulos)
+        self.por_rotulo = MappingProxyType(rotulos)
+        self.por_id = MappingProxyType({p.id: p for p in self.produtos})
+
+
+_fotos_cardapio = {}  # caminho -> FotoCardapio
+
+
+def foto_cardapio(caminho=None):
+    """Foto atual do cardápio ativo; sem mudança em Produtos é só uma comparação de gerações"""
+    caminho = caminho or DB_PATH
+    _descartar_se_outro_gravou(caminho)
+    geracao = _geracao_atual(caminho, ("Produtos",))
+    foto = _fotos_cardapio.get(caminho)
+    if foto is not None and foto.geracao == geracao:
+        return foto
+    with conexao(caminho) as conn:
+        foto = FotoCardapio(geracao, conn.execute(SQL_CARDAPIO).fetchall())
+    _fotos_cardapio[caminho] = foto
+    return foto
+
+
+# --- BUSCA (seletores com digitação) ---
+
+SQL_BUSCA_CLIENTES = """
+    SELECT Clientes.id, Clientes.nome, Clientes.telefone
+    FROM Clientes_Busca
+    JOIN Clientes ON Clientes.id = Clientes_Busca.rowid
+    WHERE Clientes_Busca MATCH ? AND Clientes.excluido_em IS NULL
+    ORDER BY Clientes_Busca.rank
+    LIMIT ?
+"""
+
+SQL_BUSCA_PRODUTOS = """
+    SELECT Produtos.id, Produtos.nome, Produtos.preco, Produtos.tamanho, Produtos.ativo
+    FROM Produtos_Busca
+    JOIN Produtos ON Produtos.id = Produtos_Busca.rowid
+    WHERE Produtos_Busca MATCH ? AND Produtos.ativo >= ? AND Produtos.excluido_em IS NULL
+    ORDER BY Produtos_Busca.rank
+    LIMIT ?
+"""
+
+# Sem nada digitado: os mais recentes (pelo id, sem ler a tabela toda)
+SQL_ULTIMOS_CLIENTES = "SELECT id, nome, telefone FROM Clientes WHERE excluido_em IS NULL ORDER BY id DESC LIMIT ?"
+SQL_ULTIMOS_PRODUTOS = """
+    SELECT id, nome, preco, tamanho, ativo FROM Produtos
+    WHERE ativo >= ? AND excluido_em IS NULL ORDER BY id DESC LIMIT ?
+"""
+
+
+def termos_busca(texto):
+    """'joão 9999' -> '"joão"* "9999"*': todas as palavras, cada uma como prefixo"""
+    palavras = re.findall(r"\w+", texto or "")
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar_clientes(texto, limite=20):
+    """Até 'limite' clientes (id, nome, telefone) que batem com o texto, os mais relevantes primeiro"""
+    termos = termos_busca(texto)
+    if not termos:
+        return ler_linhas(SQL_ULTIMOS_CLIENTES, (limite,), tabelas=("Clientes",))
+    return ler_linhas(SQL_BUSCA_CLIENTES, (termos, limite), tabelas=("Clientes",))
+
+
+def buscar_produtos(texto, limite=20, so_ativos=False):
+    """Até 'limite' produtos (id, nome, preço em centavos, tamanho, ativo); so_ativos para a tela de venda"""
+    termos = termos_busca(texto)
+    minimo = 1 if so_ativos else 0
+    if not termos:
+        return ler_linhas(SQL_ULTIMOS_PRODUTOS, (minimo, limite), tabelas=("Produtos",))
+    return ler_linhas(SQL_BUSCA_PRODUTOS, (termos, minimo, limite), tabelas=("Produtos",))
+
+
+# --- VERIFICAÇÃO DOS PLANOS DE CONSULTA ---
+
+# Consultas que rodam a cada rerun; nenhuma pode varrer as tabelas que crescem
+# com o histórico (Clientes/Produtos podem ser o laço externo de um JOIN)
+TABELAS_GRANDES = ("Pedidos", "Pedidos_Itens", "Clientes_Totais", "Clientes_Diario")
+
+CONSULTAS_QUENTES = {
+    "resumo_vendas": (SQL_RESUMO_VENDAS, ("2026-01-01", "2026-02-01")),
+    "pedidos_periodo": (SQL_PEDIDOS_PERIODO, ("2026-01-01", "2026-02-01", 50, 0)),
+    "vendas_por_dia": (SQL_VENDAS_POR_DIA, ("2026-01-01", "2026-02-01")),
+    "fila_producao": (SQL_FILA_PRODUCAO.format(marcas="?,?,?"), ("Pendente", "Em Produção", "Pronto", "2026-01-01", "2026-03-01", 50, 0)),
+    "plano_producao": (SQL_PLANO_PRODUCAO.format(marcas="?,?,?"), ("Pendente", "Em Produção", "Pronto", "2026-01-01", "2026-03-01")),
+    "conta_fila": (SQL_CONTA_FILA.format(marcas="?,?,?"), ("Pendente", "Em Produção", "Pronto", "2026-01-01", "2026-03-01")),
+    "ranking": (SQL_RANKING, (50,)),
+    "ranking_janela": (SQL_RANKING_JANELA, ("2026-01-01", 50)),
+    "itens_pedido": (SQL_ITENS_PEDIDO, (1,)),
+    "carga_periodo": (SQL_CARGA_PERIODO, ("2026-01-01", "2026-02-01")),
+    "reconstruir_carga": (SQL_RECONSTRUIR_CARGA, ("2026-01-01", "2026-02-01")),
+    "busca_clientes": (SQL_BUSCA_CLIENTES, ('"ana"*', 20)),
+    "ultimos_clientes": (SQL_ULTIMOS_CLIENTES, (20,)),
+}
+
+
+def verificar_planos(caminho=None):
+    """Roda EXPLAIN QUERY PLAN nas consultas quentes e devolve os passos ruins:
+    SCAN sem índice numa tabela grande ou ordenação em árvore temporária
+    (ordenar o resultado de um GROUP BY é aceito: são só as linhas já agregadas;
+    idem quando a busca tem início e fim, como a janela de entrega da produção)."""
+    problemas = []
+    with conexao(caminho) as conn:
+        for nome, (sql, params) in CONSULTAS_QUENTES.items():
+            passos = [linha[3] for linha in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            agrega = "GROUP BY" in sql.upper()
+            limitada = any(">?" in passo and "<?" in passo for passo in passos)
+            for detalhe in passos:
+                partes = detalhe.split()
+                varredura = (partes[0] == "SCAN" and partes[1] in TABELAS_GRANDES
+                             and "INDEX" not in detalhe)
+                ordena = "TEMP B-TREE" in detalhe and "ORDER BY" in detalhe and not (agrega or limitada)
+                if varredura or ordena:
+                    problemas.append((nome, detalhe))
+    return problemas
+
+
+if __name__ == "__main__":
+    # python funcoes_db.py [arquivo.db] -> migra e confere os planos das consultas
+    if len(sys.argv) > 1:
+        configurar(sys.argv[1])
+    migrar()
+    print(f"Esquema na versão {versao_esquema()}")
+    falhas = verificar_planos()
+    for nome, detalhe in falhas:
+        print(f"❌ {nome}: {detalhe}")
+    if falhas:
+        sys.exit(1)
+    print("✅ Nenhuma consulta quente varre Pedidos/Pedidos_Itens sem índice.")
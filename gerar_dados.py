@@ -0,0 +1,109 @@
+"""Gera dados sintéticos (sempre os mesmos para a mesma semente) para testar o sistema em escala.
+
+Uso: python gerar_dados.py banco.db [--clientes 50000] [--produtos 500] [--itens 1000000] [--anos 3] [--semente 42]
+
+Os pedidos são inseridos pelas tabelas normais, então os gatilhos mantêm os
+resumos (Vendas_Diarias, Clientes_Totais) como no uso real.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import funcoes_db
+
+SABORES = ["Chocolate", "Cenoura", "Ninho", "Morango", "Limão", "Coco", "Red Velvet", "Prestígio",
+           "Doce de Leite", "Abacaxi", "Maracujá", "Nozes", "Brigadeiro", "Laranja", "Fubá"]
+TAMANHOS = {"P": 35.0, "M": 55.0, "G": 80.0}  # preço base em reais
+PAGAMENTOS = ["Pix", "Dinheiro", "Cartão"]
+PESOS_PAGAMENTO = [6, 1, 3]
+STATUS_ABERTOS = ["Pendente", "Em Produção", "Pronto"]
+LOTE = 10000  # pedidos por transação
+
+
+def _clientes(aleatorio, quantidade):
+    for i in range(quantidade):
+        yield (f"Cliente {i + 1}", f"11{900000000 + i}", f"Rua {aleatorio.randint(1, 999)}, {aleatorio.randint(1, 2000)}")
+
+
+def _produtos(aleatorio, quantidade):
+    for i in range(quantidade):
+        tamanho = aleatorio.choice(list(TAMANHOS))
+        preco = round(TAMANHOS[tamanho] * aleatorio.uniform(0.8, 1.4) * 100)  # centavos
+        ativo = 1 if aleatorio.random() < 0.9 else 0
+        yield (f"{aleatorio.choice(SABORES)} {i + 1}", preco, tamanho, ativo)
+
+
+def _pedidos(aleatorio, itens, clientes, precos, anos, hoje):
+    """Gera (pedido, [itens]) até somar 'itens' itens, com as datas espalhadas pelos anos"""
+    segundos = int(anos * 365 * 86400)
+    inicio = datetime.combine(hoje, datetime.min.time()) - timedelta(seconds=segundos)
+    id_pedido = 0
+    while itens > 0:
+        id_pedido += 1
+        venda = inicio + timedelta(seconds=aleatorio.randrange(segundos))
+        entrega = venda.date() + timedelta(days=aleatorio.randint(0, 7))
+        status = "Entregue" if entrega < hoje else aleatorio.choice(STATUS_ABERTOS)
+        # Poucos clientes concentram a maior parte das compras, como na vida real
+        id_cliente = 1 + int(clientes * aleatorio.random() ** 3)
+        linhas = []
+        for _ in range(min(itens, aleatorio.randint(1, 4))):
+            id_produto = aleatorio.randrange(len(precos)) + 1
+            quantidade = aleatorio.randint(1, 3)
+            preco = precos[id_produto - 1]
+            linhas.append((id_pedido, id_produto, preco, quantidade, preco * quantidade))
+        itens -= len(linhas)
+        # valor_total fica de fora: os gatilhos somam os itens no pedido
+        pedido = (id_pedido, venda.strftime("%Y-%m-%d %H:%M:%S"), entrega.isoformat(), id_cliente,
+                  aleatorio.choices(PAGAMENTOS, PESOS_PAGAMENTO)[0], "", status)
+        yield pedido, linhas
+
+
+def gerar(caminho, clientes=50000, produtos=500, itens=1000000, anos=3, semente=42, hoje=None):
+    """Cria o banco em 'caminho' (que deve estar vazio) e devolve as contagens geradas"""
+    aleatorio = random.Random(semente)
+    hoje = hoje or date.today()
+    funcoes_db.migrar(caminho)
+    with funcoes_db.escrita("Clientes", "Produtos", caminho=caminho) as conn:
+        if conn.execute("SELECT EXISTS (SELECT 1 FROM Pedidos)").fetchone()[0]:
+            raise ValueError(f"{caminho} já tem pedidos; gere os dados num banco novo.")
+        conn.executemany("INSERT INTO Clientes (nome, telefone, endereco) VALUES (?,?,?)", _clientes(aleatorio, clientes))
+        conn.executemany("INSERT INTO Produtos (nome, preco, tamanho, ativo) VALUES (?,?,?,?)", _produtos(aleatorio, produtos))
+        precos = [preco for (preco,) in conn.execute("SELECT preco FROM Produtos ORDER BY id")]
+
+    total_pedidos = 0
+    gerador = _pedidos(aleatorio, itens, clientes, precos, anos, hoje)
+    while True:
+        lote = [p for _, p in zip(range(LOTE), gerador)]
+        if not lote:
+            break
+        with funcoes_db.escrita("Pedidos", "Pedidos_Itens", caminho=caminho) as conn:
+            conn.executemany("INSERT INTO Pedidos (id, data_venda, data_entrega, id_cliente, pagamento, observacoes, status) VALUES (?,?,?,?,?,?,?)",
+                             [pedido for pedido, _ in lote])
+            conn.executemany("INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (?,?,?,?,?)",
+                             [linha for _, linhas in lote for linha in linhas])
+        total_pedidos += len(lote)
+
+    with funcoes_db.conexao(caminho) as conn:
+        conn.execute("ANALYZE")
+    return {"clientes": clientes, "produtos": produtos, "pedidos": total_pedidos, "itens": itens}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para testes de escala.")
+    parser.add_argument("banco")
+    parser.add_argument("--clientes", type=int, default=50000)
+    parser.add_argument("--produtos", type=int, default=500)
+    parser.add_argument("--itens", type=int, default=1000000)
+    parser.add_argument("--anos", type=float, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    try:
+        contagens = gerar(args.banco, args.clientes, args.produtos, args.itens, args.anos, args.semente)
+    except ValueError as erro:
+        print(f"❌ {erro}")
+        sys.exit(1)
+    print(f"✅ {contagens} em {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,297 @@
+"""Importação em massa de clientes, produtos e pedidos antigos a partir de CSV.
+
+O arquivo é lido em blocos (TAMANHO_BLOCO linhas) e cada bloco é gravado numa
+transação, então planilhas grandes não ficam inteiras na memória.
+Aceita ';' ou ',' como separador e o relatorio_vendas.csv gerado pela exportação.
+"""
+import csv
+import io
+import re
+import sqlite3
+import time
+import unicodedata
+from datetime import datetime
+from itertools import islice
+
+import funcoes_db
+
+TAMANHO_BLOCO = 1000
+
+TIPOS = {
+    "clientes": "Clientes (nome; telefone; endereço)",
+    "produtos": "Produtos (nome; preço; tamanho; ativo)",
+    "pedidos": "Pedidos (formato do relatorio_vendas.csv)",
+}
+
+
+class ResultadoImportacao:
+    """Contadores e erros de uma importação (erros = lista de (nº da linha, mensagem))"""
+
+    def __init__(self):
+        self.gravados = 0
+        self.ignorados = 0
+        self.erros = []
+        self.linhas = 0
+        self.segundos = 0.0
+
+    @property
+    def linhas_por_segundo(self):
+        return self.linhas / self.segundos if self.segundos else 0.0
+
+    def resumo(self):
+        return (f"{self.linhas} linhas lidas em {self.segundos:.1f}s ({self.linhas_por_segundo:.0f} linhas/s): "
+                f"{self.gravados} gravadas, {self.ignorados} já existiam, {len(self.erros)} com erro")
+
+
+# --- NORMALIZAÇÃO ---
+
+def _chave_coluna(nome):
+    sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z]", "", sem_acento.lower())
+
+
+def normalizar_telefone(texto):
+    """Só os dígitos, sem o +55; None se não tiver DDD + 8 ou 9 dígitos"""
+    digitos = re.sub(r"\D", "", texto or "")
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    return digitos if len(digitos) in (10, 11) else None
+
+
+def normalizar_preco(texto):
+    """Aceita '45.50', '45,5', 'R$ 1.234,56' e devolve centavos; ValueError se não for um valor >= 0"""
+    valor = re.sub(r"[^\d,.\-]", "", str(texto))
+    if "," in valor and "." in valor:
+        # O último separador é o decimal
+        if valor.rfind(",") > valor.rfind("."):
+            valor = valor.replace(".", "").replace(",", ".")
+        else:
+            valor = valor.replace(",", "")
+    elif "," in valor:
+        valor = valor.replace(",", ".")
+    elif valor.count(".") > 1:
+        valor = valor.replace(".", "")
+    try:
+        preco = funcoes_db.centavos(valor)
+    except ArithmeticError:
+        raise ValueError(f"preço inválido: {texto!r}")
+    if preco < 0:
+        raise ValueError("preço negativo")
+    return preco
+
+
+# --- LEITURA EM BLOCOS ---
+
+def _abrir_texto(arquivo):
+    """Aceita caminho, arquivo binário (upload do Streamlit) ou arquivo texto"""
+    if isinstance(arquivo, str):
+        return open(arquivo, encoding="utf-8-sig", newline="")
+    if isinstance(arquivo, io.TextIOBase):
+        return arquivo
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+
+
+def _blocos(texto):
+    """Gera (colunas, [(nº linha, dict), ...]) de TAMANHO_BLOCO em TAMANHO_BLOCO"""
+    primeira = texto.readline()
+    separador = ";" if primeira.count(";") >= primeira.count(",") else ","
+    colunas = [_chave_coluna(c) for c in next(csv.reader([primeira], delimiter=separador))]
+    leitor = csv.reader(texto, delimiter=separador)
+    numero = 1
+    while True:
+        bloco = []
+        for valores in islice(leitor, TAMANHO_BLOCO):
+            numero += 1
+            if any(v.strip() for v in valores):
+                bloco.append((numero, dict(zip(colunas, (v.strip() for v in valores)))))
+        if not bloco:
+            break
+        yield colunas, bloco
+
+
+def _campo(linha, *nomes):
+    for nome in nomes:
+        if linha.get(nome):
+            return linha[nome]
+    return ""
+
+
+# --- CLIENTES ---
+
+def _clientes_existentes(conn):
+    """Clientes não excluídos: por telefone e, os sem telefone válido, pelo nome"""
+    telefones, sem_telefone = {}, set()
+    for id_cliente, nome, telefone in conn.execute("SELECT id, nome, telefone FROM Clientes WHERE excluido_em IS NULL"):
+        numero = normalizar_telefone(telefone)
+        if numero:
+            telefones.setdefault(numero, id_cliente)
+        else:
+            sem_telefone.add((nome or "").lower())
+    return telefones, sem_telefone
+
+
+def _importar_clientes(blocos, resultado, caminho):
+    """Telefone válido identifica o cliente; planilha antiga sem telefone (ou com um
+    inválido) também entra, e aí quem decide se já existe é o nome"""
+    with funcoes_db.conexao(caminho) as conn:
+        telefones, sem_telefone = _clientes_existentes(conn)
+    for _, bloco in blocos:
+        novos = []
+        for numero, linha in bloco:
+            resultado.linhas += 1
+            nome = _campo(linha, "nome", "cliente")
+            texto_telefone = _campo(linha, "telefone", "whatsapp", "celular")
+            telefone = normalizar_telefone(texto_telefone)
+            ja_existe = telefone in telefones if telefone else nome.lower() in sem_telefone
+            if not nome:
+                resultado.erros.append((numero, "nome vazio"))
+            elif ja_existe:
+                resultado.ignorados += 1
+            else:
+                if telefone:
+                    telefones[telefone] = None
+                else:
+                    sem_telefone.add(nome.lower())
+                # Telefone inválido fica como veio (não se perde), só não serve para achar o cliente
+                novos.append((nome, telefone or texto_telefone or None, _campo(linha, "endereco")))
+        if novos:
+            with funcoes_db.escrita("Clientes", caminho=caminho) as conn:
+                conn.executemany("INSERT INTO Clientes (nome, telefone, endereco) VALUES (?,?,?)", novos)
+            resultado.gravados += len(novos)
+
+
+# --- PRODUTOS ---
+
+def _importar_produtos(blocos, resultado, caminho):
+    with funcoes_db.conexao(caminho) as conn:
+        existentes = {(n.lower(), (t or "").lower())
+                      for n, t in conn.execute("SELECT nome, tamanho FROM Produtos WHERE excluido_em IS NULL")}
+    for _, bloco in blocos:
+        novos = []
+        for numero, linha in bloco:
+            resultado.linhas += 1
+            nome, tamanho = _campo(linha, "nome", "bolo", "produto"), _campo(linha, "tamanho")
+            try:
+                preco = normalizar_preco(_campo(linha, "preco", "valor"))
+            except ValueError:
+                resultado.erros.append((numero, f"preço inválido: {_campo(linha, 'preco', 'valor')!r}"))
+                continue
+            if not nome:
+                resultado.erros.append((numero, "nome vazio"))
+            elif (nome.lower(), tamanho.lower()) in existentes:
+                resultado.ignorados += 1
+            else:
+                existentes.add((nome.lower(), tamanho.lower()))
+                ativo = 0 if _campo(linha, "ativo").lower() in ("0", "nao", "não", "n", "false") else 1
+                novos.append((nome, preco, tamanho, ativo))
+        if novos:
+            with funcoes_db.escrita("Produtos", caminho=caminho) as conn:
+                conn.executemany("INSERT INTO Produtos (nome, preco, tamanho, ativo) VALUES (?,?,?,?)", novos)
+            resultado.gravados += len(novos)
+
+
+# --- PEDIDOS (relatorio_vendas.csv) ---
+
+def _ids_por_nome(conn, tabela, nomes, criar_sql, criar_params):
+    """Procura pelo nome (sem diferenciar maiúsculas) entre os não excluídos; cria o que não existir"""
+    ids = {}
+    for id_, nome in conn.execute(f"SELECT id, nome FROM {tabela} WHERE excluido_em IS NULL"):
+        ids.setdefault((nome or "").lower(), id_)
+    for nome in nomes:
+        if nome.lower() not in ids:
+            ids[nome.lower()] = conn.execute(criar_sql, criar_params(nome)).lastrowid
+    return ids
+
+
+def _importar_pedidos(blocos, resultado, caminho):
+    """Cada 'ID Pedido' do relatório vira um pedido 'Entregue' com os preços da época.
+
+    As linhas de um mesmo pedido precisam estar juntas (como a exportação gera).
+    A chave de idempotência vem do ID e da data, então importar o mesmo arquivo
+    duas vezes não duplica nada.
+    """
+    aberto = None  # pedido em montagem; pode continuar no bloco seguinte
+    for _, bloco in blocos:
+        prontos = []
+        for numero, linha in bloco:
+            resultado.linhas += 1
+            try:
+                id_origem = int(_campo(linha, "idpedido"))
+                quantidade = int(_campo(linha, "qtd", "quantidade"))
+                preco = normalizar_preco(_campo(linha, "precounit", "valorunit"))
+                total = normalizar_preco(_campo(linha, "totalitem")) if _campo(linha, "totalitem") else preco * quantidade
+                data = _campo(linha, "data")
+                datetime.strptime(data[:10], "%Y-%m-%d")
+            except ValueError as erro:
+                resultado.erros.append((numero, f"valor inválido: {erro}"))
+                continue
+            if abs(total - preco * quantidade) > 1:  # tolera 1 centavo de arredondamento da planilha
+                resultado.erros.append((numero, f"Total Item {funcoes_db.formatar_reais(total)} diferente de Qtd x Preço Unit."))
+                continue
+            if aberto is None or aberto["origem"] != (id_origem, data):
+                if aberto is not None:
+                    prontos.append(aberto)
+                aberto = {"origem": (id_origem, data), "cliente": _campo(linha, "cliente") or "(sem nome)",
+                          "linhas": [], "itens": []}
+            aberto["linhas"].append(numero)
+            aberto["itens"].append((_campo(linha, "bolo", "produto") or "(sem nome)", quantidade, preco))
+        _gravar_pedidos(prontos, resultado, caminho)
+    if aberto is not None:
+        _gravar_pedidos([aberto], resultado, caminho)
+
+
+def _gravar_pedidos(pedidos, resultado, caminho):
+    if not pedidos:
+        return
+    for p in pedidos:
+        p["chave"] = "relatorio:%s:%s" % p["origem"]
+    # Vale também para os pedidos já arquivados: reimportar um relatório antigo não os traz de volta
+    existentes = funcoes_db.chaves_gravadas([p["chave"] for p in pedidos], caminho)
+    resultado.ignorados += sum(len(p["itens"]) for p in pedidos if p["chave"] in existentes)
+    pedidos = [p for p in pedidos if p["chave"] not in existentes]
+    if not pedidos:
+        return
+    # Clientes e bolos novos entram na mesma transação dos pedidos: se o lote
+    # falhar, não sobra cliente ou produto criado para um pedido que não foi gravado
+    try:
+        with funcoes_db.escrita("Clientes", "Produtos", "Pedidos", "Pedidos_Itens", caminho=caminho) as conn:
+            clientes = _ids_por_nome(conn, "Clientes", {p["cliente"] for p in pedidos},
+                                     "INSERT INTO Clientes (nome) VALUES (?)", lambda nome: (nome,))
+            # Bolos que não estão no cardápio entram inativos, com o último preço visto
+            precos = {bolo: preco for p in pedidos for bolo, _, preco in p["itens"]}
+            produtos = _ids_por_nome(conn, "Produtos", set(precos),
+                                     "INSERT INTO Produtos (nome, preco, ativo) VALUES (?, ?, 0)",
+                                     lambda nome: (nome, precos[nome]))
+            lote = []
+            for p in pedidos:
+                data = p["origem"][1]
+                lote.append({
+                    "id_cliente": clientes[p["cliente"].lower()],
+                    "itens": [(produtos[bolo.lower()], qtd, preco) for bolo, qtd, preco in p["itens"]],
+                    "data_venda": data, "data_entrega": data[:10], "status": "Entregue",
+                    "chave": p["chave"],
+                })
+            funcoes_db.gravar_pedidos_em_lote(conn, lote)
+        resultado.gravados += sum(len(p["itens"]) for p in pedidos)
+    except (funcoes_db.PedidoInvalido, sqlite3.Error) as erro:
+        for p in pedidos:
+            resultado.erros.append((p["linhas"][0], f"pedido {p['origem'][0]} não gravado: {erro}"))
+
+
+IMPORTADORES = {"clientes": _importar_clientes, "produtos": _importar_produtos, "pedidos": _importar_pedidos}
+
+
+def importar(tipo, arquivo, caminho=None):
+    """Importa um CSV ('clientes', 'produtos' ou 'pedidos'); devolve ResultadoImportacao"""
+    resultado = ResultadoImportacao()
+    inicio = time.perf_counter()
+    texto = _abrir_texto(arquivo)
+    try:
+        IMPORTADORES[tipo](_blocos(texto), resultado, caminho)
+    finally:
+        if isinstance(arquivo, str):
+            texto.close()
+        elif isinstance(texto, io.TextIOWrapper) and texto is not arquivo:
+            texto.detach()
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -1,63 +1,19 @@
 import os
-import sqlite3
-import csv
 from datetime import datetime
+import funcoes_db
+import exportacao
+import importacao
+from funcoes_db import conexao
 
 # --- CONFIGURAÇÃO DO BANCO ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "banco_dados.db")
-
-def conectar():
-    return sqlite3.connect(DB_PATH)
+funcoes_db.configurar(DB_PATH)
 
 def inicializar_banco():
     """Garante que todas as tabelas existam ao iniciar o programa"""
-    conn = conectar()
-    cursor = conn.cursor()
-    
-    # Tabela Clientes
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Clientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            telefone TEXT,
-            endereco TEXT
-        )
-    """)
-    # Tabela Produtos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Produtos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            preco REAL NOT NULL,
-            tamanho TEXT
-        )
-    """)
-    # Tabela Pedidos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Pedidos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT NOT NULL,
-            id_cliente INTEGER NOT NULL,
-            valor_total REAL NOT NULL,
-            FOREIGN KEY (id_cliente) REFERENCES Clientes (id)
-        )
-    """)
-    # Tabela Pedidos_Itens
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Pedidos_Itens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_pedido INTEGER NOT NULL,
-            id_produto INTEGER NOT NULL,
-            valor_unitario REAL NOT NULL,
-            quantidade INTEGER NOT NULL,
-            total REAL NOT NULL,
-            FOREIGN KEY (id_pedido) REFERENCES Pedidos (id),
-            FOREIGN KEY (id_produto) REFERENCES Produtos (id)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    # Mesmo esquema do app.py (coluna 'data' antiga vira 'data_venda' na migração)
+    funcoes_db.migrar()
 
 # --- FUNÇÕES DE CADASTRO ---
 
@@ -67,60 +23,49 @@ def cadastrar_cliente():
     telefone = input("Telefone: ")
     endereco = input("Endereço: ") # Agora pedimos o endereço!
     
-    conn = conectar()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO Clientes (nome, telefone, endereco) VALUES (?, ?, ?)", 
-                   (nome, telefone, endereco))
-    conn.commit()
-    conn.close()
+    funcoes_db.criar_cliente(nome, telefone, endereco)
     print(f"✅ Cliente {nome} cadastrado!")
 
 def cadastrar_produto():
     print("\n--- NOVO PRODUTO ---")
     nome = input("Nome do Bolo: ")
-    preco = float(input("Preço (ex: 45.50): "))
+    try:
+        preco = funcoes_db.centavos(input("Preço (ex: 45.50): ").replace(",", "."))
+    except ArithmeticError:
+        print("❌ Preço inválido!")
+        return
     tamanho = input("Tamanho: ")
     
-    conn = conectar()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO Produtos (nome, preco, tamanho) VALUES (?, ?, ?)", 
-                   (nome, preco, tamanho))
-    conn.commit()
-    conn.close()
+    funcoes_db.criar_produto(nome, preco, tamanho)
     print(f"✅ Produto {nome} cadastrado!")
 
 def ver_cardapio():
-    conn = conectar()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM Produtos")
-    produtos = cursor.fetchall()
-    conn.close()
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nome, preco, tamanho FROM Produtos WHERE excluido_em IS NULL")
+        produtos = cursor.fetchall()
     
     print("\n--- CARDÁPIO ---")
     for p in produtos:
-        print(f"ID: {p[0]} | {p[1]} ({p[3]}) - R$ {p[2]:.2f}")
+        print(f"ID: {p[0]} | {p[1]} ({p[3]}) - {funcoes_db.formatar_reais(p[2])}")
     print("----------------")
 
 # --- FUNÇÃO DE VENDA ---
 
-def nova_venda():
-    conn = conectar()
-    cursor = conn.cursor()
 def relatorio_vendas():
-    conn = conectar()
-    cursor = conn.cursor()
-    
     # O comando JOIN abaixo é o segredo. Ele busca o NOME na tabela Clientes
-    # usando o ID que estava gravado na tabela Pedidos.
+    # usando o ID que estava gravado na tabela Pedidos. Os pedidos arquivados
+    # entram junto (um SELECT por arquivo, unidos com UNION ALL).
     sql = """
-    SELECT Pedidos.id, Pedidos.data, Clientes.nome, Pedidos.valor_total
+    SELECT Pedidos.id, Pedidos.data_venda, Clientes.nome, Pedidos.valor_total
     FROM Pedidos
     JOIN Clientes ON Pedidos.id_cliente = Clientes.id
-    ORDER BY Pedidos.id DESC
     """
-    cursor.execute(sql)
-    vendas = cursor.fetchall()
-    conn.close()
+    sql, params = funcoes_db.em_cada_fonte(sql, funcoes_db.arquivos_consultados(), ())
+    sql += "\nORDER BY 1 DESC"
+    with conexao() as conn:
+        funcoes_db.anexar_arquivos(conn, sql)
+        vendas = conn.execute(sql, params).fetchall()
     
     print("\n--- 💰 RELATÓRIO DE VENDAS ---")
     if not vendas:
@@ -130,216 +75,189 @@ def relatorio_vendas():
         # v[0]=ID, v[1]=Data, v[2]=Nome Cliente, v[3]=Total
         print(f"Pedido #{v[0]} | Data: {v[1]}")
         print(f"Cliente: {v[2]}")
-        print(f"Total: R$ {v[3]:.2f}")
+        print(f"Total: {funcoes_db.formatar_reais(v[3])}")
         print("-" * 30)
 
 def nova_venda():
-    conn = conectar()
-    cursor = conn.cursor()
-    
-    # 1. Escolher Cliente
-    print("\n--- PASSO 1: Selecione o Cliente ---")
-    cursor.execute("SELECT id, nome FROM Clientes")
-    clientes = cursor.fetchall()
-    for c in clientes:
-        print(f"ID: {c[0]} | Nome: {c[1]}")
-    
-    try:
-        id_cliente = int(input("Digite o ID do cliente: "))
-    except ValueError:
-        print("❌ ID inválido!")
-        return
+    with conexao() as conn:
+        cursor = conn.cursor()
+    
+        # 1. Escolher Cliente
+        print("\n--- PASSO 1: Selecione o Cliente ---")
+        cursor.execute("SELECT id, nome FROM Clientes WHERE excluido_em IS NULL")
+        clientes = cursor.fetchall()
+        for c in clientes:
+            print(f"ID: {c[0]} | Nome: {c[1]}")
+    
+        try:
+            id_cliente = int(input("Digite o ID do cliente: "))
+        except ValueError:
+            print("❌ ID inválido!")
+            return
+        if id_cliente not in {c[0] for c in clientes}:
+            print("❌ Cliente não encontrado!")
+            return
 
-    # 2. Criar Pedido
-    data_hoje = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO Pedidos (data, id_cliente, valor_total) VALUES (?, ?, ?)", 
-                   (data_hoje, id_cliente, 0))
-    conn.commit()
-    id_pedido = cursor.lastrowid 
-    print(f"✅ Pedido #{id_pedido} iniciado!")
+        cursor.execute("SELECT id, nome, preco FROM Produtos WHERE ativo = 1")
+        produtos = cursor.fetchall()
+    precos = {p[0]: p[2] for p in produtos}
 
-    # 3. Adicionar Produtos
-    valor_total_pedido = 0.0
+    # 2. Adicionar Produtos (só na memória; nada é gravado até finalizar)
+    itens = []
+    valor_total_pedido = 0  # em centavos: a soma é exata
 
     while True:
         print("\n--- PASSO 2: Adicionar Produto ---")
-        cursor.execute("SELECT id, nome, preco FROM Produtos")
-        produtos = cursor.fetchall()
         for p in produtos:
-            print(f"ID: {p[0]} | {p[1]} - R$ {p[2]:.2f}")
+            print(f"ID: {p[0]} | {p[1]} - {funcoes_db.formatar_reais(p[2])}")
             
         opcao_prod = input("Digite o ID do produto (ou '0' para encerrar): ")
         if opcao_prod == '0':
             break
 
-        cursor.execute("SELECT preco FROM Produtos WHERE id = ?", (opcao_prod,))
-        resultado = cursor.fetchone()
-        
-        if resultado:
-            preco = resultado[0]
+        try:
+            id_produto = int(opcao_prod)
+            if id_produto not in precos:
+                print("❌ Produto não encontrado.")
+                continue
             qtd = int(input(f"Quantidade: "))
-            total_item = preco * qtd
-            
-            cursor.execute("""
-                INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total)
-                VALUES (?, ?, ?, ?, ?)
-            """, (id_pedido, opcao_prod, preco, qtd, total_item))
-            
-            valor_total_pedido += total_item
-            print(f"➕ Item adicionado! Subtotal: R$ {valor_total_pedido:.2f}")
-        else:
-            print("❌ Produto não encontrado.")
+        except ValueError:
+            print("❌ Valor inválido!")
+            continue
+        if qtd <= 0:
+            print("❌ Quantidade inválida!")
+            continue
 
-    
-    def ver_detalhes_pedido():
-     conn = conectar()
-    cursor = conn.cursor()
-    
-    id_pedido = input("\nDigite o número do Pedido para ver os itens: ")
-    
-    # Busca o cabeçalho (Quem comprou)
-    cursor.execute("""
-        SELECT Clientes.nome, Pedidos.data 
-        FROM Pedidos 
-        JOIN Clientes ON Pedidos.id_cliente = Clientes.id
-        WHERE Pedidos.id = ?
-    """, (id_pedido,))
-    pedido = cursor.fetchone()
-    
-    if not pedido:
-        print("❌ Pedido não encontrado.")
-        conn.close()
+        itens.append((id_produto, qtd))
+        valor_total_pedido += precos[id_produto] * qtd
+        print(f"➕ Item adicionado! Subtotal: {funcoes_db.formatar_reais(valor_total_pedido)}")
+
+    if not itens:
+        print("❌ Nenhum produto adicionado. Venda cancelada.")
         return
 
-    print(f"\n--- 🎂 ITENS DO PEDIDO #{id_pedido} ---")
-    print(f"Cliente: {pedido[0]} | Data: {pedido[1]}")
-    print("-" * 40)
-    
-    # Busca os itens (Quais bolos)
-    # Aqui fazemos o JOIN entre 'Pedidos_Itens' e 'Produtos'
-    cursor.execute("""
-        SELECT Produtos.nome, Pedidos_Itens.quantidade, Pedidos_Itens.valor_unitario, Pedidos_Itens.total
-        FROM Pedidos_Itens
-        JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
-        WHERE Pedidos_Itens.id_pedido = ?
-    """, (id_pedido,))
-    
-    itens = cursor.fetchall()
-    
-    for item in itens:
-        # item[0]=Nome Bolo, item[1]=Qtd, item[2]=Preço Unit, item[3]=Total Item
-        print(f"{item[1]}x {item[0]:<20} | R$ {item[3]:.2f}")
-    
-    print("-" * 40)
-    conn.close()
-    
-    
-    
-    
-    # 4. Finalizar
-    cursor.execute("UPDATE Pedidos SET valor_total = ? WHERE id = ?", (valor_total_pedido, id_pedido))
-    conn.commit()
-    conn.close()
+    # 3. Finalizar: cabeçalho e itens numa transação só
+    try:
+        id_pedido, valor_total_pedido = funcoes_db.registrar_pedido(id_cliente, itens)
+    except funcoes_db.PedidoInvalido as erro:
+        print(f"❌ {erro}")
+        return
     
     print("---------------------------------------------")
     print(f"🎉 Venda Finalizada! Pedido #{id_pedido}")
-    print(f"💰 Valor Final: R$ {valor_total_pedido:.2f}")
+    print(f"💰 Valor Final: {funcoes_db.formatar_reais(valor_total_pedido)}")
     print("---------------------------------------------")
 
 def ver_detalhes_pedido():
-    conn = conectar()
-    cursor = conn.cursor()
-    
     print("\n--- 📋 DETALHES DO PEDIDO ---")
     try:
         id_pedido = int(input("Digite o ID do pedido: "))
     except ValueError:
         print("❌ ID inválido!")
         return
-    
-    cursor.execute("""
-        SELECT Pedidos.id, Pedidos.data, Clientes.nome, Pedidos.valor_total
-        FROM Pedidos
-        JOIN Clientes ON Pedidos.id_cliente = Clientes.id
-        WHERE Pedidos.id = ?
-    """, (id_pedido,))
-    
-    pedido = cursor.fetchone()
-    
+
+    # obter_pedido também procura nos arquivos (pedidos de anos anteriores)
+    pedido = funcoes_db.obter_pedido(id_pedido)
+
     if not pedido:
         print("❌ Pedido não encontrado.")
-        conn.close()
         return
-    
-    print(f"\nPedido #{pedido[0]} | Data: {pedido[1]}")
-    print(f"Cliente: {pedido[2]}")
-    print(f"Total: R$ {pedido[3]:.2f}")
+
+    cliente = funcoes_db.obter_cliente(pedido["id_cliente"])
+    print(f"\nPedido #{pedido['id']} | Data: {pedido['data_venda']}")
+    print(f"Cliente: {cliente['nome'] if cliente else pedido['id_cliente']}")
+    print(f"Total: {funcoes_db.formatar_reais(pedido['valor_total'])}")
     print("\n--- ITENS DO PEDIDO ---")
+
+    for item in pedido["itens"]:
+        print(f"{item['nome']} | Qtd: {item['quantidade']} | {funcoes_db.formatar_reais(item['valor_unitario'])} un. | Subtotal: {funcoes_db.formatar_reais(item['total'])}")
     
-    cursor.execute("""
-        SELECT Produtos.nome, Pedidos_Itens.quantidade, Pedidos_Itens.valor_unitario, Pedidos_Itens.total
-        FROM Pedidos_Itens
-        JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
-        WHERE Pedidos_Itens.id_pedido = ?
-    """, (id_pedido,))
-    
-    itens = cursor.fetchall()
-    
-    for item in itens:
-        print(f"{item[0]} | Qtd: {item[1]} | R$ {item[2]:.2f} un. | Subtotal: R$ {item[3]:.2f}")
-    
-    conn.close()
+
+def plano_producao():
+    print("\n--- 🧁 PLANO DE PRODUÇÃO ---")
+    hoje = datetime.now().date()
+    try:
+        texto = input(f"Entregas de (DD/MM/AAAA) [{hoje:%d/%m/%Y}]: ").strip()
+        inicio = datetime.strptime(texto, "%d/%m/%Y").date() if texto else hoje
+        texto = input(f"Até (DD/MM/AAAA) [{inicio:%d/%m/%Y}]: ").strip()
+        fim = datetime.strptime(texto, "%d/%m/%Y").date() if texto else inicio
+    except ValueError:
+        print("❌ Data inválida!")
+        return
+
+    # Uma consulta agrupada para o período inteiro, em vez de abrir pedido por pedido
+    folha = funcoes_db.folha_producao(inicio, fim)
+    print("\n" + folha)
+    if input("\nSalvar para imprimir? (s/n): ").strip().lower() == "s":
+        nome_arquivo = f"plano_producao_{inicio:%Y%m%d}_{fim:%Y%m%d}.txt"
+        with open(os.path.join(BASE_DIR, nome_arquivo), "w", encoding="utf-8") as arquivo:
+            arquivo.write(folha + "\n")
+        print(f"✅ Arquivo '{nome_arquivo}' criado na pasta do projeto!")
+
 
 def exportar_para_excel():
-    print("\n--- GERANDO RELATÓRIO EXCEL (CSV) ---")
-    conn = conectar()
-    cursor = conn.cursor()
-    
-    # Vamos pegar uma visão completa: Venda, Data, Cliente e Itens
-    # Aqui usamos um JOIN duplo para trazer o nome do cliente E o nome do produto
-    sql = """
-    SELECT 
-        Pedidos.id as 'ID Pedido',
-        Pedidos.data as 'Data',
-        Clientes.nome as 'Cliente',
-        Produtos.nome as 'Bolo',
-        Pedidos_Itens.quantidade as 'Qtd',
-        Pedidos_Itens.valor_unitario as 'Valor Unit.',
-        Pedidos_Itens.total as 'Total Item'
-    FROM Pedidos_Itens
-    JOIN Pedidos ON Pedidos_Itens.id_pedido = Pedidos.id
-    JOIN Clientes ON Pedidos.id_cliente = Clientes.id
-    JOIN Produtos ON Pedidos_Itens.id_produto = Produtos.id
-    ORDER BY Pedidos.id DESC
-    """
-    
-    cursor.execute(sql)
-    dados = cursor.fetchall()
-    conn.close()
-    
-    if not dados:
-        print("❌ Nenhuma venda para exportar.")
+    print("\n--- GERANDO RELATÓRIO EXCEL ---")
+    print("1. Todas as vendas")
+    print("2. Um período")
+    print("3. Só as vendas novas desde a última exportação")
+    modo = input("Opção: ")
+    formato = input("Formato (csv/xlsx/parquet) [csv]: ").strip().lower() or "csv"
+    if formato not in exportacao.FORMATOS:
+        print("❌ Formato inválido!")
         return
 
-    nome_arquivo = "relatorio_vendas.csv"
+    inicio = fim = None
+    if modo == "2":
+        try:
+            inicio = datetime.strptime(input("Data inicial (DD/MM/AAAA): "), "%d/%m/%Y").date()
+            fim = datetime.strptime(input("Data final (DD/MM/AAAA): "), "%d/%m/%Y").date()
+        except ValueError:
+            print("❌ Data inválida!")
+            return
+
+    nome_arquivo = "relatorio_vendas" + exportacao.FORMATOS[formato][1]
+    if modo == "3":
+        # Cada exportação incremental vai para um arquivo próprio, sem apagar a anterior
+        nome_arquivo = datetime.now().strftime("relatorio_vendas_%Y%m%d_%H%M%S") + exportacao.FORMATOS[formato][1]
+    caminho_arquivo = os.path.join(BASE_DIR, nome_arquivo)
     
     try:
-        # encoding='utf-8-sig' é vital para o Excel entender acentos (ç, ã, é)
-        with open(nome_arquivo, mode='w', newline='', encoding='utf-8-sig') as arquivo:
-            escritor = csv.writer(arquivo, delimiter=';') # Ponto e vírgula separa colunas no Excel BR
-            
-            # Escrevendo o Cabeçalho
-            escritor.writerow(['ID Pedido', 'Data', 'Cliente', 'Bolo', 'Qtd', 'Preço Unit.', 'Total Item'])
-            
-            # Escrevendo os Dados
-            escritor.writerows(dados)
-            
-        print(f"✅ Arquivo '{nome_arquivo}' criado na pasta do projeto!")
-        print(f"📂 Caminho: {os.path.join(BASE_DIR, nome_arquivo)}")
-        
+        # As linhas vão do banco para o arquivo em lotes, sem carregar tudo na memória
+        linhas = exportacao.exportar(formato, caminho_arquivo, inicio, fim, incremental=(modo == "3"))
     except PermissionError:
-        print("⚠️  ERRO: O arquivo 'relatorio_vendas.csv' já está aberto no Excel.")
+        print(f"⚠️  ERRO: O arquivo '{nome_arquivo}' já está aberto no Excel.")
         print("Feche o arquivo e tente novamente.")
+        return
+    except RuntimeError as erro:
+        print(f"❌ {erro}")
+        return
+
+    if not linhas:
+        print("❌ Nenhuma venda para exportar.")
+        return
+    print(f"✅ Arquivo '{nome_arquivo}' criado na pasta do projeto! ({linhas} linhas)")
+    print(f"📂 Caminho: {caminho_arquivo}")
+
+def importar_planilha():
+    print("\n--- IMPORTAR PLANILHA (CSV) ---")
+    tipos = list(importacao.TIPOS)
+    for i, tipo in enumerate(tipos, 1):
+        print(f"{i}. {importacao.TIPOS[tipo]}")
+    escolha = input("Opção: ")
+    if escolha not in [str(i) for i in range(1, len(tipos) + 1)]:
+        print("❌ Opção inválida!")
+        return
+    caminho_arquivo = input("Caminho do arquivo .csv: ").strip().strip('"')
+    if not os.path.isfile(caminho_arquivo):
+        print("❌ Arquivo não encontrado!")
+        return
+
+    resultado = importacao.importar(tipos[int(escolha) - 1], caminho_arquivo)
+    print(f"✅ {resultado.resumo()}")
+    for linha, erro in resultado.erros[:20]:
+        print(f"   Linha {linha}: {erro}")
+    if len(resultado.erros) > 20:
+        print(f"   ... e mais {len(resultado.erros) - 20} erros")
 
 # --- MENU PRINCIPAL ---
 
@@ -354,6 +272,8 @@ while True:
     print("5. Relatório de Vendas") 
     print("6. Detalhes de um Pedido (Para a Cozinha)")
     print("7.Exportar para Excel")
+    print("8. Importar planilha (CSV)")
+    print("9. Plano de Produção (o que assar)")
     print("0. Sair")
     
     opcao = input("\nOpção: ")
@@ -374,6 +294,10 @@ while True:
         break
     elif opcao == "7":
          exportar_para_excel()
+    elif opcao == "8":
+        importar_planilha()
+    elif opcao == "9":
+        plano_producao()
         
     print("Opção inválida!")
 
@@ -0,0 +1,80 @@
+# =================================================================================
+# PÁGINA: AGENDA (CAPACIDADE DA COZINHA POR DIA DE ENTREGA)
+# =================================================================================
+import streamlit as st
+from datetime import date
+import funcoes_db
+import rastreio
+
+st.header("📅 Agenda de Entregas")
+# Carga por dia já somada em Carga_Diaria (gatilhos): o mês inteiro é uma leitura pequena
+hoje = date.today()
+c1, c2 = st.columns(2)
+with c1: ano = st.number_input("Ano", 2000, 2100, hoje.year)
+with c2: mes = st.selectbox("Mês", range(1, 13), index=hoje.month - 1, format_func=lambda m: f"{m:02d}")
+dias = funcoes_db.calendario_capacidade(int(ano), mes)
+
+
+def celula(d):
+    if d["limite"] is None:
+        sinal = "⚪"
+    elif d["carga"] > d["limite"] or d["limite"] == 0:
+        sinal = "🔴"
+    elif d["carga"] >= 0.8 * d["limite"]:
+        sinal = "🟡"
+    else:
+        sinal = "🟢"
+    limite = "∞" if d["limite"] is None else d["limite"]
+    return f"**{d['dia'].day}** {sinal}<br>{d['carga']}/{limite}"
+
+
+with rastreio.etapa("agenda: montar calendário"):
+    linhas = ["| " + " | ".join(funcoes_db.DIAS_SEMANA) + " |", "|" + "---|" * 7]
+    semana = [""] * dias[0]["dia"].weekday()
+    for d in dias:
+        semana.append(celula(d))
+        if len(semana) == 7:
+            linhas.append("| " + " | ".join(semana) + " |"); semana = []
+    if semana:
+        linhas.append("| " + " | ".join(semana + [""] * (7 - len(semana))) + " |")
+st.markdown("\n".join(linhas), unsafe_allow_html=True)
+st.caption("Carga/limite em unidades com o peso de cada tamanho. 🟢 folga · 🟡 80% ou mais · 🔴 cheio · ⚪ sem limite")
+
+with st.expander("📋 Dias com entrega"):
+    st.dataframe([{"Dia": f"{d['dia']:%d/%m}", "Bolos": d["unidades"], "Carga": d["carga"],
+                   "A produzir": d["a_produzir"], "Limite": d["limite"], "Livre": d["livre"]}
+                  for d in dias if d["unidades"] or d["limite"] == 0],
+                 width="stretch", hide_index=True)
+
+# --- CONFIGURAÇÃO DA CAPACIDADE ---
+with st.expander("⚙️ Capacidade da cozinha"):
+    st.caption("Limite de carga por dia (0 = não produz; vazio = sem limite).")
+    semana_atual = funcoes_db.capacidade_semana()
+    with st.form("capacidade_semana"):
+        colunas = st.columns(7)
+        novos = {}
+        for n, nome in enumerate(funcoes_db.DIAS_SEMANA):
+            valor = colunas[n].number_input(nome, 0, None, semana_atual.get(n), key=f"cap_{n}", placeholder="∞")
+            novos[n] = valor
+        if st.form_submit_button("Salvar limites da semana"):
+            funcoes_db.definir_capacidade_semana(novos); st.rerun()
+
+    c_d, c_l, c_b = st.columns([2, 1, 1])
+    with c_d: dia_exc = st.date_input("Exceção para o dia", min_value=hoje, format="DD/MM/YYYY")
+    with c_l: limite_exc = st.number_input("Limite nesse dia", 0, None, None, placeholder="padrão da semana")
+    with c_b:
+        st.write(""); st.write("")
+        if st.button("Salvar exceção"):
+            funcoes_db.definir_capacidade_dia(dia_exc, limite_exc); st.rerun()
+
+    pesos = funcoes_db.pesos_tamanho()
+    with st.form("pesos"):
+        st.caption("Peso de cada tamanho na carga (tamanho sem peso vale 1).")
+        texto = st.text_input("Pesos", ", ".join(f"{t}={p}" for t, p in pesos.items()), placeholder="P=1, M=2, G=3")
+        if st.form_submit_button("Salvar pesos"):
+            try:
+                novos_pesos = {t.strip(): int(p) for t, p in (par.split("=") for par in texto.split(",") if par.strip())}
+            except ValueError:
+                st.error("Use o formato TAMANHO=PESO, separados por vírgula.")
+            else:
+                funcoes_db.definir_pesos(novos_pesos); st.rerun()
@@ -0,0 +1,57 @@
+# =================================================================================
+# PÁGINA: CARDÁPIO (MODIFICAÇÃO 4: ATIVO/INATIVO)
+# =================================================================================
+import streamlit as st
+import funcoes_db
+import rastreio
+from componentes import escolher_produto, registro_aberto
+
+st.header("🍰 Gestão do Cardápio")
+df_prods = funcoes_db.listar_produtos()
+tab1, tab2, tab3 = st.tabs(["➕ Novo", "✏️ Editar/Status", "❌ Excluir"])
+
+with tab1:
+    with st.form("prod_novo"):
+        n = st.text_input("Nome"); p = st.number_input("Preço", 0.0); t = st.text_input("Tamanho")
+        if st.form_submit_button("Cadastrar"):
+            funcoes_db.criar_produto(n, funcoes_db.centavos(p), t)
+            st.rerun()
+
+with tab2:
+    sel_p = escolher_produto("Selecione o produto:", "edit_prod")
+    if sel_p is not None:
+        dados_p, chave_p = registro_aberto("produto", sel_p[0])
+        with st.form("prod_edit"):
+            nn = st.text_input("Nome", value=dados_p['nome'])
+            np = st.number_input("Preço", value=funcoes_db.reais(dados_p['preco'] or 0))
+            nt = st.text_input("Tamanho", value=dados_p['tamanho'] or "")
+            n_ativo = st.checkbox("Produto Ativo (Aparece na venda)", value=dados_p['ativo'] == 1)
+            if st.form_submit_button("Salvar Alterações"):
+                del st.session_state[chave_p]
+                try:
+                    funcoes_db.atualizar_produto(dados_p['id'], dados_p['versao'], nome=nn, preco=funcoes_db.centavos(np), tamanho=nt, ativo=1 if n_ativo else 0)
+                except funcoes_db.EdicaoConcorrente as erro:
+                    st.error(f"{erro} Os dados foram recarregados; confira e salve de novo.")
+                else:
+                    st.rerun()
+
+with tab3:
+    sel_ex = escolher_produto("Excluir produto:", "del_prod")
+    if sel_ex is not None:
+        dados_ex, chave_ex = registro_aberto("produto", sel_ex[0])
+        # Exclusão lógica: sai do cardápio e da venda, mas os pedidos antigos não mudam
+        if st.button("Confirmar Exclusão"):
+            del st.session_state[chave_ex]
+            try:
+                funcoes_db.excluir_produto(dados_ex['id'], dados_ex['versao'])
+            except funcoes_db.EdicaoConcorrente as erro:
+                st.error(str(erro))
+            else:
+                st.rerun()
+
+st.divider()
+# Modificação visual: Mostrar se está ativo ou não na tabela
+with rastreio.etapa("cardápio: formatar ativo"):
+    df_visu = funcoes_db.em_reais(df_prods.copy(), 'preco')
+    df_visu['ativo'] = df_visu['ativo'].map({1: "✅ Sim", 0: "❌ Não"})
+st.dataframe(df_visu, width="stretch", hide_index=True)
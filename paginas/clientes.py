@@ -0,0 +1,63 @@
+# =================================================================================
+# PÁGINA: CLIENTES (MODIFICAÇÃO 1: EDITAR/EXCLUIR)
+# =================================================================================
+import streamlit as st
+import pandas as pd
+import funcoes_db
+import importacao
+from componentes import escolher_cliente, registro_aberto
+
+st.header("👥 Gestão de Clientes")
+tab1, tab2, tab3, tab4 = st.tabs(["➕ Novo", "✏️ Editar", "❌ Excluir", "📥 Importar"])
+
+with tab1:
+    with st.form("cli_novo"):
+        n = st.text_input("Nome"); t = st.text_input("WhatsApp"); e = st.text_input("Endereço")
+        if st.form_submit_button("Salvar"):
+            funcoes_db.criar_cliente(n, t, e)
+            st.rerun()
+
+with tab2:
+    id_edit = escolher_cliente("Escolha o cliente para editar:", "edit_cli")
+    if id_edit is not None:
+        dados_cli, chave_cli = registro_aberto("cliente", id_edit)
+        with st.form("cli_edit"):
+            new_n = st.text_input("Nome", value=dados_cli['nome'])
+            new_t = st.text_input("WhatsApp", value=dados_cli['telefone'] or "")
+            new_e = st.text_input("Endereço", value=dados_cli['endereco'] or "")
+            if st.form_submit_button("Atualizar"):
+                del st.session_state[chave_cli]  # a próxima tela já lê do banco
+                try:
+                    funcoes_db.atualizar_cliente(id_edit, dados_cli['versao'], nome=new_n, telefone=new_t, endereco=new_e)
+                except funcoes_db.EdicaoConcorrente as erro:
+                    st.error(f"{erro} Os dados foram recarregados; confira e salve de novo.")
+                else:
+                    st.rerun()
+
+with tab3:
+    id_del = escolher_cliente("Escolha o cliente para excluir:", "del_cli")
+    if id_del is not None:
+        dados_del, chave_del = registro_aberto("cliente", id_del)
+        # Exclusão lógica: o histórico de pedidos do cliente continua intacto
+        if st.button("Confirmar Exclusão do Cliente"):
+            del st.session_state[chave_del]
+            try:
+                funcoes_db.excluir_cliente(id_del, dados_del['versao'])
+            except funcoes_db.EdicaoConcorrente as erro:
+                st.error(str(erro))
+            else:
+                st.rerun()
+
+with tab4:
+    tipo_imp = st.radio("O que importar:", list(importacao.TIPOS), format_func=importacao.TIPOS.get, horizontal=True)
+    arquivo_imp = st.file_uploader("Planilha .csv (separador ; ou ,)", type=["csv"])
+    if arquivo_imp is not None and st.button("Importar"):
+        # O arquivo é lido e gravado em blocos; telefones e preços são normalizados
+        resultado = importacao.importar(tipo_imp, arquivo_imp)
+        st.success(resultado.resumo())
+        if resultado.erros:
+            st.dataframe(pd.DataFrame(resultado.erros, columns=["Linha", "Erro"]), hide_index=True)
+
+st.divider()
+# Só os mais recentes: a lista completa pesaria no navegador (use a busca acima)
+st.dataframe(funcoes_db.ultimos_clientes(200), width="stretch", hide_index=True)
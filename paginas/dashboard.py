@@ -0,0 +1,81 @@
+# =================================================================================
+# PÁGINA: DASHBOARD
+# =================================================================================
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import date
+import exportacao
+import funcoes_db
+import rastreio
+import tarefas
+
+st.header("📊 Painel de Controle")
+primeira = funcoes_db.primeira_venda()
+
+if primeira:
+    c_ini, c_fim = st.columns(2)
+    data_ini = c_ini.date_input("📅 De", value=primeira, format="DD/MM/YYYY")
+    data_fim = c_fim.date_input("📅 Até", value=max(primeira, date.today()), format="DD/MM/YYYY")
+    # KPIs somados pelo próprio SQLite, sem trazer os pedidos para o pandas
+    faturamento, qtd_pedidos = funcoes_db.resumo_vendas(data_ini, data_fim)
+
+    c1, c2 = st.columns(2)
+    c1.metric("💰 Faturamento Total", funcoes_db.formatar_reais(faturamento))
+    c2.metric("📦 Pedidos Totais", qtd_pedidos)
+    st.divider()
+
+    # Tendência: lida do resumo Vendas_Diarias (poucas linhas), não dos itens
+    st.subheader("📈 Tendência de Vendas")
+    df_dia = funcoes_db.vendas_por_dia(data_ini, data_fim)
+    if not df_dia.empty:
+        agrupar = st.radio("Agrupar por:", ["Dia", "Semana", "Mês"], horizontal=True)
+        with rastreio.etapa("dashboard: agrupar tendência"):
+            df_dia['dia'] = pd.to_datetime(df_dia['dia'])
+            funcoes_db.em_reais(df_dia, 'receita')
+            if agrupar != "Dia":
+                df_dia = df_dia.resample("W-MON" if agrupar == "Semana" else "MS", on='dia').sum().reset_index()
+        g1, g2 = st.columns(2)
+        g1.plotly_chart(px.line(df_dia, x='dia', y='receita', markers=True, title="💰 Faturamento (R$)"), width="stretch")
+        g2.plotly_chart(px.bar(df_dia, x='dia', y='unidades', title="🎂 Bolos vendidos"), width="stretch")
+
+        df_prod = funcoes_db.em_reais(funcoes_db.vendas_por_produto(data_ini, data_fim), 'receita')
+        df_pag = funcoes_db.em_reais(funcoes_db.vendas_por_pagamento(data_ini, data_fim), 'receita')
+        g3, g4 = st.columns(2)
+        g3.plotly_chart(px.bar(df_prod, x='produto', y='receita', title="🍰 Faturamento por produto"), width="stretch")
+        g4.plotly_chart(px.pie(df_pag, names='pagamento', values='receita', title="💳 Formas de pagamento"), width="stretch")
+    st.divider()
+
+    por_pagina = 50
+    total_paginas = max(1, -(-qtd_pedidos // por_pagina))
+    pag_n = st.number_input(f"Página (de {total_paginas})", 1, total_paginas, 1)
+    df_vendas = funcoes_db.pedidos_periodo(data_ini, data_fim, pag_n, por_pagina)
+    # Modificação 2: Formatação BR para exibição no dashboard
+    with rastreio.etapa("dashboard: formatar datas"):
+        df_vendas['data_venda'] = pd.to_datetime(df_vendas['data_venda']).dt.strftime('%d/%m/%Y %H:%M')
+        funcoes_db.em_reais(df_vendas, 'valor_total')
+    st.dataframe(df_vendas, width="stretch", hide_index=True)
+
+    with st.expander("⬇️ Exportar vendas"):
+        e1, e2 = st.columns(2)
+        with e1: formato = st.selectbox("Formato:", list(exportacao.FORMATOS.keys()))
+        with e2: modo = st.radio("O que exportar:", ["Período selecionado", "Tudo", "Novas desde a última exportação"])
+        mime, extensao = exportacao.FORMATOS[formato]
+        # O arquivo só é gerado no clique, em lotes, num arquivo temporário
+        gerar = lambda: exportacao.exportar_temporario(
+            formato,
+            data_ini if modo == "Período selecionado" else None,
+            data_fim if modo == "Período selecionado" else None,
+            incremental=(modo == "Novas desde a última exportação"))
+        b1, b2 = st.columns(2)
+        b1.download_button("📥 Baixar relatório", data=gerar, file_name="relatorio_vendas" + extensao, mime=mime)
+        # Para exportações grandes: roda numa thread e o arquivo fica na página Tarefas
+        if b2.button("⚙️ Gerar em segundo plano"):
+            periodo = modo == "Período selecionado"
+            id_t = tarefas.enviar("exportar", formato=formato,
+                                  inicio=data_ini.isoformat() if periodo else None,
+                                  fim=data_fim.isoformat() if periodo else None,
+                                  incremental=(modo == "Novas desde a última exportação"))
+            st.success(f"Tarefa #{id_t} na fila. Acompanhe em ⚙️ Tarefas.")
+else:
+    st.info("Aguardando primeiras vendas...")
@@ -0,0 +1,42 @@
+# =================================================================================
+# PÁGINA: DESEMPENHO (rastreio dos reruns deste processo)
+# =================================================================================
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import os
+import funcoes_db
+import rastreio
+
+st.header("🔬 Desempenho do App")
+registros = rastreio.reruns()
+r1, r2 = st.columns([3, 1])
+with r1:
+    jsonl = st.toggle("Gravar cada rerun em rastro.jsonl (para análise fora do app)", value=bool(rastreio.arquivo_jsonl))
+    rastreio.arquivo_jsonl = (rastreio.arquivo_jsonl or os.path.join(os.path.dirname(funcoes_db.DB_PATH), "rastro.jsonl")) if jsonl else None
+with r2:
+    if st.button("🧹 Limpar histórico"): rastreio.limpar(); st.rerun()
+
+if not registros:
+    st.info("Navegue pelas páginas para coletar medições.")
+else:
+    with rastreio.etapa("desempenho: montar relatórios"):
+        df_reruns = pd.DataFrame([{k: r[k] for k in ("data", "pagina", "ms", "sql_ms", "pandas_ms")} for r in registros])
+        df_paginas = pd.DataFrame(rastreio.resumo_paginas(registros))
+        df_consultas = pd.DataFrame(rastreio.consultas_mais_lentas(registros))
+        df_etapas = pd.DataFrame(rastreio.etapas_mais_lentas(registros))
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Reruns medidos", len(df_reruns))
+    m2.metric("Rerun médio", f"{df_reruns['ms'].mean():.0f} ms")
+    m3.metric("Tempo em SQL", f"{df_reruns['sql_ms'].sum() / max(df_reruns['ms'].sum(), 1):.0%}")
+
+    st.subheader("📄 Por página")
+    st.dataframe(df_paginas, width="stretch", hide_index=True)
+    st.plotly_chart(px.histogram(df_reruns, x='ms', color='pagina', nbins=40, title="Duração dos reruns (ms)"), width="stretch")
+
+    st.subheader("🐢 Consultas que mais somam tempo")
+    if not df_consultas.empty:
+        st.dataframe(df_consultas[['total_ms', 'vezes', 'do_cache', 'media_ms', 'max_ms', 'linhas_media', 'sql']], width="stretch", hide_index=True)
+    st.subheader("🐼 Etapas de pandas")
+    if not df_etapas.empty:
+        st.dataframe(df_etapas, width="stretch", hide_index=True)
@@ -0,0 +1,53 @@
+# =================================================================================
+# PÁGINA: TAREFAS EM SEGUNDO PLANO
+# =================================================================================
+import streamlit as st
+import os
+from pathlib import Path
+from datetime import date, timedelta
+import backup
+import exportacao
+import funcoes_db
+import tarefas
+
+st.header("⚙️ Tarefas em Segundo Plano")
+with st.expander("➕ Nova tarefa"):
+    tipo_t = st.selectbox("Tipo:", list(tarefas.TIPOS), format_func=lambda t: tarefas.TIPOS[t][1])
+    params_t = {}
+    if tipo_t == "exportar":
+        params_t["formato"] = st.selectbox("Formato:", list(exportacao.FORMATOS.keys()), key="formato_tarefa")
+    elif tipo_t == "plano_producao":
+        j1, j2 = st.columns(2)
+        params_t["inicio"] = j1.date_input("Entregas de", value=date.today(), format="DD/MM/YYYY").isoformat()
+        params_t["fim"] = j2.date_input("Até", value=date.today() + timedelta(days=7), format="DD/MM/YYYY").isoformat()
+    elif tipo_t == "arquivar":
+        params_t["horizonte_dias"] = st.number_input("Arquivar os entregues vendidos há mais de (dias)", 30, None,
+                                                     funcoes_db.HORIZONTE_ARQUIVO_DIAS)
+        anos = funcoes_db.resumo_arquivo()
+        if anos:
+            st.caption("Já arquivados: " + " · ".join(f"{a['ano']}: {a['pedidos']} pedidos" for a in anos))
+    elif tipo_t == "backup":
+        params_t["comprimir"] = st.checkbox("Comprimir (.zip menor, alguns segundos a mais)", value=True)
+    if tipo_t in ("backup", "verificar_backup"):
+        backups = backup.listar_backups()
+        if backups:
+            st.caption(f"Últimos backups (pasta {backup.pasta_backups()}): " +
+                       " · ".join(f"{b['criado_em'][:16]} ({b['bytes'] / 2 ** 20:.0f} MB)" for b in backups[:3]))
+        st.caption("Para restaurar: python backup.py restaurar backups/ARQUIVO.zip")
+    if st.button("Enviar"):
+        st.success(f"Tarefa #{tarefas.enviar(tipo_t, **params_t)} na fila.")
+
+# Só este trecho é refeito a cada 2 s; o resto da página não roda de novo
+@st.fragment(run_every=2)
+def painel_tarefas():
+    for t in tarefas.listar():
+        c1, c2, c3 = st.columns([3, 2, 1])
+        c1.markdown(f"**#{t['id']} {tarefas.TIPOS.get(t['tipo'], (None, t['tipo']))[1]}** · {t['status']} · {t['criada_em'][11:16]}")
+        if t['status'] in (tarefas.NA_FILA, tarefas.RODANDO):
+            c2.progress(t['progresso'], text=t['mensagem'] or "")
+            if c3.button("✖ Cancelar", key=f"cancelar_{t['id']}"): tarefas.cancelar(t['id'])
+        else:
+            c2.caption(t['mensagem'] or "")
+            if t['arquivo'] and os.path.exists(t['arquivo']):
+                c3.download_button("📥", data=lambda caminho_arq=t['arquivo']: Path(caminho_arq).read_bytes(), file_name=os.path.basename(t['arquivo']), key=f"baixar_{t['id']}")
+painel_tarefas()
@@ -0,0 +1,77 @@
+# =================================================================================
+# PÁGINA: NOVA ENCOMENDA
+# =================================================================================
+import streamlit as st
+import uuid
+from datetime import date
+import funcoes_db
+from carrinho import Carrinho
+from componentes import escolher_cliente, escolher_do_cardapio
+
+st.header("🛒 Registrar Novo Pedido")
+# Carrinho: uma linha por produto e o total já somado (carrinho.py)
+if not isinstance(st.session_state.get('carrinho'), Carrinho): st.session_state['carrinho'] = Carrinho()
+carrinho = st.session_state['carrinho']
+# Chave do pedido em montagem: um segundo clique/rerun no salvar não duplica o pedido
+if 'chave_pedido' not in st.session_state: st.session_state['chave_pedido'] = uuid.uuid4().hex
+
+# Modificação 4: Filtra apenas produtos ATIVOS para a venda
+if not funcoes_db.buscar_clientes("", 1) or not funcoes_db.foto_cardapio().produtos:
+    st.warning("Verifique se há clientes cadastrados e produtos ATIVOS no cardápio.")
+else:
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        id_cliente = escolher_cliente("Cliente:", "cli_pedido")
+    with c2:
+        # Modificação 2: Calendário com data BR
+        data_ent = st.date_input("📅 Data da Entrega", min_value=date.today(), format="DD/MM/YYYY")
+        carga_dia, limite_dia = funcoes_db.capacidade_do_dia(data_ent)
+        if limite_dia is not None:
+            st.caption(f"Capacidade do dia: {carga_dia} de {limite_dia} ocupados" if limite_dia else "Dia sem produção")
+
+    obs = st.text_area("📝 Observações:")
+    st.divider()
+    
+    c_p, c_q, c_b = st.columns([3, 1, 1])
+    with c_p: dados_p = escolher_do_cardapio("Produto:", "prod_pedido")
+    with c_q: qtd = st.number_input("Qtd", 1, 50, 1)
+    with c_b: 
+        st.write(""); st.write("")
+        if st.button("➕ Add") and dados_p:
+            carrinho.adicionar(dados_p, qtd)
+
+    if carrinho:
+        st.table(carrinho.tabela())
+        # Editar/remover: a chave do campo inclui a quantidade atual, então um "➕ Add"
+        # do mesmo produto (que soma na linha) já aparece no campo
+        with st.expander("✏️ Alterar itens"):
+            for id_p, (nome_p, _, qtd_p) in list(carrinho.linhas.items()):
+                c_n, c_q, c_r = st.columns([3, 1, 1])
+                c_n.write(nome_p)
+                nova_qtd = c_q.number_input("Qtd", 0, None, qtd_p, key=f"qtd_{id_p}_{qtd_p}", label_visibility="collapsed")
+                if c_r.button("🗑️", key=f"tirar_{id_p}"): nova_qtd = 0
+                if nova_qtd != qtd_p:
+                    carrinho.alterar(id_p, nova_qtd); st.rerun()
+        st.subheader(f"Total: {funcoes_db.formatar_reais(carrinho.total)}")
+        pag = st.radio("Pagamento:", ["Pix", "Dinheiro", "Cartão"], horizontal=True)
+        
+        if st.button("✅ SALVAR ENCOMENDA", type="primary", disabled=id_cliente is None):
+            # Preço mudou ou produto saiu de venda desde que entrou no carrinho: avisa e deixa conferir
+            avisos = carrinho.revalidar(funcoes_db.foto_cardapio())
+            if avisos:
+                for aviso in avisos: st.warning(aviso)
+                st.info(f"Novo total: {funcoes_db.formatar_reais(carrinho.total)}. Confira e salve de novo.")
+            else:
+                try:
+                    # Cabeçalho + itens numa transação; o total é recalculado com os preços do banco
+                    funcoes_db.registrar_pedido(id_cliente, carrinho.itens(), data_ent.strftime("%Y-%m-%d"), pag, obs,
+                                                chave=st.session_state['chave_pedido'])
+                except funcoes_db.PedidoInvalido as erro:
+                    st.error(f"Não foi possível salvar: {erro}")
+                except funcoes_db.BancoOcupado:
+                    # A chave continua a mesma: salvar de novo não duplica o pedido
+                    st.warning("O sistema está ocupado gravando outra coisa. Aguarde alguns segundos e salve de novo.")
+                else:
+                    carrinho.limpar()
+                    del st.session_state['chave_pedido']
+                    st.success("Pedido registrado!"); st.balloons(); st.rerun()
@@ -0,0 +1,64 @@
+# =================================================================================
+# PÁGINA: PRODUÇÃO (MODIFICAÇÃO 3: ENTREGUE)
+# =================================================================================
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+import funcoes_db
+import rastreio
+from funcoes_db import escrita
+
+st.header("👨‍🍳 Gestão de Produção e Pedidos")
+status_opcoes = funcoes_db.STATUS_PEDIDO
+
+# Filtros aplicados no SQL: só a página visível sai do banco
+f1, f2, f3 = st.columns([2, 1, 1])
+with f1: status_filtro = st.multiselect("Filtrar por Status:", status_opcoes, default=funcoes_db.STATUS_ABERTOS)
+with f2: entrega_ini = st.date_input("📅 Entrega de", value=date.today() - timedelta(days=30), format="DD/MM/YYYY")
+with f3: entrega_fim = st.date_input("📅 Entrega até", value=date.today() + timedelta(days=60), format="DD/MM/YYYY")
+
+qtd_fila = funcoes_db.contar_fila_producao(status_filtro, entrega_ini, entrega_fim)
+if qtd_fila:
+    por_pagina = 50
+    total_paginas = max(1, -(-qtd_fila // por_pagina))
+    pag_n = st.number_input(f"Página (de {total_paginas}, {qtd_fila} pedidos)", 1, total_paginas, 1)
+    df = funcoes_db.fila_producao(status_filtro, entrega_ini, entrega_fim, pag_n, por_pagina)
+    # Modificação 2 e 3: Data BR e Status "Entregue"
+    with rastreio.etapa("produção: formatar datas"):
+        df['data_entrega'] = pd.to_datetime(df['data_entrega']).dt.strftime('%d/%m/%Y')
+        funcoes_db.em_reais(df, 'valor_total')
+    st.dataframe(df, width="stretch", hide_index=True)
+
+    st.divider()
+    pedidos = {int(p['id']): p for p in df.to_dict('records')}
+    id_sel = st.selectbox("Selecione um pedido:", list(pedidos),
+                          format_func=lambda i: f"Pedido #{i} - {pedidos[i]['Cliente']} ({pedidos[i]['status']})")
+    dados = pedidos[id_sel]
+
+    c1, c2 = st.columns(2)
+    with c1:
+        novo_status = st.selectbox("Mudar status para:", status_opcoes)
+        if st.button("🔄 Atualizar Status"):
+            with escrita("Pedidos") as conn:
+                conn.execute("UPDATE Pedidos SET status = ? WHERE id = ?", (novo_status, id_sel))
+            st.rerun()
+    with c2:
+        if st.button("📄 Comprovante"):
+            texto = f"*🎂 PEDIDO #{id_sel}*\n*Cliente:* {dados['Cliente']}\n*Entrega:* {dados['data_entrega']}\n*Status:* {dados['status']}\n*Total:* R$ {dados['valor_total']:.2f}"
+            st.code(texto)
+else:
+    st.info("Nenhum pedido com esses filtros.")
+
+# Plano da cozinha: soma por dia/bolo/tamanho de tudo que ainda não foi entregue na janela
+with st.expander("🧁 Plano de produção (o que assar)"):
+    plano = funcoes_db.plano_producao(entrega_ini, entrega_fim)
+    if plano.empty:
+        st.info("Nada para produzir nessa janela de entrega.")
+    else:
+        with rastreio.etapa("produção: tabela do plano"):
+            plano['bolo'] = plano['produto'] + plano['tamanho'].fillna('').map(lambda t: f" ({t})" if t else "")
+            plano['dia'] = pd.to_datetime(plano['dia']).dt.strftime('%d/%m')
+            tabela_plano = plano.pivot_table(index='bolo', columns='dia', values='quantidade', aggfunc='sum', fill_value=0, sort=False)
+        st.dataframe(tabela_plano, width="stretch")
+        st.download_button("🖨️ Baixar folha para imprimir", data=lambda: funcoes_db.folha_producao(entrega_ini, entrega_fim),
+                           file_name=f"plano_producao_{entrega_ini:%Y%m%d}_{entrega_fim:%Y%m%d}.txt", mime="text/plain")
@@ -0,0 +1,21 @@
+# =================================================================================
+# PÁGINA: RANKING
+# =================================================================================
+import streamlit as st
+import pandas as pd
+import funcoes_db
+import rastreio
+
+st.header("🏆 Ranking de Fidelidade")
+# Totais já materializados por cliente (id), então é só ler o top N
+janelas = {"Sempre": None, "Últimos 30 dias": 30, "Últimos 90 dias": 90, "Último ano": 365}
+c1, c2 = st.columns([3, 1])
+with c1: periodo = st.radio("Período:", list(janelas.keys()), horizontal=True)
+with c2: top_n = st.number_input("Mostrar top", 5, 500, 50, step=5)
+ranking = funcoes_db.ranking_clientes(janelas[periodo], top_n)
+if not ranking.empty:
+    with rastreio.etapa("ranking: formatar datas"):
+        ranking['Ultimo_Pedido'] = pd.to_datetime(ranking['Ultimo_Pedido']).dt.strftime('%d/%m/%Y')
+        funcoes_db.em_reais(ranking, 'Total_Gasto')
+    st.dataframe(ranking.style.format({"Total_Gasto": "R$ {:.2f}"}), hide_index=True, width="stretch")
+else: st.info("Sem dados.")
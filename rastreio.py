@@ -0,0 +1,210 @@
+"""Rastreio de desempenho: cada rerun do app vira um registro com as consultas SQL
+(tempo e linhas), as etapas de pandas marcadas na página e o tempo total.
+
+As conexões do pool usam ConexaoMedida, então toda consulta feita durante um
+rerun rastreado é medida sem mudar quem consulta. Os últimos reruns ficam na
+memória (página Desempenho) e, se ativado, também num arquivo JSONL.
+"""
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+LIMITE_HISTORICO = 1000  # reruns guardados na memória do processo
+TAMANHO_SQL = 400        # o texto da consulta é cortado nos relatórios
+
+historico = deque(maxlen=LIMITE_HISTORICO)
+_historico_trava = threading.Lock()
+_local = threading.local()
+# Arquivo JSONL opcional (uma linha por rerun); também pode vir da variável de ambiente
+arquivo_jsonl = os.environ.get("BOLOS_RASTRO_JSONL") or None
+
+
+class Rastro:
+    """O que aconteceu num rerun: consultas, etapas e tempo total"""
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.inicio = time.perf_counter()
+        self.consultas = []
+        self.etapas = []
+
+    def consulta(self, sql, ms, linhas, cache=False):
+        registro = {"sql": " ".join(sql.split())[:TAMANHO_SQL], "ms": ms, "linhas": linhas, "cache": cache}
+        self.consultas.append(registro)
+        return registro
+
+    def resumo(self):
+        return {
+            "data": self.data, "pagina": self.pagina,
+            "ms": round((time.perf_counter() - self.inicio) * 1000, 2),
+            "sql_ms": round(sum(c["ms"] for c in self.consultas), 2),
+            "pandas_ms": round(sum(e["ms"] for e in self.etapas), 2),
+            "consultas": self.consultas, "etapas": self.etapas,
+        }
+
+
+def atual():
+    """Rastro do rerun desta thread (None fora de um rerun rastreado)"""
+    return getattr(_local, "rastro", None)
+
+
+def iniciar(pagina):
+    _local.rastro = Rastro(pagina)
+
+
+def terminar():
+    """Fecha o rastro desta thread, guarda no histórico e no JSONL; devolve o resumo"""
+    rastro = atual()
+    if rastro is None:
+        return None
+    _local.rastro = None
+    resumo = rastro.resumo()
+    with _historico_trava:
+        historico.append(resumo)
+        if arquivo_jsonl:
+            with open(arquivo_jsonl, "a", encoding="utf-8") as arquivo:
+                arquivo.write(json.dumps(resumo, ensure_ascii=False) + "\n")
+    return resumo
+
+
+@contextmanager
+def etapa(nome):
+    """Mede um trecho da página (ex.: transformações de pandas)"""
+    rastro = atual()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if rastro is not None:
+            rastro.etapas.append({"nome": nome, "ms": round((time.perf_counter() - inicio) * 1000, 3)})
+
+
+def limpar():
+    with _historico_trava:
+        historico.clear()
+
+
+# --- CONEXÃO E CURSOR MEDIDOS ---
+
+class CursorMedido(sqlite3.Cursor):
+    """Mede execute/executemany e soma o tempo e as linhas dos fetch* na mesma consulta.
+
+    Linhas lidas iterando o cursor (for linha in cursor) não entram na contagem.
+    """
+    _registro = None
+
+    def execute(self, sql, parametros=()):
+        return self._medir(super().execute, sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self._medir(super().executemany, sql, parametros)
+
+    def _medir(self, executar, sql, parametros):
+        rastro = atual()
+        if rastro is None:
+            self._registro = None
+            return executar(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return executar(sql, parametros)
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self._registro = rastro.consulta(sql, round(ms, 3), max(self.rowcount, 0))
+
+    def _buscar(self, buscar, *args):
+        if self._registro is None:
+            return buscar(*args)
+        inicio = time.perf_counter()
+        resultado = buscar(*args)
+        self._registro["ms"] = round(self._registro["ms"] + (time.perf_counter() - inicio) * 1000, 3)
+        self._registro["linhas"] += len(resultado) if isinstance(resultado, list) else int(resultado is not None)
+        return resultado
+
+    def fetchall(self):
+        return self._buscar(super().fetchall)
+
+    def fetchmany(self, *args):
+        return self._buscar(super().fetchmany, *args)
+
+    def fetchone(self):
+        return self._buscar(super().fetchone)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são CursorMedido"""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+# --- RELATÓRIOS (página Desempenho) ---
+
+def _percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def reruns():
+    """Cópia do histórico (o mais antigo primeiro)"""
+    with _historico_trava:
+        return list(historico)
+
+
+def resumo_paginas(registros):
+    """Por página: reruns, p50/p95/máximo do rerun e médias de SQL e pandas"""
+    por_pagina = {}
+    for r in registros:
+        por_pagina.setdefault(r["pagina"], []).append(r)
+    linhas = []
+    for pagina, lista in por_pagina.items():
+        tempos = [r["ms"] for r in lista]
+        linhas.append({
+            "pagina": pagina, "reruns": len(lista),
+            "p50_ms": round(_percentil(tempos, 50), 1), "p95_ms": round(_percentil(tempos, 95), 1),
+            "max_ms": round(max(tempos), 1),
+            "sql_ms_medio": round(statistics.fmean(r["sql_ms"] for r in lista), 1),
+            "pandas_ms_medio": round(statistics.fmean(r["pandas_ms"] for r in lista), 1),
+        })
+    return sorted(linhas, key=lambda l: -l["p95_ms"])
+
+
+def consultas_mais_lentas(registros, limite=20):
+    """Consultas agrupadas pelo texto, das que mais somam tempo para as que menos somam"""
+    grupos = {}
+    for r in registros:
+        for c in r["consultas"]:
+            g = grupos.setdefault(c["sql"], {"sql": c["sql"], "vezes": 0, "do_cache": 0, "total_ms": 0.0, "max_ms": 0.0, "linhas": 0})
+            g["vezes"] += 1
+            g["do_cache"] += c["cache"]
+            g["total_ms"] += c["ms"]
+            g["max_ms"] = max(g["max_ms"], c["ms"])
+            g["linhas"] += c["linhas"]
+    for g in grupos.values():
+        g["media_ms"] = round(g["total_ms"] / g["vezes"], 3)
+        g["linhas_media"] = round(g.pop("linhas") / g["vezes"], 1)
+        g["total_ms"] = round(g["total_ms"], 1)
+    return sorted(grupos.values(), key=lambda g: -g["total_ms"])[:limite]
+
+
+def etapas_mais_lentas(registros, limite=20):
+    grupos = {}
+    for r in registros:
+        for e in r["etapas"]:
+            grupos.setdefault(e["nome"], []).append(e["ms"])
+    linhas = [{"etapa": nome, "vezes": len(t), "p50_ms": round(_percentil(t, 50), 2),
+               "p95_ms": round(_percentil(t, 95), 2), "total_ms": round(sum(t), 1)} for nome, t in grupos.items()]
+    return sorted(linhas, key=lambda l: -l["total_ms"])[:limite]
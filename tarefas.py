@@ -0,0 +1,315 @@
+"""Tarefas em segundo plano: exportações, relatórios, recálculo dos resumos e backups.
+
+A fila fica na tabela Tarefas; um pool de threads por processo executa as
+tarefas, grava o progresso no banco e deixa o resultado em PASTA_ARQUIVOS.
+A tela só consulta a tabela, então a sessão do usuário nunca fica travada.
+Cada processo também põe um backup na fila a cada HORAS_ENTRE_BACKUPS horas.
+
+Uso (opcional, worker separado): python tarefas.py [banco.db]
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import backup
+import exportacao
+import funcoes_db
+
+WORKERS = 2
+INTERVALO_PROGRESSO = 0.5  # segundos entre gravações de progresso no banco
+DIAS_GUARDAR = 7           # arquivos de tarefas mais antigos são apagados
+HORAS_ENTRE_BACKUPS = 24
+INTERVALO_AGENDA = 600     # segundos entre as conferências da agenda de backup (a primeira também espera)
+
+NA_FILA, RODANDO, CONCLUIDA, ERRO, CANCELADA = "Na fila", "Rodando", "Concluída", "Erro", "Cancelada"
+TERMINADAS = (CONCLUIDA, ERRO, CANCELADA)
+
+
+class TarefaCancelada(Exception):
+    pass
+
+
+def _agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def pasta_arquivos(caminho=None):
+    """Os resultados ficam ao lado do banco, numa pasta própria"""
+    pasta = os.path.join(os.path.dirname(os.path.abspath(caminho or funcoes_db.DB_PATH)), "arquivos_tarefas")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+# --- CONTEXTO PASSADO PARA CADA TAREFA ---
+
+class Contexto:
+    """Progresso, cancelamento e arquivo de saída de uma tarefa em execução"""
+
+    def __init__(self, id_tarefa, caminho):
+        self.id = id_tarefa
+        self.caminho = caminho
+        self._ultima_gravacao = 0.0
+
+    def progresso(self, fracao, mensagem=None):
+        """Grava o progresso (no máximo a cada INTERVALO_PROGRESSO) e confere o pedido de cancelamento"""
+        agora = time.monotonic()
+        if agora - self._ultima_gravacao < INTERVALO_PROGRESSO and fracao < 1:
+            return
+        self._ultima_gravacao = agora
+        try:
+            with funcoes_db.escrita("Tarefas", caminho=self.caminho) as conn:
+                conn.execute("UPDATE Tarefas SET progresso = ?, mensagem = COALESCE(?, mensagem) WHERE id = ?",
+                             (min(max(fracao, 0.0), 1.0), mensagem, self.id))
+        except sqlite3.OperationalError:
+            pass  # banco ocupado (ex.: outra tarefa recalculando resumos): o progresso fica para a próxima
+        with funcoes_db.conexao(self.caminho) as conn:
+            cancelar = conn.execute("SELECT cancelar FROM Tarefas WHERE id = ?", (self.id,)).fetchone()[0]
+        if cancelar:
+            raise TarefaCancelada()
+
+    def arquivo(self, nome):
+        return os.path.join(pasta_arquivos(self.caminho), f"tarefa_{self.id}_{nome}")
+
+
+# --- TIPOS DE TAREFA (cada um recebe o contexto e os parâmetros e devolve o arquivo ou None) ---
+
+def _exportar(ctx, formato="csv", inicio=None, fim=None, incremental=False):
+    inicio = date.fromisoformat(inicio) if inicio else None
+    fim = date.fromisoformat(fim) if fim else None
+    total = max(1, exportacao.contar_linhas(inicio, fim, incremental, ctx.caminho))
+    destino = ctx.arquivo("relatorio_vendas" + exportacao.FORMATOS[formato][1])
+    try:
+        linhas = exportacao.exportar(formato, destino, inicio, fim, incremental, ctx.caminho,
+                                     progresso=lambda n: ctx.progresso(n / total, f"{n} de {total} linhas"))
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+    ctx.progresso(1, f"{linhas} linhas exportadas")
+    return destino
+
+
+def _reconstruir_resumos(ctx):
+    ctx.progresso(0, "Recalculando vendas diárias...")
+    funcoes_db.reconstruir_vendas_diarias(ctx.caminho)
+    ctx.progresso(0.4, "Recalculando totais dos clientes...")
+    funcoes_db.reconstruir_totais_clientes(ctx.caminho)
+    ctx.progresso(0.8, "Recalculando a carga da agenda...")
+    funcoes_db.reconstruir_carga_diaria(caminho=ctx.caminho)
+    ctx.progresso(1, "Resumos recalculados")
+
+
+def _arquivar(ctx, horizonte_dias=funcoes_db.HORIZONTE_ARQUIVO_DIAS):
+    total = max(1, funcoes_db.contar_para_arquivar(horizonte_dias, ctx.caminho))
+    ctx.progresso(0, f"{total} pedidos entregues para arquivar...")
+    pedidos, itens = funcoes_db.arquivar_pedidos(
+        horizonte_dias, ctx.caminho, progresso=lambda p, _: ctx.progresso(p / total, f"{p} de {total} pedidos"))
+    ctx.progresso(1, f"{pedidos} pedidos ({itens} itens) arquivados")
+
+
+def _backup(ctx, comprimir=True):
+    # Sem 'arquivo' na tarefa: os backups têm o rodízio próprio (backup.MANTER_BACKUPS),
+    # limpar_antigas não deve apagá-los
+    manifesto = backup.fazer_backup(ctx.caminho, comprimir, progresso=ctx.progresso)
+    principal = manifesto["bancos"][manifesto["banco"]]
+    ctx.progresso(1, f"{os.path.basename(manifesto['arquivo'])}: {manifesto['bytes'] / 2 ** 20:.1f} MB, "
+                     f"{principal['contagens'].get('Pedidos', 0)} pedidos, {sum(manifesto['tempos'].values()):.1f} s")
+
+
+def _verificar_backup(ctx):
+    backups = backup.listar_backups(ctx.caminho)
+    if not backups:
+        raise ValueError("Nenhum backup para verificar.")
+    ctx.progresso(0, f"Extraindo {os.path.basename(backups[0]['arquivo'])}...")
+    tempos = backup.verificar_backup(backups[0]["arquivo"])["tempos_verificacao"]
+    ctx.progresso(1, f"{os.path.basename(backups[0]['arquivo'])} íntegro: restauração ensaiada em {tempos['total_s']} s")
+
+
+def _plano_producao(ctx, inicio, fim):
+    ctx.progresso(0, "Somando os pedidos...")
+    folha = funcoes_db.folha_producao(date.fromisoformat(inicio), date.fromisoformat(fim))
+    destino = ctx.arquivo(f"plano_producao_{inicio}_{fim}.txt")
+    with open(destino, "w", encoding="utf-8") as arquivo:
+        arquivo.write(folha + "\n")
+    ctx.progresso(1, "Folha de produção pronta")
+    return destino
+
+
+TIPOS = {
+    "exportar": (_exportar, "Exportar vendas"),
+    "reconstruir_resumos": (_reconstruir_resumos, "Recalcular resumos"),
+    "plano_producao": (_plano_producao, "Plano de produção"),
+    "arquivar": (_arquivar, "Arquivar pedidos entregues"),
+    "backup": (_backup, "Backup do banco"),
+    "verificar_backup": (_verificar_backup, "Verificar o último backup"),
+}
+
+
+# --- EXECUÇÃO ---
+
+_executores = {}
+_executores_trava = threading.Lock()
+
+
+def _executor(caminho):
+    """Um pool de threads por banco e por processo (como o pool de conexões)"""
+    with _executores_trava:
+        if caminho not in _executores:
+            _executores[caminho] = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="tarefa")
+        return _executores[caminho]
+
+
+def _rodar(id_tarefa, caminho):
+    # Quem mudar o status de 'Na fila' para 'Rodando' primeiro fica com a tarefa
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        pegou = conn.execute("UPDATE Tarefas SET status = ?, iniciada_em = ? WHERE id = ? AND status = ?",
+                             (RODANDO, _agora(), id_tarefa, NA_FILA)).rowcount
+        if not pegou:
+            return
+        tipo, parametros = conn.execute("SELECT tipo, parametros FROM Tarefas WHERE id = ?", (id_tarefa,)).fetchone()
+
+    status, mensagem, arquivo = CONCLUIDA, None, None
+    try:
+        arquivo = TIPOS[tipo][0](Contexto(id_tarefa, caminho), **json.loads(parametros))
+    except TarefaCancelada:
+        status, mensagem = CANCELADA, "Cancelada pelo usuário"
+    except Exception as erro:
+        status, mensagem = ERRO, f"{type(erro).__name__}: {erro}"
+        traceback.print_exc()
+    # O resultado precisa ser gravado: insiste enquanto o banco estiver ocupado
+    for tentativa in range(10):
+        try:
+            with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+                conn.execute("UPDATE Tarefas SET status = ?, mensagem = COALESCE(?, mensagem), arquivo = ?, terminada_em = ? WHERE id = ?",
+                             (status, mensagem, arquivo, _agora(), id_tarefa))
+            return
+        except sqlite3.OperationalError:
+            time.sleep(1 + tentativa)
+
+
+def enviar(tipo, caminho=None, **parametros):
+    """Põe a tarefa na fila e já a entrega ao pool deste processo; devolve o id"""
+    caminho = caminho or funcoes_db.DB_PATH
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        id_tarefa = conn.execute("INSERT INTO Tarefas (tipo, parametros, criada_em) VALUES (?, ?, ?)",
+                                 (tipo, json.dumps(parametros), _agora())).lastrowid
+    _executor(caminho).submit(_rodar, id_tarefa, caminho)
+    return id_tarefa
+
+
+def cancelar(id_tarefa, caminho=None):
+    """Na fila: cancela na hora. Rodando: a tarefa para no próximo aviso de progresso."""
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        conn.execute("UPDATE Tarefas SET status = ?, terminada_em = ? WHERE id = ? AND status = ?",
+                     (CANCELADA, _agora(), id_tarefa, NA_FILA))
+        conn.execute("UPDATE Tarefas SET cancelar = 1 WHERE id = ? AND status = ?", (id_tarefa, RODANDO))
+
+
+_retomadas = set()
+
+
+def retomar(caminho=None):
+    """Uma vez por processo: devolve ao pool o que ficou na fila e marca como erro
+    o que estava rodando quando o processo anterior morreu."""
+    caminho = caminho or funcoes_db.DB_PATH
+    with _executores_trava:
+        if caminho in _retomadas:
+            return
+        _retomadas.add(caminho)
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        conn.execute("UPDATE Tarefas SET status = ?, mensagem = 'Interrompida (o programa foi fechado)', terminada_em = ? WHERE status = ?",
+                     (ERRO, _agora(), RODANDO))
+        pendentes = [id_ for (id_,) in conn.execute("SELECT id FROM Tarefas WHERE status = ? ORDER BY id", (NA_FILA,))]
+    for id_tarefa in pendentes:
+        _executor(caminho).submit(_rodar, id_tarefa, caminho)
+    limpar_antigas(caminho)
+    iniciar_agenda(caminho)
+
+
+# --- AGENDA DE BACKUP ---
+
+def agendar_backup(caminho=None, horas=HORAS_ENTRE_BACKUPS, **parametros):
+    """Põe um backup na fila se não há um na fila, rodando ou concluído nas últimas 'horas';
+    devolve o id da tarefa ou None. Vários processos podem chamar: a conferência e o
+    INSERT ficam na mesma transação de escrita."""
+    caminho = caminho or funcoes_db.DB_PATH
+    limite = (datetime.now() - timedelta(hours=horas)).strftime("%Y-%m-%d %H:%M:%S")
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        recente = conn.execute("""SELECT 1 FROM Tarefas WHERE tipo = 'backup'
+                                  AND (status IN (?, ?) OR (status = ? AND terminada_em >= ?)) LIMIT 1""",
+                               (NA_FILA, RODANDO, CONCLUIDA, limite)).fetchone()
+        if recente:
+            return None
+        id_tarefa = conn.execute("INSERT INTO Tarefas (tipo, parametros, criada_em) VALUES ('backup', ?, ?)",
+                                 (json.dumps(parametros), _agora())).lastrowid
+    _executor(caminho).submit(_rodar, id_tarefa, caminho)
+    return id_tarefa
+
+
+def _agenda(caminho):
+    while True:
+        time.sleep(INTERVALO_AGENDA)
+        try:
+            agendar_backup(caminho)
+        except sqlite3.OperationalError:
+            pass  # banco ocupado: confere de novo na próxima volta
+
+
+_agendas = set()
+
+
+def iniciar_agenda(caminho=None):
+    """Uma thread por banco e por processo conferindo se já é hora do backup"""
+    caminho = caminho or funcoes_db.DB_PATH
+    with _executores_trava:
+        if caminho in _agendas:
+            return
+        _agendas.add(caminho)
+    threading.Thread(target=_agenda, args=(caminho,), name="agenda_backup", daemon=True).start()
+
+
+def listar(limite=20, caminho=None):
+    """Últimas tarefas como dicts (lidas direto do banco: o progresso muda o tempo todo)"""
+    with funcoes_db.conexao(caminho) as conn:
+        cursor = conn.execute("""SELECT id, tipo, status, progresso, mensagem, arquivo, criada_em, terminada_em
+                                 FROM Tarefas ORDER BY id DESC LIMIT ?""", (limite,))
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+
+def limpar_antigas(caminho=None, dias=DIAS_GUARDAR):
+    """Apaga os arquivos das tarefas terminadas há mais de 'dias' dias"""
+    limite = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+    with funcoes_db.escrita("Tarefas", caminho=caminho) as conn:
+        antigas = conn.execute("SELECT id, arquivo FROM Tarefas WHERE arquivo IS NOT NULL AND terminada_em < ?",
+                               (limite,)).fetchall()
+        for id_tarefa, arquivo in antigas:
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+            conn.execute("UPDATE Tarefas SET arquivo = NULL WHERE id = ?", (id_tarefa,))
+
+
+if __name__ == "__main__":
+    # python tarefas.py [banco.db] -> worker separado: executa o que estiver na fila
+    if len(sys.argv) > 1:
+        funcoes_db.configurar(sys.argv[1])
+    funcoes_db.migrar()
+    print(f"Worker de tarefas em {funcoes_db.DB_PATH} (Ctrl+C para sair)")
+    iniciar_agenda()
+    try:
+        while True:
+            with funcoes_db.conexao() as conn:
+                pendentes = [id_ for (id_,) in conn.execute("SELECT id FROM Tarefas WHERE status = ? ORDER BY id", (NA_FILA,))]
+            for id_tarefa in pendentes:
+                _rodar(id_tarefa, funcoes_db.DB_PATH)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
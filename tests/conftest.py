@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import funcoes_db  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco novo e migrado em tmp_path, já configurado como o banco do módulo"""
+    caminho = str(tmp_path / "teste.db")
+    anterior = funcoes_db.DB_PATH
+    funcoes_db.configurar(caminho)
+    funcoes_db.migrar(caminho)
+    funcoes_db.limpar_cache()
+    yield caminho
+    funcoes_db.obter_pool(caminho).fechar()
+    funcoes_db.configurar(anterior)
+
+
+@pytest.fixture
+def cardapio(banco):
+    """Dois clientes e dois produtos ativos: devolve (ids dos clientes, ids dos produtos)"""
+    with funcoes_db.escrita("Clientes", "Produtos") as conn:
+        clientes = [conn.execute("INSERT INTO Clientes (nome, telefone) VALUES (?, ?)", (nome, tel)).lastrowid
+                    for nome, tel in (("Ana", "11988887777"), ("Beto", "11977776666"))]
+        produtos = [conn.execute("INSERT INTO Produtos (nome, preco, tamanho, ativo) VALUES (?, ?, ?, 1)",
+                                 (nome, preco, tam)).lastrowid
+                    for nome, preco, tam in (("Chocolate", 5000, "M"), ("Cenoura", 4000, "P"))]
+    return clientes, produtos
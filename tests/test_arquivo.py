@@ -0,0 +1,27 @@
+"""Arquivo de pedidos: o que sai do banco vivo continua sendo encontrado."""
+from datetime import date, timedelta
+
+import exportacao
+import funcoes_db
+
+
+def test_arquivar_e_ler_de_volta(banco, cardapio):
+    clientes, produtos = cardapio
+    antigo = (date.today() - timedelta(days=funcoes_db.HORIZONTE_ARQUIVO_DIAS + 30)).isoformat()
+    id_antigo, total = funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 2), (produtos[1], 1)], antigo, "Pix",
+                                                   chave="antigo", data_venda=antigo + " 10:00:00",
+                                                   status="Entregue")
+    id_novo, _ = funcoes_db.registrar_pedido(clientes[1], [(produtos[1], 1)], chave="novo")
+    ranking = funcoes_db.ranking_clientes().to_dict("records")
+
+    assert funcoes_db.arquivar_pedidos(caminho=banco) == (1, 2)
+    assert funcoes_db.ler_linhas("SELECT id FROM Pedidos") == [(id_novo,)]
+
+    pedido = funcoes_db.obter_pedido(id_antigo)
+    assert pedido["valor_total"] == total
+    assert [(i["nome"], i["quantidade"]) for i in pedido["itens"]] == [("Chocolate", 2), ("Cenoura", 1)]
+    # A chave continua valendo e os resumos continuam contando o pedido arquivado
+    assert funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 1)], chave="antigo") == (id_antigo, total)
+    assert funcoes_db.ranking_clientes().to_dict("records") == ranking
+    linhas = [linha for lote in exportacao.lotes_vendas(caminho=banco) for linha in lote]
+    assert sorted({linha[0] for linha in linhas}) == [id_antigo, id_novo]
@@ -0,0 +1,49 @@
+"""Backup, verificação e restauração (com os arquivos de pedidos junto)."""
+import json
+import zipfile
+from datetime import date, timedelta
+
+import pytest
+
+import backup
+import funcoes_db
+
+
+def test_backup_verificar_e_restaurar(banco, cardapio):
+    clientes, produtos = cardapio
+    antigo = (date.today() - timedelta(days=funcoes_db.HORIZONTE_ARQUIVO_DIAS + 30)).isoformat()
+    id_antigo, _ = funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 1)], antigo,
+                                               data_venda=antigo + " 10:00:00", status="Entregue")
+    funcoes_db.arquivar_pedidos(caminho=banco)
+    funcoes_db.registrar_pedido(clientes[1], [(produtos[1], 2)])
+
+    manifesto = backup.fazer_backup(banco)
+    assert manifesto["bancos"]["teste.db"]["contagens"]["Pedidos"] == 1
+    assert backup.verificar_backup(manifesto["arquivo"])["bancos"] == manifesto["bancos"]
+
+    funcoes_db.registrar_pedido(clientes[1], [(produtos[1], 1)])
+    funcoes_db.criar_cliente("Caio")
+    backup.restaurar(manifesto["arquivo"], banco)
+
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Pedidos") == [(1,)]
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Clientes") == [(2,)]
+    assert funcoes_db.obter_pedido(id_antigo)["itens"][0]["nome"] == "Chocolate"
+    # O estado de antes da restauração virou um backup novo, sem sobrescrever o restaurado
+    antes, restaurado = backup.listar_backups(banco)
+    assert antes["contagens"]["Pedidos"] == 2
+    assert restaurado["arquivo"] == manifesto["arquivo"] and restaurado["contagens"]["Pedidos"] == 1
+
+
+def test_backup_com_contagem_errada_e_recusado(banco, cardapio, tmp_path):
+    manifesto = backup.fazer_backup(banco)
+    adulterado = str(tmp_path / "adulterado.zip")
+    with zipfile.ZipFile(manifesto["arquivo"]) as original, zipfile.ZipFile(adulterado, "w") as copia:
+        for nome in original.namelist():
+            conteudo = original.read(nome)
+            if nome == backup.MANIFESTO:
+                dados = json.loads(conteudo)
+                dados["bancos"]["teste.db"]["contagens"]["Clientes"] += 1
+                conteudo = json.dumps(dados)
+            copia.writestr(nome, conteudo)
+    with pytest.raises(backup.BackupInvalido):
+        backup.verificar_backup(adulterado)
@@ -0,0 +1,41 @@
+"""Contrato do cache de consultas: cada escrita invalida só as tabelas que gravou;
+gravação de outra conexão (outro processo) descarta o cache do banco."""
+import sqlite3
+
+import funcoes_db
+
+SQL_CLIENTES = "SELECT id, nome FROM Clientes ORDER BY id"
+
+
+def _ler_clientes():
+    """Lê Clientes pelo cache; devolve (linhas, True se veio do banco)"""
+    antes = funcoes_db.estatisticas_cache["misses"]
+    linhas = funcoes_db.ler_linhas(SQL_CLIENTES, tabelas=("Clientes",))
+    return linhas, funcoes_db.estatisticas_cache["misses"] > antes
+
+
+def test_escrita_em_outra_tabela_mantem_o_cache(cardapio):
+    clientes, produtos = cardapio
+    _ler_clientes()
+    assert _ler_clientes()[1] is False
+    funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 1)])
+    assert _ler_clientes()[1] is False
+
+
+def test_escrita_na_tabela_descarta_o_cache(cardapio):
+    _ler_clientes()
+    with funcoes_db.escrita("Clientes") as conn:
+        conn.execute("INSERT INTO Clientes (nome) VALUES ('Caio')")
+    linhas, do_banco = _ler_clientes()
+    assert do_banco and linhas[-1][1] == "Caio"
+
+
+def test_gravacao_de_outra_conexao_descarta_o_cache(cardapio, banco):
+    _ler_clientes()
+    assert _ler_clientes()[1] is False
+    alheia = sqlite3.connect(banco)
+    with alheia:
+        alheia.execute("UPDATE Clientes SET nome = 'Ana Maria' WHERE nome = 'Ana'")
+    alheia.close()
+    linhas, do_banco = _ler_clientes()
+    assert do_banco and "Ana Maria" in [nome for _, nome in linhas]
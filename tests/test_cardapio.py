@@ -0,0 +1,22 @@
+"""A foto do cardápio só é trocada quando Produtos muda."""
+import funcoes_db
+
+
+def test_pedido_e_progresso_de_tarefa_mantem_a_foto(cardapio):
+    clientes, produtos = cardapio
+    foto = funcoes_db.foto_cardapio()
+    funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 2)])
+    with funcoes_db.escrita("Tarefas") as conn:
+        conn.execute("INSERT INTO Tarefas (tipo, parametros, criada_em) VALUES ('backup', '{}', '2026-01-01')")
+    assert funcoes_db.foto_cardapio() is foto
+
+
+def test_edicao_de_produto_troca_a_foto(cardapio):
+    _, produtos = cardapio
+    foto = funcoes_db.foto_cardapio()
+    versao = funcoes_db.obter_produto(produtos[0])["versao"]
+    funcoes_db.atualizar_produto(produtos[0], versao, preco=5500)
+    nova = funcoes_db.foto_cardapio()
+    assert nova is not foto
+    assert nova.por_id[produtos[0]].preco == 5500
+    assert foto.por_id[produtos[0]].preco == 5000  # quem estava com a foto antiga a tem inteira
@@ -0,0 +1,46 @@
+"""Carrinho da Nova Encomenda: uma linha por produto e o total sempre em dia."""
+import funcoes_db
+from carrinho import Carrinho
+
+
+def test_adicionar_de_novo_soma_na_mesma_linha(cardapio):
+    _, produtos = cardapio
+    foto = funcoes_db.foto_cardapio()
+    carrinho = Carrinho()
+    carrinho.adicionar(foto.por_id[produtos[0]], 1)
+    carrinho.adicionar(foto.por_id[produtos[1]], 1)
+    carrinho.adicionar(foto.por_id[produtos[0]], 2)
+    assert carrinho.itens() == [(produtos[0], 3), (produtos[1], 1)]
+    assert carrinho.total == 3 * 5000 + 4000
+
+
+def test_alterar_e_remover_mantem_o_total(cardapio):
+    _, produtos = cardapio
+    foto = funcoes_db.foto_cardapio()
+    carrinho = Carrinho()
+    carrinho.adicionar(foto.por_id[produtos[0]], 2)
+    carrinho.adicionar(foto.por_id[produtos[1]], 1)
+    carrinho.alterar(produtos[0], 5)
+    assert carrinho.total == 5 * 5000 + 4000
+    carrinho.remover(produtos[1])
+    carrinho.remover(produtos[1])  # linha já removida (outro rerun): nada muda
+    carrinho.alterar(produtos[1], 3)
+    assert carrinho.itens() == [(produtos[0], 5)]
+    assert carrinho.total == 5 * 5000
+
+
+def test_revalidar_tira_inativo_e_atualiza_preco(cardapio):
+    _, produtos = cardapio
+    carrinho = Carrinho()
+    foto = funcoes_db.foto_cardapio()
+    carrinho.adicionar(foto.por_id[produtos[0]], 2)
+    carrinho.adicionar(foto.por_id[produtos[1]], 1)
+
+    funcoes_db.atualizar_produto(produtos[0], funcoes_db.obter_produto(produtos[0])["versao"], preco=5500)
+    funcoes_db.atualizar_produto(produtos[1], funcoes_db.obter_produto(produtos[1])["versao"], ativo=0)
+    avisos = carrinho.revalidar(funcoes_db.foto_cardapio())
+
+    assert len(avisos) == 2
+    assert carrinho.itens() == [(produtos[0], 2)]
+    assert carrinho.total == 2 * 5500
+    assert carrinho.revalidar(funcoes_db.foto_cardapio()) == []
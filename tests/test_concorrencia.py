@@ -0,0 +1,65 @@
+"""Várias threads gravando pelas funções do app: nada se perde e os resumos batem."""
+import sqlite3
+import threading
+
+import funcoes_db
+
+THREADS = 6
+RODADAS = 15
+RESUMOS = ("Vendas_Diarias", "Clientes_Totais", "Clientes_Diario", "Carga_Diaria")
+
+
+def _resumos(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return {tabela: sorted(conn.execute(f"SELECT * FROM {tabela}")) for tabela in RESUMOS}
+    finally:
+        conn.close()
+
+
+def test_threads_sem_perda_e_resumos_iguais_ao_recalculo(banco, cardapio):
+    clientes, produtos = cardapio
+    confirmados, erros = [], []
+    trava = threading.Lock()
+
+    def escritor(numero):
+        try:
+            for rodada in range(RODADAS):
+                chave = f"thread-{numero}-{rodada}"
+                itens = [(produtos[rodada % 2], 1 + numero % 3), (produtos[numero % 2], 1)]
+                id_pedido, _ = funcoes_db.registrar_pedido(clientes[rodada % 2], itens, "2026-12-01", "Pix",
+                                                           chave=chave)
+                if rodada % 3 == 0:
+                    with funcoes_db.escrita("Pedidos") as conn:
+                        conn.execute("UPDATE Pedidos SET status = 'Pronto' WHERE id = ?", (id_pedido,))
+                # Leitura-modificação-gravação com versão: o conflito manda reler, nunca sobrescreve
+                while True:
+                    cliente = funcoes_db.obter_cliente(clientes[0])
+                    try:
+                        funcoes_db.atualizar_cliente(clientes[0], cliente["versao"],
+                                                     endereco=str(int(cliente["endereco"] or 0) + 1))
+                        break
+                    except funcoes_db.EdicaoConcorrente:
+                        continue
+                with trava:
+                    confirmados.append(chave)
+        except Exception as erro:
+            with trava:
+                erros.append(erro)
+
+    grupo = [threading.Thread(target=escritor, args=(n,)) for n in range(THREADS)]
+    for t in grupo:
+        t.start()
+    for t in grupo:
+        t.join()
+
+    assert not erros
+    gravadas = {chave for (chave,) in funcoes_db.ler_linhas("SELECT chave_idempotencia FROM Pedidos")}
+    assert gravadas == set(confirmados) and len(confirmados) == THREADS * RODADAS
+    assert funcoes_db.obter_cliente(clientes[0])["endereco"] == str(THREADS * RODADAS)
+
+    mantidos = _resumos(banco)
+    funcoes_db.reconstruir_vendas_diarias()
+    funcoes_db.reconstruir_totais_clientes()
+    funcoes_db.reconstruir_carga_diaria()
+    assert all(mantidos.values()) and _resumos(banco) == mantidos
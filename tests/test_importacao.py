@@ -0,0 +1,46 @@
+"""Importação de CSV: pedidos do relatorio_vendas.csv."""
+import io
+
+import exportacao
+import funcoes_db
+import importacao
+
+CABECALHO = "ID Pedido;Data;Cliente;Bolo;Qtd;Preço Unit;Total Item\n"
+
+
+def _importar_pedidos(linhas):
+    return importacao.importar("pedidos", io.StringIO(CABECALHO + "".join(linhas)))
+
+
+def test_lote_recusado_nao_deixa_cliente_nem_bolo_novo(banco):
+    resultado = _importar_pedidos([
+        "1;2024-03-01 10:00:00;Zé Novo;Bolo Novo;1;40,00;40,00\n",
+        "1;2024-03-01 10:00:00;Zé Novo;Bolo Velho;0;30,00;0,00\n",  # quantidade 0: o pedido é recusado
+    ])
+    assert resultado.gravados == 0 and len(resultado.erros) == 1
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Clientes") == [(0,)]
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Produtos") == [(0,)]
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Pedidos") == [(0,)]
+
+
+def test_exportar_e_importar_em_outro_banco(banco, cardapio, tmp_path):
+    clientes, produtos = cardapio
+    funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 2), (produtos[1], 1)], data_venda="2024-05-01 09:00:00")
+    funcoes_db.registrar_pedido(clientes[1], [(produtos[1], 3)], data_venda="2024-05-02 15:30:00")
+    relatorio = str(tmp_path / "relatorio_vendas.csv")
+    assert exportacao.exportar("csv", relatorio) == 3
+
+    destino = str(tmp_path / "destino.db")
+    funcoes_db.migrar(destino)
+    try:
+        resultado = importacao.importar("pedidos", relatorio, caminho=destino)
+        assert (resultado.gravados, resultado.erros) == (3, [])
+        sql = """SELECT Pedidos.data_venda, Clientes.nome, Produtos.nome, Pedidos_Itens.quantidade, Pedidos_Itens.total
+                 FROM Pedidos JOIN Pedidos_Itens ON Pedidos_Itens.id_pedido = Pedidos.id
+                 JOIN Clientes ON Clientes.id = Pedidos.id_cliente JOIN Produtos ON Produtos.id = Pedidos_Itens.id_produto
+                 ORDER BY 1, 3"""
+        assert funcoes_db.ler_linhas(sql, caminho=destino) == funcoes_db.ler_linhas(sql)
+        # Importar o mesmo relatório de novo não duplica nada
+        assert importacao.importar("pedidos", relatorio, caminho=destino).ignorados == 3
+    finally:
+        funcoes_db.obter_pool(destino).fechar()
@@ -0,0 +1,29 @@
+"""Migrações de um banco antigo (o esquema do main.py, sem user_version)."""
+import sqlite3
+
+import funcoes_db
+
+
+def test_itens_sem_pedido_ficam_de_quarentena(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    antigo = sqlite3.connect(caminho)
+    antigo.executescript("""
+        CREATE TABLE Clientes (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT, telefone TEXT, endereco TEXT);
+        CREATE TABLE Produtos (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT, preco REAL, tamanho TEXT);
+        CREATE TABLE Pedidos (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT, id_cliente INTEGER, valor_total REAL);
+        CREATE TABLE Pedidos_Itens (id INTEGER PRIMARY KEY AUTOINCREMENT, id_pedido INTEGER, id_produto INTEGER,
+                                    valor_unitario REAL, quantidade INTEGER, total REAL);
+        INSERT INTO Clientes (nome) VALUES ('Ana');
+        INSERT INTO Produtos (nome, preco) VALUES ('Chocolate', 50.0);
+        INSERT INTO Pedidos (data, id_cliente, valor_total) VALUES ('2020-01-02 10:00:00', 1, 100.0);
+        INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (1, 1, 50.0, 2, 100.0);
+        INSERT INTO Pedidos_Itens (id_pedido, id_produto, valor_unitario, quantidade, total) VALUES (7, 1, 50.0, 1, 50.0);
+    """)
+    antigo.close()
+
+    funcoes_db.migrar(caminho)
+
+    banco = sqlite3.connect(caminho)
+    assert banco.execute("SELECT id_pedido, quantidade FROM Pedidos_Itens").fetchall() == [(1, 2)]
+    assert banco.execute("SELECT id_pedido, quantidade FROM Pedidos_Itens_Orfaos").fetchall() == [(7, 1)]
+    banco.close()
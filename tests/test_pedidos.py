@@ -0,0 +1,37 @@
+"""Gravação de pedidos: as regras que valem para a tela, a API e a importação."""
+from datetime import date
+
+import pytest
+
+import funcoes_db
+
+
+def test_cliente_excluido_nao_recebe_pedido(cardapio):
+    clientes, produtos = cardapio
+    funcoes_db.excluir_cliente(clientes[0], funcoes_db.obter_cliente(clientes[0])["versao"])
+
+    with pytest.raises(funcoes_db.PedidoInvalido):
+        funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 1)])
+    recusado, aceito = funcoes_db.registrar_pedidos_isolados([
+        {"id_cliente": clientes[0], "itens": [(produtos[0], 1)]},
+        {"id_cliente": clientes[1], "itens": [(produtos[0], 1)]},
+    ])
+    assert isinstance(recusado, funcoes_db.PedidoInvalido)
+    assert aceito[1] == 5000
+    assert funcoes_db.ler_linhas("SELECT id_cliente FROM Pedidos") == [(clientes[1],)]
+
+
+def test_pedido_acima_da_capacidade_e_desfeito(cardapio):
+    clientes, produtos = cardapio
+    dia = date(2026, 12, 1)
+    funcoes_db.definir_pesos({"M": 2})
+    funcoes_db.definir_capacidade_dia(dia, 5)
+
+    funcoes_db.registrar_pedido(clientes[0], [(produtos[0], 2)], dia.isoformat())  # 2 x M = 4
+    with pytest.raises(funcoes_db.CapacidadeEsgotada):
+        funcoes_db.registrar_pedido(clientes[1], [(produtos[0], 1)], dia.isoformat())
+    assert funcoes_db.capacidade_do_dia(dia) == (4, 5)
+    assert funcoes_db.ler_linhas("SELECT COUNT(*) FROM Pedidos") == [(1,)]
+
+    funcoes_db.registrar_pedido(clientes[1], [(produtos[1], 1)], dia.isoformat())  # P pesa 1: ocupa a última vaga
+    assert funcoes_db.capacidade_do_dia(dia) == (5, 5)
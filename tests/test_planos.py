@@ -0,0 +1,16 @@
+"""As consultas quentes não podem voltar a varrer as tabelas grandes (funcoes_db.verificar_planos)."""
+import funcoes_db
+import gerar_dados
+
+
+def test_planos_banco_novo(banco):
+    assert funcoes_db.versao_esquema(banco) == len(funcoes_db.MIGRACOES)
+    assert funcoes_db.verificar_planos(banco) == []
+
+
+def test_planos_com_historico(banco):
+    # Com dados e estatísticas (ANALYZE) o planejador escolhe de verdade entre os índices
+    gerar_dados.gerar(banco, clientes=500, produtos=30, itens=5000, anos=1)
+    with funcoes_db.conexao(banco) as conn:
+        conn.execute("ANALYZE")
+    assert funcoes_db.verificar_planos(banco) == []
@@ -0,0 +1,29 @@
+import sqlite3
+
+import pytest
+
+import funcoes_db
+
+
+def test_fechar_com_conexoes_emprestadas(banco):
+    pool = funcoes_db.PoolConexoes(banco, tamanho=2)
+    with pool.conexao():
+        pass
+    emprestadas = [pool._pegar(), pool._pegar()]
+
+    # Só a livre seria fechada; as emprestadas voltam depois e são fechadas, não reaproveitadas
+    pool.fechar()
+    for conn in emprestadas:
+        pool._devolver(conn)
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    # Com a conta certa o pool abre conexões novas em vez de esperar ESPERA_POOL
+    novas = [pool._pegar(), pool._pegar()]
+    assert all(conn not in emprestadas for conn in novas)
+    assert pool._criadas == 2
+    for conn in novas:
+        pool._devolver(conn)
+    assert pool._livres.qsize() == 2
+    pool.fechar()
+    assert pool._criadas == 0